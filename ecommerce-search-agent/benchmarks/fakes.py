@@ -0,0 +1,289 @@
+"""
+Deterministic local stand-ins for the services the search API calls.
+
+Everything here is seeded, so two runs with the same arguments send the same
+requests through the same code paths and differ only in timing.
+"""
+import asyncio
+import hashlib
+import io
+import json
+import random
+import re
+from types import SimpleNamespace
+from typing import Any, Dict, List, Sequence, Set
+
+import numpy as np
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.chains.query_understanding import QueryUnderstandingResult
+from src.chains.sql_generation import SQL_GENERATION_PROMPT
+from src.embeddings.indexer import build_embedding_text, build_product_metadata
+
+EMBEDDING_DIM = 256
+
+CATEGORIES: Dict[str, List[str]] = {
+    "Electronics": ["headphones", "speaker", "charger", "smartwatch", "earbuds", "camera"],
+    "Computers": ["laptop", "mouse", "keyboard", "monitor", "webcam", "router"],
+    "Home": ["lamp", "blanket", "pillow", "curtain", "rug", "vase"],
+    "Kitchen": ["blender", "kettle", "toaster", "knife", "pan", "mug"],
+    "Sports": ["yoga mat", "dumbbell", "running shoes", "water bottle", "backpack", "tent"],
+    "Clothing": ["jacket", "hoodie", "t-shirt", "jeans", "sneakers", "scarf"],
+}
+FEATURES = [
+    "wireless", "bluetooth", "waterproof", "portable", "ergonomic", "rechargeable",
+    "lightweight", "stainless", "organic", "foldable", "noise cancelling", "compact",
+]
+BRANDS = ["Acme", "Northwind", "Globex", "Initech", "Umbrella", "Stark"]
+
+_WORD = re.compile(r"[a-z0-9]+")
+_UNDER_PRICE = re.compile(r"(?:under|below|less than)\s*\$?(\d+)")
+
+def generate_catalog(size: int, seed: int = 7) -> List[Dict[str, Any]]:
+    """Return ``size`` products shaped like the rows of the catalog query."""
+    rng = random.Random(seed)
+    products = []
+    for product_id in range(1, size + 1):
+        category = rng.choice(list(CATEGORIES))
+        noun = rng.choice(CATEGORIES[category])
+        features = rng.sample(FEATURES, 2)
+        brand = rng.choice(BRANDS)
+        products.append({
+            "id": product_id,
+            "name": f"{brand} {features[0]} {noun}",
+            "description": f"A {features[0]}, {features[1]} {noun} from {brand}.",
+            "price": round(rng.uniform(5, 800), 2),
+            "originalPrice": None,
+            "image": f"https://example.com/{product_id}.jpg",
+            "images": [],
+            "rating": round(rng.uniform(1, 5), 1),
+            "reviews": rng.randint(0, 5000),
+            "inStock": rng.random() > 0.1,
+            "stock": rng.randint(0, 200),
+            "features": features,
+            "specifications": {"brand": brand},
+            "category_name": category,
+        })
+    return products
+
+def generate_queries(catalog: Sequence[Dict[str, Any]], count: int, seed: int = 11) -> List[str]:
+    """Return ``count`` text queries built from catalog vocabulary."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        product = rng.choice(catalog)
+        noun = product["name"].split(" ", 2)[-1]
+        shape = rng.random()
+        if shape < 0.4:
+            queries.append(noun)
+        elif shape < 0.7:
+            queries.append(f"{rng.choice(FEATURES)} {noun} under ${rng.choice([50, 100, 200, 500])}")
+        else:
+            queries.append(f"{rng.choice(BRANDS)} {noun}")
+    return queries
+
+def hash_embedding(text: str, dim: int = EMBEDDING_DIM) -> List[float]:
+    """
+    Embed text as a normalized bag of hashed words.
+
+    Texts sharing words get similar vectors, which is enough for vector
+    search to return plausible neighbours.
+    """
+    vector = np.zeros(dim, dtype=np.float32)
+    for word in _WORD.findall(text.lower()):
+        digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dim
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = float(np.linalg.norm(vector))
+    return (vector / norm).tolist() if norm else vector.tolist()
+
+class InMemoryCollection:
+    """The subset of the ChromaDB ``Collection`` API used by the agents, backed by numpy."""
+
+    def __init__(self, name: str = "benchmark"):
+        self.name = name
+        self._ids: List[str] = []
+        self._documents: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._vectors = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self._positions: Dict[str, int] = {}
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def add(self, ids, embeddings, documents=None, metadatas=None) -> None:
+        documents = documents or [""] * len(ids)
+        metadatas = metadatas or [{}] * len(ids)
+        for id_, document, metadata in zip(ids, documents, metadatas):
+            self._positions[id_] = len(self._ids)
+            self._ids.append(id_)
+            self._documents.append(document)
+            self._metadatas.append(dict(metadata))
+        self._vectors = np.vstack([self._vectors, np.asarray(embeddings, dtype=np.float32)])
+
+    def get(self, ids=None, include=None, **_) -> Dict[str, Any]:
+        positions = [self._positions[id_] for id_ in (ids or self._ids) if id_ in self._positions]
+        return {
+            "ids": [self._ids[i] for i in positions],
+            "embeddings": [self._vectors[i].tolist() for i in positions],
+            "metadatas": [self._metadatas[i] for i in positions],
+            "documents": [self._documents[i] for i in positions],
+        }
+
+    def query(self, query_embeddings, n_results=10, where=None, **_) -> Dict[str, List[List[Any]]]:
+        # Cosine distance; vectors are normalized so the dot product is the similarity
+        similarities = self._vectors @ np.asarray(query_embeddings[0], dtype=np.float32)
+        distances = 1.0 - np.clip(similarities, -1.0, 1.0)
+        if where:
+            allowed = np.array([
+                all(metadata.get(key) == value for key, value in where.items())
+                for metadata in self._metadatas
+            ])
+            distances = np.where(allowed, distances, np.inf)
+        order = np.argsort(distances)[:n_results]
+        order = [i for i in order if np.isfinite(distances[i])]
+        return {
+            "ids": [[self._ids[i] for i in order]],
+            "documents": [[self._documents[i] for i in order]],
+            "metadatas": [[self._metadatas[i] for i in order]],
+            "distances": [[float(distances[i]) for i in order]],
+        }
+
+def build_collection(catalog: Sequence[Dict[str, Any]]) -> InMemoryCollection:
+    """Index the catalog the way the embedding indexer does."""
+    collection = InMemoryCollection()
+    texts = [build_embedding_text(product) for product in catalog]
+    collection.add(
+        ids=[str(product["id"]) for product in catalog],
+        embeddings=[hash_embedding(text) for text in texts],
+        documents=texts,
+        metadatas=[build_product_metadata(product, embedding_hash="benchmark") for product in catalog],
+    )
+    return collection
+
+class CannedChatModel(BaseChatModel):
+    """
+    Chat model that answers the query-understanding and SQL-generation
+    prompts locally.
+
+    Understanding is derived from the query by keyword matching against the
+    catalog vocabulary; SQL generation returns the prompt's example query.
+    An optional delay stands in for OpenAI latency.
+    """
+
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "canned"
+
+    @property
+    def _identifying_params(self) -> Dict[str, Any]:
+        return {"latency": self.latency}
+
+    @staticmethod
+    def _answer(messages: List[BaseMessage]) -> str:
+        if SQL_GENERATION_PROMPT[:60] in str(messages[0].content):
+            return "```sql\n" + SQL_GENERATION_PROMPT.split("Example output:\n", 1)[1].split(";", 1)[0] + ";\n```"
+        query = str(messages[-1].content).split("\nWeb context:", 1)[0].lower()
+        category = next(
+            (name for name, nouns in CATEGORIES.items() if any(noun in query for noun in nouns)),
+            None,
+        )
+        price = _UNDER_PRICE.search(query)
+        return json.dumps({
+            "category": category,
+            "features": [feature for feature in FEATURES if feature in query],
+            "price_range": {"min": None, "max": float(price.group(1))} if price else None,
+            "brands": [brand for brand in BRANDS if brand.lower() in query],
+            "constraints": [],
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._answer(messages)))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._generate(messages, stop, run_manager, **kwargs)
+
+class InMemorySQL:
+    """
+    Evaluates the canned SQL (category, feature, brand and price filters)
+    over the in-memory catalog, in place of ``SearchAgent._execute_sql``.
+    """
+
+    def __init__(self, catalog: Sequence[Dict[str, Any]]):
+        self.catalog = catalog
+
+    async def __call__(self, sql_query: str, understanding: QueryUnderstandingResult, limit: int) -> List[Dict]:
+        terms = [term.lower() for term in understanding.features[:3] + understanding.brands[:3]]
+        category = (understanding.category or "").lower()
+        price = understanding.price_range
+        rows = []
+        for product in self.catalog:
+            text = f"{product['name']} {product['description']}".lower()
+            category_match = bool(category) and category in product["category_name"].lower()
+            term_match = any(term in text for term in terms)
+            if not (category_match or term_match):
+                continue
+            if price and price.min is not None and product["price"] < price.min:
+                continue
+            if price and price.max is not None and product["price"] > price.max:
+                continue
+            rows.append({**product, "score": 1.0 if category_match else 0.9})
+        rows.sort(key=lambda row: (-row["score"], row["price"]))
+        return rows[:limit]
+
+def catalog_loader(catalog: Sequence[Dict[str, Any]]):
+    """Return a drop-in for ``fetch_products_by_ids`` reading the in-memory catalog."""
+    by_id = {product["id"]: product for product in catalog}
+
+    async def fetch_products_by_ids(ids: List[int]) -> List[Dict[str, Any]]:
+        return [dict(by_id[id_]) for id_ in ids if id_ in by_id]
+
+    return fetch_products_by_ids
+
+class FakeVisionClient:
+    """Mimics ``openai.AsyncOpenAI().chat.completions.create`` for image descriptions."""
+
+    def __init__(self, catalog: Sequence[Dict[str, Any]], latency: float = 0.0):
+        self.catalog = catalog
+        self.latency = latency
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, model: str, messages: List[Dict[str, Any]], **_) -> SimpleNamespace:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        image_url = messages[-1]["content"][1]["image_url"]["url"]
+        digest = int(hashlib.sha256(image_url.encode("utf-8")).hexdigest(), 16)
+        product = self.catalog[digest % len(self.catalog)]
+        message = SimpleNamespace(content=f"{product['name']}, {product['category_name'].lower()}")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None, model=model)
+
+def generate_images(count: int, seed: int = 13, size: int = 64) -> List[str]:
+    """Return ``count`` distinct solid-colour PNG images as base64 data URLs."""
+    import base64
+    from PIL import Image
+
+    rng = random.Random(seed)
+    images = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new("RGB", (size, size), color).save(buffer, format="PNG")
+        images.append("data:image/png;base64," + base64.b64encode(buffer.getvalue()).decode("ascii"))
+    return images
+
+async def fake_request_embeddings(texts: List[str], model: str) -> List[List[float]]:
+    """Drop-in for ``generator._request_embeddings`` using ``hash_embedding``."""
+    return [hash_embedding(text) for text in texts]
+
+def catalog_vocabulary(catalog: Sequence[Dict[str, Any]]) -> Set[str]:
+    """Return the words of the catalog, like ``fetch_catalog_terms``."""
+    words = set()
+    for product in catalog:
+        words.update(_WORD.findall(f"{product['name']} {product['category_name']} {' '.join(product['features'])}".lower()))
+    return {word for word in words if len(word) > 1}
@@ -0,0 +1,329 @@
+"""
+Offline load test for the search API.
+
+Drives /search/text, /search/image and /recommendations in-process at a fixed
+concurrency, with every external service replaced by the deterministic fakes
+in ``benchmarks/fakes.py``, and reports latency percentiles and throughput.
+
+    python -m benchmarks.run --requests 2000 --concurrency 32 --llm-latency-ms 300
+
+With ``--postgres`` the SQL stage runs against DATABASE_URL instead of the
+in-memory catalog; seed that database with the catalog first.
+"""
+import os
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from unittest import mock
+
+# Keep log output from dominating the measurement; must be set before src is imported
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("APP_NAME", "benchmark")
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+Request = Tuple[str, str, str, Optional[Dict[str, Any]]]
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Return the nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def summarize(latencies: List[float], errors: int, degraded: int, elapsed: float) -> Dict[str, Any]:
+    """Summarize one endpoint's latencies (seconds) as milliseconds and requests per second."""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "degraded": degraded,
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parse ``text=0.6,image=0.2,recommendations=0.2`` into endpoint weights."""
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("text", "image", "recommendations"):
+            raise ValueError(f"Unknown endpoint in mix: {name}")
+        weights[name] = float(weight)
+    return weights
+
+def build_plan(
+    count: int,
+    mix: Dict[str, float],
+    queries: List[str],
+    images: List[str],
+    catalog_size: int,
+    limit: int,
+    seed: int,
+) -> List[Request]:
+    """Return ``count`` (endpoint, method, path, body) requests, reproducible for a seed."""
+    rng = random.Random(seed)
+    names, weights = zip(*mix.items())
+    plan: List[Request] = []
+    for endpoint in rng.choices(names, weights=weights, k=count):
+        if endpoint == "text":
+            plan.append((endpoint, "POST", "/search/text", {"query": rng.choice(queries), "limit": limit}))
+        elif endpoint == "image":
+            plan.append((endpoint, "POST", "/search/image", {"image_base64": rng.choice(images), "limit": limit}))
+        else:
+            product_id = rng.randint(1, catalog_size)
+            plan.append((endpoint, "GET", f"/recommendations/{product_id}?limit={limit}", None))
+    return plan
+
+@contextmanager
+def local_services(
+    catalog: List[Dict[str, Any]],
+    llm_latency: float = 0.0,
+    embedding_latency: float = 0.0,
+    vision_latency: float = 0.0,
+    use_postgres: bool = False,
+) -> Iterator[Any]:
+    """
+    Point the app at local fakes for the duration of the block.
+
+    Yields:
+        The FastAPI app, with its agent dependencies overridden
+    """
+    import fakeredis
+
+    from benchmarks import fakes
+    from src.agents import recommendation_agent as recommendation_module
+    from src.agents import search_agent as search_module
+    from src.agents.image_agent import ImageAgent
+    from src.agents.recommendation_agent import RecommendationAgent
+    from src.agents.search_agent import SearchAgent
+    from src.api import dependencies
+    from src.chains.query_understanding import QueryUnderstandingChain
+    from src.chains.sql_generation import SQLGenerationChain
+    from src.database import catalog_snapshot, chromadb_client, redis_client
+    from src.database.product_cache import ProductCache
+    from src.embeddings import generator
+    from src.main import app
+    from src.utils.web_context import StaticWebContextProvider, set_web_context_provider
+    from src.utils.web_context_classifier import WebContextClassifier
+
+    collection = fakes.build_collection(catalog)
+    vocabulary = fakes.catalog_vocabulary(catalog)
+
+    async def get_collection():
+        return collection
+
+    async def load_vocabulary():
+        return vocabulary
+
+    async def request_embeddings(texts, model):
+        if embedding_latency:
+            await asyncio.sleep(embedding_latency)
+        return await fakes.fake_request_embeddings(texts, model)
+
+    with ExitStack() as stack:
+        server = fakeredis.FakeServer()
+        stack.enter_context(mock.patch.object(redis_client, "_redis", fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)))
+        stack.enter_context(mock.patch.object(redis_client, "_redis_bytes", fakeredis.aioredis.FakeRedis(server=server)))
+        stack.enter_context(mock.patch.object(chromadb_client, "get_collection", get_collection))
+        stack.enter_context(mock.patch.object(recommendation_module, "get_collection", get_collection))
+        stack.enter_context(mock.patch.object(generator, "_request_embeddings", request_embeddings))
+        stack.enter_context(mock.patch.object(generator, "get_embedding_store", lambda: None))
+        stack.enter_context(mock.patch.object(search_module, "pgvector_enabled", lambda: False))
+        # The app's lifespan does not run in-process, so the snapshot is built here
+        snapshot = None if use_postgres else catalog_snapshot.CatalogSnapshot.from_rows(
+            (p["id"], p["price"], p["rating"], p["stock"], p["inStock"], p["category_name"]) for p in catalog
+        )
+        stack.enter_context(mock.patch.object(catalog_snapshot, "_snapshot", snapshot))
+        set_web_context_provider(StaticWebContextProvider(default=[
+            {"title": "Buying guide", "href": "https://example.com/guide", "body": "What to look for when buying."},
+        ]))
+        stack.callback(set_web_context_provider, None)
+
+        llm = fakes.CannedChatModel(latency=llm_latency)
+        product_cache = ProductCache(loader=None if use_postgres else fakes.catalog_loader(catalog))
+        search_agent = SearchAgent(
+            tools=[],
+            web_context_classifier=WebContextClassifier(
+                vocabulary_loader=None if use_postgres else load_vocabulary,
+            ),
+            product_cache=product_cache,
+        )
+        search_agent.query_understanding = QueryUnderstandingChain(llm=llm)
+        search_agent.sql_generation = SQLGenerationChain(llm=llm)
+        if not use_postgres:
+            search_agent._execute_sql = fakes.InMemorySQL(catalog)
+        image_agent = ImageAgent(search_agent=search_agent)
+        image_agent.openai_client = fakes.FakeVisionClient(catalog, latency=vision_latency)
+        recommendation_agent = RecommendationAgent(product_cache=product_cache)
+
+        app.dependency_overrides.update({
+            dependencies.get_search_agent: lambda: search_agent,
+            dependencies.get_image_agent: lambda: image_agent,
+            dependencies.get_recommendation_agent: lambda: recommendation_agent,
+        })
+        stack.callback(app.dependency_overrides.clear)
+        yield app
+
+async def drive(app: Any, plan: List[Request], concurrency: int) -> Tuple[Dict[str, Dict[str, Any]], float]:
+    """
+    Send ``plan`` through the app with ``concurrency`` concurrent clients.
+
+    Returns:
+        Per-endpoint raw results and the wall-clock seconds taken
+    """
+    import httpx
+
+    results: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"latencies": [], "errors": 0, "degraded": 0})
+    pending = iter(plan)
+
+    async def client_loop(client: "httpx.AsyncClient") -> None:
+        # A shared iterator is safe: coroutines only switch at awaits
+        for endpoint, method, path, body in pending:
+            started = time.perf_counter()
+            response = await client.request(method, path, json=body)
+            elapsed = time.perf_counter() - started
+            result = results[endpoint]
+            result["latencies"].append(elapsed)
+            if response.status_code >= 400:
+                result["errors"] += 1
+            elif response.json().get("degradations"):
+                result["degraded"] += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        return results, time.perf_counter() - started
+
+async def run_benchmark(
+    requests: int = 500,
+    concurrency: int = 16,
+    warmup: int = 50,
+    mix: str = "text=0.6,image=0.2,recommendations=0.2",
+    catalog_size: int = 2000,
+    query_pool: int = 200,
+    image_pool: int = 20,
+    limit: int = 10,
+    seed: int = 42,
+    llm_latency_ms: float = 0.0,
+    embedding_latency_ms: float = 0.0,
+    vision_latency_ms: float = 0.0,
+    use_postgres: bool = False,
+) -> Dict[str, Any]:
+    """
+    Run the benchmark and return its report.
+
+    Returns:
+        Dict with the run parameters and per-endpoint (plus overall) statistics
+    """
+    from benchmarks import fakes
+
+    if min(requests, concurrency, catalog_size, query_pool, image_pool) < 1:
+        raise ValueError("requests, concurrency, catalog_size, query_pool and image_pool must be positive")
+    catalog = fakes.generate_catalog(catalog_size, seed=seed)
+    queries = fakes.generate_queries(catalog, query_pool, seed=seed)
+    images = fakes.generate_images(image_pool, seed=seed)
+    weights = parse_mix(mix)
+    plan = build_plan(warmup + requests, weights, queries, images, catalog_size, limit, seed)
+
+    with local_services(
+        catalog,
+        llm_latency=llm_latency_ms / 1000,
+        embedding_latency=embedding_latency_ms / 1000,
+        vision_latency=vision_latency_ms / 1000,
+        use_postgres=use_postgres,
+    ) as app:
+        if warmup:
+            await drive(app, plan[:warmup], concurrency)
+        results, elapsed = await drive(app, plan[warmup:], concurrency)
+
+    endpoints = {
+        name: summarize(result["latencies"], result["errors"], result["degraded"], elapsed)
+        for name, result in sorted(results.items())
+    }
+    endpoints["all"] = summarize(
+        [latency for result in results.values() for latency in result["latencies"]],
+        sum(result["errors"] for result in results.values()),
+        sum(result["degraded"] for result in results.values()),
+        elapsed,
+    )
+    return {
+        "parameters": {
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "mix": weights,
+            "catalog_size": catalog_size,
+            "query_pool": query_pool,
+            "seed": seed,
+            "llm_latency_ms": llm_latency_ms,
+            "embedding_latency_ms": embedding_latency_ms,
+            "vision_latency_ms": vision_latency_ms,
+            "postgres": use_postgres,
+        },
+        "elapsed_seconds": round(elapsed, 3),
+        "endpoints": endpoints,
+    }
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a report as a fixed-width table."""
+    columns = ["requests", "errors", "degraded", "rps", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+    lines = [
+        f"{'endpoint':<16}" + "".join(f"{column:>10}" for column in columns),
+    ]
+    for name, stats in report["endpoints"].items():
+        lines.append(f"{name:<16}" + "".join(f"{stats[column]:>10}" for column in columns))
+    lines.append(f"elapsed {report['elapsed_seconds']}s")
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Parse arguments, run the benchmark and print (and optionally save) the report."""
+    parser = argparse.ArgumentParser(description="Offline load test for the search API")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests sent first")
+    parser.add_argument("--mix", default="text=0.6,image=0.2,recommendations=0.2", help="Endpoint weights")
+    parser.add_argument("--catalog-size", type=int, default=2000, help="Products in the fake catalog")
+    parser.add_argument("--query-pool", type=int, default=200, help="Distinct text queries (smaller = more cache hits)")
+    parser.add_argument("--image-pool", type=int, default=20, help="Distinct images")
+    parser.add_argument("--limit", type=int, default=10, help="Results per request")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for catalog and request generation")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated chat model latency")
+    parser.add_argument("--embedding-latency-ms", type=float, default=0.0, help="Simulated embeddings API latency")
+    parser.add_argument("--vision-latency-ms", type=float, default=0.0, help="Simulated Vision API latency")
+    parser.add_argument("--postgres", action="store_true", help="Run the SQL stage against DATABASE_URL")
+    parser.add_argument("--output", help="Also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(
+        requests=args.requests,
+        concurrency=args.concurrency,
+        warmup=args.warmup,
+        mix=args.mix,
+        catalog_size=args.catalog_size,
+        query_pool=args.query_pool,
+        image_pool=args.image_pool,
+        limit=args.limit,
+        seed=args.seed,
+        llm_latency_ms=args.llm_latency_ms,
+        embedding_latency_ms=args.embedding_latency_ms,
+        vision_latency_ms=args.vision_latency_ms,
+        use_postgres=args.postgres,
+    ))
+    print(format_report(report))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
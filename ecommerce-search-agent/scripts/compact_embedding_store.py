@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Compact the local embedding store by dropping stale vectors and reclaiming space.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.embeddings.generator import DEFAULT_EMBEDDING_MODEL
+from src.embeddings.store import get_embedding_store
+from src.utils.logger import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+def main():
+    """Main compaction function."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--keep-model",
+        action="append",
+        dest="keep_models",
+        help=f"Model whose vectors are kept (repeatable, default: {DEFAULT_EMBEDDING_MODEL})",
+    )
+    parser.add_argument(
+        "--all-models",
+        action="store_true",
+        help="Keep vectors from every model",
+    )
+    parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=None,
+        help="Drop vectors that have not been read for this many days",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    store = get_embedding_store()
+    if store is None:
+        logger.error("Embedding store is disabled or unavailable (check EMBEDDING_STORE_PATH)")
+        sys.exit(1)
+
+    keep_models = None if args.all_models else (args.keep_models or [DEFAULT_EMBEDDING_MODEL])
+    result = store.compact(keep_models=keep_models, max_age_days=args.max_age_days)
+    print(f"Deleted {result['deleted']} vectors, {result['remaining']} remaining in {store.path}")
+
+if __name__ == "__main__":
+    main()
@@ -18,8 +18,9 @@ from sqlalchemy import select
 from dotenv import load_dotenv
 
 from database.models import Product, Category
-from database.chromadb_client import collection, add_product_embedding, chroma_client
+from database.chromadb_client import PRODUCTS_ALIAS, get_chroma_client, get_named_collection
 from utils.logger import get_logger
+from src.embeddings.generator import generate_embeddings
 
 # Load environment variables
 load_dotenv()
@@ -36,14 +37,13 @@ async def clear_chromadb():
     """Clear existing ChromaDB collection."""
     try:
         # Delete the collection and recreate it
+        chroma_client = get_chroma_client()
         chroma_client.delete_collection("products")
         logger.info("Cleared existing ChromaDB collection")
         
-        # Recreate the collection
-        from src.database.chromadb_client import openai_ef
+        # Recreate the collection (embeddings are supplied explicitly on insert)
         collection = chroma_client.get_or_create_collection(
             name="products",
-            embedding_function=openai_ef,
             metadata={"hnsw:space": "cosine"},
         )
         logger.info("Recreated ChromaDB collection")
@@ -68,6 +68,7 @@ async def migrate_product_embeddings():
             return
         
         logger.info(f"Migrating {len(products)} products to ChromaDB...")
+        collection = get_named_collection(PRODUCTS_ALIAS)
         
         batch_size = 10
         for i in range(0, len(products), batch_size):
@@ -107,11 +108,15 @@ async def migrate_product_embeddings():
             
             if ids:
                 try:
+                    # Embeddings already in the local store are not re-bought from OpenAI
+                    embeddings = await generate_embeddings(documents)
+
                     # Add batch to ChromaDB
                     collection.add(
                         ids=ids,
                         documents=documents,
                         metadatas=metadatas,
+                        embeddings=embeddings,
                     )
                     logger.info(f"Added batch of {len(ids)} products to ChromaDB")
                     
@@ -127,6 +132,7 @@ async def verify_migration():
     """Verify the ChromaDB migration."""
     try:
         # Test a simple search
+        collection = get_named_collection(PRODUCTS_ALIAS)
         results = collection.query(
             query_texts=["wireless headphones"],
             n_results=3,
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Enable the pgvector retrieval backend: install the extension, build the ANN
+index on products.vector and backfill embeddings for every product.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.database.catalog import stream_product_batches
+from src.database.pgvector_store import setup_pgvector, write_embeddings
+from src.embeddings.generator import generate_embeddings
+from src.embeddings.indexer import build_embedding_text
+from src.utils.logger import configure_logging, get_logger
+
+logger = get_logger(__name__)
+
+async def backfill_embeddings(batch_size: int = 256) -> int:
+    """Write embeddings for all catalog products into products.vector."""
+    written = 0
+    async for batch in stream_product_batches(fetch_size=batch_size):
+        # Embeddings already in the local store are not re-bought from OpenAI
+        embeddings = await generate_embeddings([build_embedding_text(product) for product in batch])
+        written += await write_embeddings(zip([product["id"] for product in batch], embeddings))
+        logger.info(f"Backfilled {written} product embeddings")
+    return written
+
+async def main():
+    """Main setup function."""
+    configure_logging()
+    await setup_pgvector()
+    written = await backfill_embeddings()
+    logger.info(f"pgvector setup completed, {written} products embedded")
+    logger.info("Set VECTOR_BACKEND=pgvector to serve searches from Postgres")
+
+if __name__ == "__main__":
+    asyncio.run(main())
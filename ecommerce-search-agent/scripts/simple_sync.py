@@ -8,16 +8,23 @@ import os
 import sys
 from pathlib import Path
 
-# Add src to Python path
+# Add src and the project root to Python path
 sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import asyncpg
 from dotenv import load_dotenv
 import chromadb
-from chromadb.config import Settings
-from openai import OpenAI
 
 from utils.logger import get_logger
+from src.database.catalog import CATALOG_COLUMNS
+from src.database.chromadb_client import (
+    create_versioned_collection,
+    garbage_collect_collections,
+    set_building_collection,
+    swap_alias,
+)
+from src.embeddings.indexer import index_products
 
 # Load environment variables
 load_dotenv()
@@ -30,120 +37,63 @@ DATABASE_URL = f"postgresql://{os.environ.get('POSTGRES_USER', 'ecommerce_user')
 # ChromaDB client (using persistent storage)
 chroma_client = chromadb.PersistentClient(path="./chroma_db")
 
-# OpenAI client
-openai_client = OpenAI(api_key=os.environ.get('OPENAI_API_KEY'))
+# Rows fetched per round trip from the server-side cursor
+FETCH_SIZE = int(os.environ.get("CATALOG_FETCH_SIZE", "500"))
 
-async def get_backend_products():
-    """Get all products from the backend database."""
+async def get_backend_products(fetch_size: int = FETCH_SIZE):
+    """Stream products from the backend database through a server-side cursor."""
     conn = await asyncpg.connect(DATABASE_URL)
-    
+
     try:
-        products = await conn.fetch("""
-            SELECT p.id, p.name, p.description, p.price, p."originalPrice", 
-                   p.image, p.images, p."inStock", p."categoryId",
-                   c.name as category_name
-            FROM products p
-            JOIN categories c ON p."categoryId" = c.id
-        """)
-        
-        return [dict(product) for product in products]
+        # asyncpg cursors only exist inside a transaction
+        async with conn.transaction():
+            cursor = await conn.cursor(f"""
+                SELECT {CATALOG_COLUMNS}
+                FROM products p
+                JOIN categories c ON p."categoryId" = c.id
+                ORDER BY p.id
+            """)
+            while True:
+                rows = await cursor.fetch(fetch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
     finally:
         await conn.close()
 
-def generate_embedding(text):
-    """Generate embedding for text using OpenAI."""
-    try:
-        response = openai_client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return response.data[0].embedding
-    except Exception as e:
-        logger.error(f"Error generating embedding: {e}")
-        return None
-
-def sync_products_to_chromadb(products):
-    """Sync products to ChromaDB."""
-    try:
-        # Get or create collection
-        collection = chroma_client.get_or_create_collection(
-            name="products",
-            metadata={"hnsw:space": "cosine"}
-        )
-        
-        # Clear existing data
-        try:
-            collection.delete(where={})
-            logger.info("Cleared existing ChromaDB data")
-        except:
-            pass
-        
-        # Prepare data for ChromaDB
-        documents = []
-        metadatas = []
-        ids = []
-        embeddings = []
-        
-        for product in products:
-            # Create document text for embedding
-            doc_text = f"{product['name']} {product['description']} {product['category_name']}"
-            
-            # Generate embedding
-            embedding = generate_embedding(doc_text)
-            if embedding is None:
-                logger.warning(f"Skipping product {product['id']} due to embedding error")
-                continue
-            
-            documents.append(doc_text)
-            metadatas.append({
-                "backend_id": product['id'],
-                "name": product['name'],
-                "description": product['description'] or '',
-                "price": float(product['price']),
-                "originalPrice": float(product['originalPrice']) if product['originalPrice'] else 0.0,
-                "image": product['image'] or '',
-                "images": ','.join(product['images']) if product['images'] else '',
-                "inStock": bool(product['inStock']),
-                "categoryId": product['categoryId'],
-                "category_name": product['category_name'] or ''
-            })
-            ids.append(str(product['id']))
-            embeddings.append(embedding)
-        
-        # Add to ChromaDB
-        if documents:
-            collection.add(
-                documents=documents,
-                metadatas=metadatas,
-                ids=ids,
-                embeddings=embeddings
-            )
-            logger.info(f"Added {len(documents)} products to ChromaDB")
-        else:
-            logger.warning("No products to add to ChromaDB")
-            
-    except Exception as e:
-        logger.error(f"Error syncing to ChromaDB: {e}")
-        raise
-
 async def main():
     """Main sync function."""
     try:
         logger.info("Starting simple backend data sync...")
-        
-        # Get products from backend
-        products = await get_backend_products()
-        logger.info(f"Found {len(products)} products in backend")
-        
-        if not products:
-            logger.warning("No products found in backend database")
+
+        # Build into a fresh versioned collection; the live one keeps serving searches
+        collection = await create_versioned_collection(client=chroma_client)
+        # The change listener writes to it too while it is being filled
+        await set_building_collection(collection.name)
+
+        # The indexer embeds with the query embedding model through the local
+        # embedding store and writes the same metadata (including the
+        # embedding hash) as every other indexing path
+        stats = await index_products(get_backend_products(), target=collection)
+        logger.info(
+            f"Synced {stats.processed} products "
+            f"({stats.embedded} embedded, {stats.refreshed} refreshed, {stats.failed} failed)"
+        )
+
+        if not stats.processed or stats.failed:
+            logger.warning(
+                f"{stats.failed} of {stats.processed} products failed, keeping the current collection"
+            )
+            await set_building_collection(None)
+            chroma_client.delete_collection(collection.name)
             return
-        
-        # Sync to ChromaDB
-        sync_products_to_chromadb(products)
-        
+
+        await swap_alias(collection.name)
+        await garbage_collect_collections(client=chroma_client)
+
         logger.info("Simple backend data sync completed successfully!")
-        
+
     except Exception as e:
         logger.error(f"Sync failed: {str(e)}")
         import traceback
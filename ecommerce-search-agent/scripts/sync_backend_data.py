@@ -5,6 +5,7 @@ This script connects to the same PostgreSQL database as the backend and syncs
 vector embeddings for existing products.
 """
 
+import argparse
 import asyncio
 import os
 import sys
@@ -18,8 +19,9 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy import text, select
 from dotenv import load_dotenv
 
+from database.chromadb_client import get_write_collections
 from database.models import Base, Product, Category
-from embeddings.indexer import index_product
+from embeddings.indexer import index_products, patch_products_metadata
 from utils.logger import get_logger
 
 # Load environment variables
@@ -58,50 +60,86 @@ async def add_vector_column_if_not_exists():
     
     await engine.dispose()
 
-async def sync_products_to_chromadb():
+async def sync_products_to_chromadb(fetch_size: int = 500):
     """Sync all products from PostgreSQL to ChromaDB with embeddings."""
     engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
     async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
     
     async with async_session() as session:
-        # Get all products with their categories
-        stmt = select(Product, Category).join(Category, Product.categoryId == Category.id)
-        result = await session.execute(stmt)
-        products_with_categories = result.all()
-        
-        logger.info(f"Found {len(products_with_categories)} products to sync")
+        # Stream products with their categories through a server-side cursor
+        stmt = (
+            select(Product, Category)
+            .join(Category, Product.categoryId == Category.id)
+            .order_by(Product.id)
+            .execution_options(yield_per=fetch_size)
+        )
+        result = await session.stream(stmt)
+
+        async def product_rows():
+            async for product, category in result:
+                yield {
+                    "id": product.id,
+                    "name": product.name,
+                    "description": product.description,
+                    "price": product.price,
+                    "originalPrice": product.originalPrice,
+                    "image": product.image,
+                    "images": product.images,
+                    "rating": product.rating,
+                    "reviews": product.reviews,
+                    "inStock": product.inStock,
+                    "stock": product.stock,
+                    "features": product.features,
+                    "specifications": product.specifications,
+                    "category_name": category.name,
+                }
+
+        stats = await index_products(product_rows())
+        logger.info(
+            f"Synced {stats.processed} products "
+            f"({stats.embedded} embedded, {stats.refreshed} refreshed, {stats.failed} failed)"
+        )
+    
+    await engine.dispose()
+
+async def sync_product_metadata_to_chromadb(batch_size: int = 500):
+    """Patch price, stock and rating metadata in ChromaDB without re-embedding."""
+    engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async with async_session() as session:
+        # Only the non-embedded columns are read
+        stmt = select(
+            Product.id,
+            Product.price,
+            Product.rating,
+            Product.reviews,
+            Product.inStock,
+            Product.stock,
+        ).execution_options(yield_per=batch_size)
+        result = await session.stream(stmt)
         
-        for product, category in products_with_categories:
-            product_data = {
-                "id": product.id,
-                "name": product.name,
-                "description": product.description,
-                "price": product.price,
-                "originalPrice": product.originalPrice,
-                "image": product.image,
-                "images": product.images,
-                "rating": product.rating,
-                "reviews": product.reviews,
-                "inStock": product.inStock,
-                "stock": product.stock,
-                "features": product.features,
-                "specifications": product.specifications,
-                "category_name": category.name,
-            }
-            
-            try:
-                await index_product(product_data)
-                logger.info(f"Synced product {product.id}: {product.name}")
-            except Exception as e:
-                logger.error(f"Failed to sync product {product.id}: {str(e)}")
+        patched = 0
+        async for partition in result.mappings().partitions():
+            rows = [dict(row) for row in partition]
+            # During a rebuild the collection being filled is patched too, so
+            # the alias swap does not publish stale prices
+            for collection in await get_write_collections():
+                patched += await patch_products_metadata(rows, collection)
+        logger.info(f"Patched metadata for {patched} products across write collections")
     
     await engine.dispose()
 
-async def main():
+async def main(metadata_only: bool = False):
     """Main sync function."""
     try:
         logger.info("Starting backend data sync...")
         
+        if metadata_only:
+            await sync_product_metadata_to_chromadb()
+            logger.info("Backend metadata sync completed successfully!")
+            return
+        
         # Step 1: Add vector column if needed
         await add_vector_column_if_not_exists()
         
@@ -115,4 +153,11 @@ async def main():
         raise
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Sync backend products to ChromaDB")
+    parser.add_argument(
+        "--metadata-only",
+        action="store_true",
+        help="Only patch price/stock/rating metadata, without embedding calls",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(metadata_only=args.metadata_only))
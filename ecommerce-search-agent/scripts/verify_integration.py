@@ -103,9 +103,10 @@ async def test_chromadb_integration():
     print("\n🔍 Testing ChromaDB integration...")
     
     try:
-        from database.chromadb_client import collection, search_similar_products
+        from database.chromadb_client import get_collection, search_similar_products
         
-        # Test collection exists and has data
+        # Test the aliased collection exists and has data
+        collection = await get_collection()
         count = collection.count()
         print(f"✅ ChromaDB collection has {count} products")
         
@@ -1,10 +1,14 @@
-from typing import Dict, List, Optional, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Any
 from pydantic import BaseModel, Field, validator
-from datetime import datetime, timedelta
+from datetime import datetime
 import os
 import asyncio
+import uuid
+from src.database import task_queue
+from src.database.redis_client import get_redis
+from src.embeddings.indexer import IndexingStats
+from src.embeddings.rebuild import RebuildCheckpoint, rebuild_collection
 from src.utils.logger import get_logger
-from scripts.rebuild_embeddings import main as rebuild_embeddings_main
 
 logger = get_logger(__name__)
 
@@ -13,6 +17,8 @@ class AdminConfig(BaseModel):
     min_rebuild_interval: int = Field(default=3600, ge=300, le=86400)  # 1 hour default
     max_concurrent_tasks: int = Field(default=1, ge=1, le=5)
     task_timeout: int = Field(default=3600, ge=60, le=7200)  # 1 hour default
+    stale_task_after: int = Field(default=120, ge=30, le=3600)  # Seconds without a heartbeat
+    max_task_attempts: int = Field(default=5, ge=1, le=20)  # Resumes after a timeout
 
     @validator('min_rebuild_interval')
     def validate_rebuild_interval(cls, v: int) -> int:
@@ -29,6 +35,11 @@ class AdminTask(BaseModel):
     start_time: datetime
     end_time: Optional[datetime] = None
     error: Optional[str] = None
+    processed: int = 0
+    total: Optional[int] = None
+    items_per_sec: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    attempts: int = 0
 
     @validator('status')
     def validate_status(cls, v: str) -> str:
@@ -38,8 +49,15 @@ class AdminTask(BaseModel):
             raise ValueError(f"status must be one of {valid_statuses}")
         return v
 
+LAST_REBUILD_KEY = "admin:last_rebuild"
+
 class AdminAgent:
-    """Agent for handling admin tasks."""
+    """Agent for handling admin tasks.
+
+    Tasks are stored in Redis and executed by a separate worker process
+    (``python -m src.worker``), so their status is shared by every API
+    worker and survives restarts.
+    """
 
     def __init__(
         self,
@@ -52,8 +70,6 @@ class AdminAgent:
             config: Optional configuration for admin operations
         """
         self.config = config or AdminConfig()
-        self.tasks: Dict[str, AdminTask] = {}
-        self.last_rebuild_time: Optional[datetime] = None
 
     async def verify_admin_token(self, token: str) -> bool:
         """
@@ -84,7 +100,7 @@ class AdminAgent:
         task_id: str,
     ) -> AdminTask:
         """
-        Rebuild product embeddings.
+        Queue a product embedding rebuild.
         
         Args:
             task_id: Unique identifier for the task
@@ -95,84 +111,41 @@ class AdminAgent:
         Raises:
             ValueError: If rebuild cannot be started
         """
-        # Check if enough time has passed since last rebuild
-        if self.last_rebuild_time and datetime.now() - self.last_rebuild_time < timedelta(seconds=self.config.min_rebuild_interval):
+        # Only one rebuild per interval across all API workers
+        allowed = await get_redis().set(
+            LAST_REBUILD_KEY,
+            task_id,
+            nx=True,
+            ex=self.config.min_rebuild_interval,
+        )
+        if not allowed:
             raise ValueError(
                 f"Please wait at least {self.config.min_rebuild_interval / 3600} hours between rebuild requests"
             )
         
-        # Create task
         task = AdminTask(
             task_id=task_id,
             task_type="rebuild_embeddings",
-            status="running",
+            status="pending",
             start_time=datetime.now(),
         )
-        self.tasks[task_id] = task
-        
         try:
-            # Update last rebuild time
-            self.last_rebuild_time = datetime.now()
-            
-            # Run rebuild in background
-            asyncio.create_task(self._run_rebuild_task(task))
-            
+            await task_queue.save_task(task_id, task.dict())
+            await task_queue.enqueue_task(task_id)
             logger.info(
-                "Started embedding rebuild task",
+                "Queued embedding rebuild task",
                 task_id=task_id,
             )
             return task
         except Exception as e:
-            task.status = "failed"
-            task.error = str(e)
-            task.end_time = datetime.now()
+            await get_redis().delete(LAST_REBUILD_KEY)
             logger.error(
-                "Failed to start rebuild task",
+                "Failed to queue rebuild task",
                 task_id=task_id,
                 error=str(e),
             )
             raise
 
-    async def _run_rebuild_task(self, task: AdminTask) -> None:
-        """
-        Run the rebuild task in the background.
-        
-        Args:
-            task: The task to run
-        """
-        try:
-            # Run rebuild with timeout
-            await asyncio.wait_for(
-                rebuild_embeddings_main(),
-                timeout=self.config.task_timeout,
-            )
-            
-            # Update task status
-            task.status = "completed"
-            task.end_time = datetime.now()
-            
-            logger.info(
-                "Completed embedding rebuild task",
-                task_id=task.task_id,
-            )
-        except asyncio.TimeoutError:
-            task.status = "failed"
-            task.error = "Task timed out"
-            task.end_time = datetime.now()
-            logger.error(
-                "Rebuild task timed out",
-                task_id=task.task_id,
-            )
-        except Exception as e:
-            task.status = "failed"
-            task.error = str(e)
-            task.end_time = datetime.now()
-            logger.error(
-                "Rebuild task failed",
-                task_id=task.task_id,
-                error=str(e),
-            )
-
     async def get_task_status(self, task_id: str) -> Optional[AdminTask]:
         """
         Get the status of a task.
@@ -183,7 +156,8 @@ class AdminAgent:
         Returns:
             Optional[AdminTask]: Task status if found
         """
-        return self.tasks.get(task_id)
+        data = await task_queue.load_task(task_id)
+        return AdminTask(**data) if data else None
 
     async def list_tasks(
         self,
@@ -200,7 +174,7 @@ class AdminAgent:
         Returns:
             List of matching tasks
         """
-        tasks = list(self.tasks.values())
+        tasks = [AdminTask(**data) for data in await task_queue.list_tasks()]
         
         if task_type:
             tasks = [t for t in tasks if t.task_type == task_type]
@@ -208,4 +182,150 @@ class AdminAgent:
         if status:
             tasks = [t for t in tasks if t.status == status]
         
-        return tasks 
\ No newline at end of file
+        return tasks
+
+class AdminWorker:
+    """Worker that executes queued admin tasks outside the API process."""
+
+    def __init__(
+        self,
+        config: Optional[AdminConfig] = None,
+    ):
+        """
+        Initialize the admin worker.
+        
+        Args:
+            config: Optional configuration for admin operations
+        """
+        self.config = config or AdminConfig()
+        self.worker_id = str(uuid.uuid4())
+        self.handlers: Dict[str, Callable[[AdminTask], Awaitable[None]]] = {
+            "rebuild_embeddings": self._run_rebuild_task,
+        }
+        self._stopping = asyncio.Event()
+        self._running: Set[asyncio.Task] = set()
+
+    def stop(self) -> None:
+        """Ask the worker to stop after the running tasks."""
+        self._stopping.set()
+
+    async def run_forever(self) -> None:
+        """Claim and run up to ``max_concurrent_tasks`` tasks at a time until stopped."""
+        logger.info("Admin worker started", worker_id=self.worker_id)
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while not self._stopping.is_set():
+                # Mark this worker alive before claiming, so a claimed task is
+                # never seen as stale
+                await task_queue.heartbeat_worker(self.worker_id, self.config.stale_task_after)
+                await task_queue.requeue_stale_tasks()
+                if len(self._running) >= self.config.max_concurrent_tasks:
+                    await asyncio.wait(set(self._running), timeout=5, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                task_id = await task_queue.claim_task(self.worker_id, timeout=5)
+                if task_id:
+                    running = asyncio.create_task(self.process(task_id))
+                    self._running.add(running)
+                    running.add_done_callback(self._running.discard)
+            if self._running:
+                await asyncio.gather(*self._running, return_exceptions=True)
+        finally:
+            heartbeat.cancel()
+        logger.info("Admin worker stopped", worker_id=self.worker_id)
+
+    async def process(self, task_id: str) -> None:
+        """
+        Run a single claimed task and record its outcome.
+        
+        Args:
+            task_id: ID of the claimed task
+        """
+        data = await task_queue.load_task(task_id)
+        if not data:
+            logger.warning("Claimed unknown admin task", task_id=task_id)
+            await task_queue.ack_task(self.worker_id, task_id)
+            return
+        task = AdminTask(**data)
+        if task.status in {"completed", "failed"}:
+            await task_queue.ack_task(self.worker_id, task_id)
+            return
+
+        handler = self.handlers.get(task.task_type)
+        task.status = "running"
+        task.attempts += 1
+        task.error = None
+        await task_queue.save_task(task_id, task.dict())
+
+        try:
+            if not handler:
+                raise ValueError(f"Unknown task type: {task.task_type}")
+            await asyncio.wait_for(handler(task), timeout=self.config.task_timeout)
+            task.status = "completed"
+            task.eta_seconds = 0.0
+            logger.info(
+                "Completed admin task",
+                task_id=task_id,
+                task_type=task.task_type,
+            )
+        except asyncio.TimeoutError:
+            task.error = "Task timed out"
+            # Progress is checkpointed as it goes, so a timed-out task can
+            # pick up where it stopped instead of starting over
+            if await task_queue.load_checkpoint(task_id) and task.attempts < self.config.max_task_attempts:
+                task.status = "pending"
+                await task_queue.save_task(task_id, task.dict())
+                await task_queue.ack_task(self.worker_id, task_id)
+                await task_queue.enqueue_task(task_id)
+                logger.warning(
+                    "Admin task timed out, requeued to resume from its checkpoint",
+                    task_id=task_id,
+                    attempts=task.attempts,
+                )
+                return
+            task.status = "failed"
+            logger.error(
+                "Admin task timed out",
+                task_id=task_id,
+            )
+        except Exception as e:
+            task.status = "failed"
+            task.error = str(e)
+            logger.error(
+                "Admin task failed",
+                task_id=task_id,
+                error=str(e),
+            )
+        task.end_time = datetime.now()
+        await task_queue.save_task(task_id, task.dict())
+        await task_queue.ack_task(self.worker_id, task_id)
+
+    async def _heartbeat(self) -> None:
+        """Keep the worker marked alive even while its tasks report no progress."""
+        while True:
+            await asyncio.sleep(self.config.stale_task_after / 3)
+            try:
+                await task_queue.heartbeat_worker(self.worker_id, self.config.stale_task_after)
+            except Exception as e:
+                logger.error("Error refreshing worker heartbeat", worker_id=self.worker_id, error=str(e))
+
+    async def _run_rebuild_task(self, task: AdminTask) -> None:
+        """
+        Rebuild embeddings, resuming from the task's checkpoint if it has one.
+        
+        Args:
+            task: The task to run
+        """
+        saved = await task_queue.load_checkpoint(task.task_id)
+        checkpoint = RebuildCheckpoint(**saved) if saved else None
+
+        async def on_checkpoint(checkpoint: RebuildCheckpoint, stats: IndexingStats) -> None:
+            resumed = checkpoint.processed - stats.watermark_count
+            task.total = checkpoint.expected
+            task.processed = resumed + stats.processed
+            task.items_per_sec = round(stats.items_per_sec, 2)
+            remaining = max(task.total - task.processed, 0)
+            task.eta_seconds = round(remaining / stats.items_per_sec, 1) if stats.items_per_sec else None
+            await task_queue.save_checkpoint(task.task_id, checkpoint.dict())
+            await task_queue.save_task(task.task_id, task.dict())
+
+        await rebuild_collection(checkpoint=checkpoint, on_checkpoint=on_checkpoint)
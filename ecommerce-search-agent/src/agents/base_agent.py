@@ -1,16 +1,12 @@
 from typing import Any, Dict, List, Optional, TypeVar, Union
 from pydantic import BaseModel, Field, validator
 
-from langchain.agents import AgentExecutor
-from langchain.agents.format_scratchpad import format_to_openai_function_messages
-from langchain.agents.output_parsers import OpenAIFunctionsAgentOutputParser
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.schema import AgentAction, AgentFinish, BaseMessage
-from langchain.tools import BaseTool
-from langchain.tools.render import format_tool_to_openai_function
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import BaseMessage
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 
+from src.chains.usage_callback import OpenAIUsageCallback
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -59,16 +55,27 @@ class BaseAgent:
         self.system_prompt = system_prompt
         self.model_name = model_name
         self.config = config or AgentConfig()
+        self._agent_executor = None
 
-        # Create the agent
-        self.agent = self._create_agent()
-        self.agent_executor = AgentExecutor(
-            agent=self.agent,
-            tools=tools,
-            verbose=self.config.verbose,
-            handle_parsing_errors=True,
-            max_iterations=self.config.max_iterations,
-        )
+    @property
+    def agent_executor(self) -> Any:
+        """
+        Tool-calling executor, built on first use.
+
+        Direct pipelines such as ``SearchAgent.search`` never touch it, so
+        constructing an agent does not pay for LangChain's agent runtime.
+        """
+        if self._agent_executor is None:
+            from langchain.agents import AgentExecutor
+
+            self._agent_executor = AgentExecutor(
+                agent=self._create_agent(),
+                tools=self.tools,
+                verbose=self.config.verbose,
+                handle_parsing_errors=True,
+                max_iterations=self.config.max_iterations,
+            )
+        return self._agent_executor
 
     def _create_agent(self) -> Any:
         """
@@ -77,6 +84,8 @@ class BaseAgent:
         Returns:
             Configured agent instance
         """
+        from langchain.agents.output_parsers import OpenAIFunctionsAgentOutputParser
+
         prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", self.system_prompt),
@@ -90,6 +99,7 @@ class BaseAgent:
             model=self.model_name,
             temperature=self.config.temperature,
             max_tokens=self.config.max_tokens,
+            callbacks=[OpenAIUsageCallback("agent")],
         )
         return prompt | llm | OpenAIFunctionsAgentOutputParser()
 
@@ -128,7 +138,7 @@ class BaseAgent:
                 "chat_history": chat_history or [],
             })
             
-            logger.info(
+            logger.debug(
                 "Agent execution completed",
                 output=result,
             )
@@ -1,17 +1,26 @@
 import os
 from dotenv import load_dotenv
 load_dotenv()
-import base64
-from typing import Optional, Dict
+import asyncio
+from typing import Optional, Dict, Tuple, Union
 import openai
+from src.database.image_cache import get_cached_description, set_cached_description
+from src.utils.image_hash import decode_data_url, dhash, exact_hash, open_image
+from src.utils.deadline import Deadline, StageTimeout, run_stage
+from src.utils.image_processing import downscale_image, to_data_url
 from src.utils.logger import get_logger
+from src.utils.metrics import record_cache, record_openai_call
 from src.agents.search_agent import SearchAgent
-from langchain.tools import Tool
+from langchain_core.tools import Tool
 from src.database.chromadb_client import search_similar_products
 from src.database.postgres import get_db
 
 logger = get_logger(__name__)
 
+# Image searches get a larger budget than text searches to cover the Vision call
+IMAGE_SEARCH_BUDGET_SECONDS = float(os.environ.get("IMAGE_SEARCH_BUDGET_MS", "8000")) / 1000
+DEGRADED_NO_IMAGE_DESCRIPTION = "no_image_description"
+
 # Create tools for the search agent
 search_tools = [
     Tool(
@@ -28,13 +37,59 @@ search_tools = [
 
 class ImageAgent:
     """Agent for handling image+text search queries."""
-    def __init__(self, model_name: str = "gpt-4o-mini"):
+    def __init__(self, model_name: str = "gpt-4o-mini", search_agent: Optional[SearchAgent] = None):
+        """
+        Initialize the image agent.
+
+        Args:
+            model_name: Vision-capable OpenAI model
+            search_agent: Search agent to reuse; a dedicated one is created if omitted
+        """
         self.model_name = model_name
-        self.search_agent = SearchAgent(tools=search_tools)
+        self.search_agent = search_agent or SearchAgent(tools=search_tools)
         self.openai_client = openai.AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"])
 
-    async def extract_image_features(self, image_base64: str, prompt: Optional[str] = None) -> str:
-        """Use OpenAI Vision API to extract features from the image."""
+    @staticmethod
+    def _prepare_image(image: Union[str, bytes]) -> Tuple[Optional[int], str, str]:
+        """
+        Decode, hash and downscale an image in one pass.
+
+        Args:
+            image: Base64 data URL or raw image bytes
+
+        Returns:
+            Tuple of (perceptual hash, exact content hash, data URL to send to Vision)
+        """
+        image_bytes = decode_data_url(image) if isinstance(image, str) else image
+        # Decoded once, then shared by hashing and downscaling
+        decoded = open_image(image_bytes)
+        phash = dhash(decoded) if decoded is not None else None
+        processed, image_type = downscale_image(image_bytes, image=decoded)
+        content_hash = exact_hash(image_bytes)
+        return phash, content_hash, to_data_url(processed, image_type)
+
+    async def extract_image_features(self, image: Union[str, bytes], prompt: Optional[str] = None) -> str:
+        """
+        Use OpenAI Vision API to extract features from the image.
+
+        The image is downscaled off the event loop before upload, and
+        descriptions are cached by perceptual hash, so repeated uploads of the
+        same photo (including re-encodes and resizes) skip the Vision call.
+        """
+        try:
+            phash, content_hash, image_url = await asyncio.to_thread(self._prepare_image, image)
+        except ValueError as e:
+            if not isinstance(image, str):
+                raise
+            logger.warning("Could not preprocess image, sending original", error=str(e))
+            phash, content_hash, image_url = None, None, image
+        if content_hash:
+            cached = await get_cached_description(prompt, phash, content_hash)
+            record_cache("image_description", bool(cached))
+            if cached:
+                logger.info("Returning cached image description", perceptual=phash is not None)
+                return cached
+
         try:
             # OpenAI Vision API expects the image as a base64-encoded string in a data URL
             response = await self.openai_client.chat.completions.create(
@@ -43,23 +98,59 @@ class ImageAgent:
                     {"role": "system", "content": "You are an expert at describing e-commerce product images for search."},
                     {"role": "user", "content": [
                         {"type": "text", "text": prompt or "Describe the product in this image for e-commerce search."},
-                        {"type": "image_url", "image_url": {"url": image_base64}},
+                        {"type": "image_url", "image_url": {"url": image_url}},
                     ]},
                 ],
                 max_tokens=256,
             )
+            if response.usage:
+                record_openai_call(
+                    "vision",
+                    response.model,
+                    prompt_tokens=response.usage.prompt_tokens,
+                    completion_tokens=response.usage.completion_tokens,
+                )
             description = response.choices[0].message.content
             logger.info("Extracted image features", description=description)
+            if content_hash and description:
+                await set_cached_description(prompt, phash, content_hash, description)
             return description
         except Exception as e:
             logger.error("Error extracting image features", error=str(e))
             raise
 
-    async def search(self, image_base64: str, query: Optional[str] = None) -> Dict:
-        """Perform image+text search."""
-        # Step 1: Extract features from image
-        image_features = await self.extract_image_features(image_base64, prompt=query)
+    async def search(self, image: Union[str, bytes], query: Optional[str] = None, limit: int = 5) -> Dict:
+        """
+        Perform image+text search.
+
+        Args:
+            image: Base64 data URL or raw image bytes (e.g. from a multipart upload)
+            query: Optional accompanying text
+            limit: Number of products to return
+
+        Raises:
+            StageTimeout: If the image could not be described in time and there is no text to fall back on
+        """
+        deadline = Deadline(IMAGE_SEARCH_BUDGET_SECONDS)
+        budget = self.search_agent.budget
+        degradations = []
+        # Step 1: Extract features from image, leaving time for the text search
+        try:
+            image_features = await run_stage(
+                "image_description",
+                self.extract_image_features(image, prompt=query),
+                deadline,
+                reserve=budget.understanding_seconds + budget.retrieval_seconds,
+            )
+        except StageTimeout:
+            if not query:
+                raise
+            image_features = ""
+            degradations.append(DEGRADED_NO_IMAGE_DESCRIPTION)
         # Step 2: Combine with text (if any)
         combined_query = f"{query or ''} {image_features}".strip()
-        # Step 3: Use the search agent
-        return await self.search_agent.search(combined_query) 
\ No newline at end of file
+        # Step 3: Use the search agent within the remaining budget
+        result = await self.search_agent.search(combined_query, limit=limit, deadline=deadline)
+        if degradations:
+            result = {**result, "degradations": degradations + result.get("degradations", [])}
+        return result
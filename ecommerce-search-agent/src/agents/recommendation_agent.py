@@ -1,11 +1,17 @@
-from typing import Dict, List, Optional, Any
+import asyncio
+from typing import Dict, List, Optional, Any, Tuple
 from pydantic import BaseModel, Field, validator
-from src.database.chromadb_client import collection
-from src.database.redis_client import get_cache, set_cache
+from src.database.catalog_snapshot import CatalogFilter, CatalogSnapshot, get_catalog_snapshot
+from src.database.chromadb_client import get_collection
+from src.database.product_cache import ProductCache, get_product_cache
+from src.database.redis_client import get_cache_field, set_cache_field
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Candidates ranked per requested result when filters may discard some
+FILTER_OVERFETCH = 4
+
 class RecommendationConfig(BaseModel):
     """Configuration for product recommendations."""
     n_results: int = Field(default=10, ge=1, le=50)
@@ -49,19 +55,23 @@ class RecommendationAgent:
     def __init__(
         self,
         config: Optional[RecommendationConfig] = None,
+        product_cache: Optional[ProductCache] = None,
     ):
         """
         Initialize the recommendation agent.
         
         Args:
             config: Optional configuration for recommendations
+            product_cache: Resolves recommended ids to catalog records
         """
         self.config = config or RecommendationConfig()
+        self.product_cache = product_cache or get_product_cache()
 
     async def recommend(
         self,
         product_id: str,
         n_results: Optional[int] = None,
+        filters: Optional[CatalogFilter] = None,
     ) -> Dict[str, Any]:
         """
         Get product recommendations based on similarity.
@@ -69,6 +79,7 @@ class RecommendationAgent:
         Args:
             product_id: ID of the product to get recommendations for
             n_results: Optional override for number of results
+            filters: Optional price/category/stock/rating filters
             
         Returns:
             Dict containing recommendations and metadata
@@ -81,78 +92,114 @@ class RecommendationAgent:
             raise ValueError("product_id must be a non-empty string")
         
         try:
-            # Update config if n_results is provided
-            if n_results is not None:
-                self.config.n_results = n_results
-
-            # Check cache first
-            cache_key = f"recommend:{product_id}:{self.config.n_results}"
-            cached = await get_cache(cache_key)
-            if cached:
+            # The agent is shared between requests, so never write the override back to the config
+            n_results = n_results or self.config.n_results
+
+            # Only the ranking is cached; product fields are resolved on every
+            # request, so a cached ranking never serves stale prices
+            filtered = filters is not None and not filters.is_empty()
+            n_candidates = n_results * FILTER_OVERFETCH if filtered else n_results
+            # One hash per product, so catalog changes invalidate its rankings with one DEL
+            cache_key = f"recommend:{product_id}"
+            ranked = await get_cache_field(cache_key, str(n_candidates))
+            if isinstance(ranked, list):
                 logger.info("Returning cached recommendations", product_id=product_id)
-                return cached
-
-            # Get the embedding for the product
-            product = collection.get(ids=[product_id])
-            if not product["embeddings"] or not product["embeddings"][0]:
-                logger.error("No embedding found for product", product_id=product_id)
-                return {"recommendations": [], "total": 0}
-
-            embedding = product["embeddings"][0]
-
-            # Find similar products (excluding itself)
-            results = collection.query(
-                query_embeddings=[embedding],
-                n_results=self.config.n_results + 1,  # +1 to account for self
-            )
-
-            recommendations = []
-            for id_, meta, dist in zip(
-                results["ids"][0],
-                results["metadatas"][0],
-                results["distances"][0],
-            ):
-                # Skip the product itself
-                if id_ == product_id:
-                    continue
-
-                # Calculate similarity score
-                score = 1.0 - dist
-
-                # Skip if score is below threshold
-                if score < self.config.min_score:
-                    continue
-
-                # Create recommendation
-                recommendation = ProductRecommendation(
+            else:
+                ranked = await self._rank(product_id, n_candidates)
+                if ranked is None:
+                    return {"recommendations": [], "total": 0}
+                await set_cache_field(cache_key, str(n_candidates), ranked, ttl=self.config.cache_ttl)
+
+            snapshot = get_catalog_snapshot()
+            if filtered and snapshot is not None:
+                ranked = self._apply_filters(ranked, filters, snapshot)
+            if not filtered or snapshot is not None:
+                ranked = ranked[:n_results]
+            products = await self.product_cache.get_many([id_ for id_, _ in ranked])
+            if filtered and snapshot is None:
+                # No snapshot: filter the hydrated records of every candidate instead
+                products = {id_: product for id_, product in products.items() if filters.matches(product)}
+                ranked = [(id_, score) for id_, score in ranked if id_ in products][:n_results]
+            recommendations = [
+                ProductRecommendation(
                     id=id_,
-                    name=meta.get("name", ""),
-                    description=meta.get("description", ""),
-                    price=float(meta.get("price", 0.0)),
-                    image_url=meta.get("image_url", ""),
-                    category_name=meta.get("category_name", ""),
+                    name=products[id_]["name"],
+                    description=products[id_]["description"] or "",
+                    price=products[id_]["price"],
+                    image=products[id_]["image"] or "",
+                    category_name=products[id_]["category_name"] or "",
                     score=score,
-                )
-                recommendations.append(recommendation.dict())
-
-                # Stop if we have enough recommendations
-                if len(recommendations) >= self.config.n_results:
-                    break
-
-            result = {
-                "recommendations": recommendations,
-                "total": len(recommendations),
-            }
-
-            # Cache the results
-            await set_cache(cache_key, result, ttl=self.config.cache_ttl)
+                ).dict()
+                for id_, score in ranked
+                # Products deleted since the ranking was cached
+                if id_ in products
+            ]
 
             logger.info(
                 "Generated recommendations",
                 product_id=product_id,
                 n_recommendations=len(recommendations),
             )
-            return result
+            return {
+                "recommendations": recommendations,
+                "total": len(recommendations),
+            }
         except Exception as e:
             logger.error("Error generating recommendations", error=str(e))
-            raise 
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def _apply_filters(
+        ranked: List[Tuple[int, float]],
+        filters: CatalogFilter,
+        snapshot: CatalogSnapshot,
+    ) -> List[Tuple[int, float]]:
+        """Keep the ranked products passing ``filters``, in rank order."""
+        scores = dict(ranked)
+        return [(id_, scores[id_]) for id_ in snapshot.filter_ids(list(scores), filters)]
+
+    async def _rank(self, product_id: str, n_results: int) -> Optional[List[Tuple[int, float]]]:
+        """
+        Find the products most similar to ``product_id``.
+
+        Returns:
+            (backend id, score) pairs, best first, or None if the product
+            cannot be looked up in the vector index
+        """
+        collection = await get_collection()
+        if not collection:
+            logger.warning("ChromaDB not available, returning empty recommendations")
+            return None
+
+        # Get the embedding for the product
+        product = await asyncio.to_thread(collection.get, ids=[product_id], include=["embeddings"])
+        if not product["embeddings"] or not product["embeddings"][0]:
+            logger.error("No embedding found for product", product_id=product_id)
+            return None
+
+        # Find similar products (excluding itself)
+        results = await asyncio.to_thread(
+            collection.query,
+            query_embeddings=[product["embeddings"][0]],
+            n_results=n_results + 1,  # +1 to account for self
+        )
+
+        ranked = []
+        for id_, meta, dist in zip(
+            results["ids"][0],
+            results["metadatas"][0],
+            results["distances"][0],
+        ):
+            # Skip the product itself
+            if id_ == product_id:
+                continue
+
+            # Skip if score is below threshold
+            score = 1.0 - dist
+            if score < self.config.min_score:
+                continue
+
+            ranked.append((int((meta or {}).get("backend_id", id_)), score))
+            if len(ranked) >= n_results:
+                break
+        return ranked
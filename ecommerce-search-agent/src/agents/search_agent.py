@@ -1,18 +1,30 @@
+import os
+import asyncio
 from typing import Dict, List, Optional, Any
+from pydantic import BaseModel, Field
 from sqlalchemy import select, and_, or_, func
 
-from langchain.tools import BaseTool, Tool
+from langchain_core.tools import BaseTool, Tool
 from langchain_core.messages import BaseMessage
 
 from src.agents.base_agent import BaseAgent
 from src.chains.query_understanding import QueryUnderstandingChain, QueryUnderstandingResult
 from src.chains.sql_generation import SQLGenerationChain, SQLGenerationConfig
+from src.database.catalog_snapshot import CatalogFilter, get_catalog_snapshot
 from src.database.chromadb_client import search_similar_products
+from src.database.pgvector_store import hybrid_search, pgvector_enabled
+from src.database.product_cache import ProductCache, get_product_cache, normalize_product
 from src.database.postgres import get_db
+from src.embeddings.generator import generate_query_embedding
 from src.database.redis_client import get_cache, set_cache
+from src.utils.deadline import Deadline, StageTimeout, run_stage
 from src.utils.logger import get_logger
+from src.utils.metrics import time_stage
+from src.utils.tracing import current_span, traced
 from sqlalchemy import text
 from src.utils.duckduckgo_search import duckduckgo_web_search
+from src.utils.web_context import get_web_context
+from src.utils.web_context_classifier import WebContextClassifier
 from src.database.models import Product, Category
 
 logger = get_logger(__name__)
@@ -43,6 +55,42 @@ Remember to:
 - Suggest related products when appropriate
 - Explain your reasoning when necessary"""
 
+# Degradations reported in search results when a stage is skipped to stay within budget
+DEGRADED_NO_WEB_CONTEXT = "no_web_context"
+DEGRADED_CACHED_UNDERSTANDING = "cached_understanding"
+DEGRADED_NO_UNDERSTANDING = "no_understanding"
+DEGRADED_VECTOR_ONLY = "vector_only"
+DEGRADED_KEYWORD_ONLY = "keyword_only"
+DEGRADED_NO_RESULTS = "no_results"
+
+def _vector_backend_id(result: Dict) -> Optional[int]:
+    """Return the catalog id of a vector hit, or None if it has no usable one."""
+    try:
+        return int((result.get("metadata") or {}).get("backend_id", result["id"]))
+    except (ValueError, TypeError):
+        return None
+
+class SearchBudgetConfig(BaseModel):
+    """Latency budget for a search request, in seconds."""
+    total_seconds: float = Field(
+        default_factory=lambda: float(os.environ.get("SEARCH_BUDGET_MS", "3000")) / 1000,
+        gt=0,
+    )
+    web_context_seconds: float = Field(
+        default_factory=lambda: float(os.environ.get("SEARCH_WEB_CONTEXT_MS", "800")) / 1000,
+        ge=0,
+    )
+    understanding_seconds: float = Field(
+        default_factory=lambda: float(os.environ.get("SEARCH_UNDERSTANDING_MS", "1500")) / 1000,
+        ge=0,
+    )
+    # Held back from the earlier stages so retrieval always gets a chance to run
+    retrieval_seconds: float = Field(
+        default_factory=lambda: float(os.environ.get("SEARCH_RETRIEVAL_MS", "700")) / 1000,
+        ge=0,
+    )
+    understanding_cache_ttl: int = Field(default=7 * 86400, ge=60)
+
 # Add the DuckDuckGo web search tool to the default tools
 web_search_tool = Tool(
     name="web_search",
@@ -57,8 +105,20 @@ class SearchAgent(BaseAgent):
         self,
         tools: List[BaseTool] = None,
         model_name: str = "gpt-4-turbo-preview",
+        budget: Optional[SearchBudgetConfig] = None,
+        web_context_classifier: Optional[WebContextClassifier] = None,
+        product_cache: Optional[ProductCache] = None,
     ):
-        """Initialize the search agent."""
+        """
+        Initialize the search agent.
+
+        Args:
+            tools: Extra tools for the tool-calling agent
+            model_name: Name of the OpenAI model to use
+            budget: Optional latency budget configuration
+            web_context_classifier: Decides per query whether web context is fetched
+            product_cache: Resolves vector hits to catalog records
+        """
         # Add web_search_tool to the tools list if not present
         if tools is None:
             tools = [web_search_tool]
@@ -67,20 +127,32 @@ class SearchAgent(BaseAgent):
         super().__init__(tools, SEARCH_AGENT_PROMPT, model_name)
         self.query_understanding = QueryUnderstandingChain(model_name)
         self.sql_generation = SQLGenerationChain(model_name)
+        self.budget = budget or SearchBudgetConfig()
+        self.web_context_classifier = web_context_classifier or WebContextClassifier()
+        self.product_cache = product_cache or get_product_cache()
 
+    @traced("search_agent.search")
     async def search(
         self,
         query: str,
         chat_history: Optional[List[BaseMessage]] = None,
         limit: int = 5,
+        deadline: Optional[Deadline] = None,
+        facets: bool = False,
     ) -> Dict:
         """
         Search for products based on the query.
+
+        Every stage runs against a latency budget. A stage that would exceed
+        it is skipped or degraded instead of stalling the request, and the
+        degradations applied are listed in the result.
         
         Args:
             query: The user's search query
             chat_history: Optional list of previous messages for context
             limit: Maximum number of results to return
+            deadline: Request deadline; a new one from the budget config is started if omitted
+            facets: Also count the candidate products per category, price bucket and stock status
             
         Returns:
             Dict containing search results and metadata
@@ -91,104 +163,345 @@ class SearchAgent(BaseAgent):
         """
         if not query or not isinstance(query, str):
             raise ValueError("query must be a non-empty string")
-        
+
+        deadline = deadline or Deadline(self.budget.total_seconds)
+        degradations: List[str] = []
         try:
-            logger.info(f"Starting search for query: {query}")
-            # Check cache first
-            cache_key = f"search:{query}:{limit}"
-            cached_result = await get_cache(cache_key)
-            if cached_result:
-                logger.info("Returning cached search results", query=query)
-                return cached_result
-
-            # Optionally use web search for more context
-            logger.info(f"Performing web search for query understanding: {query}")
-            web_results = duckduckgo_web_search(query, max_results=3)
-            logger.info(f"Web search results: {web_results}")
-
-            # Understand the query (pass web results as context)
-            query_context = query + "\nWeb context:\n" + "\n".join([r["title"] + ": " + (r["body"] or "") for r in web_results])
-            logger.info(f"Running query understanding with context: {query_context}")
-            query_understanding = await self.query_understanding.run(
-                query_context,
-                chat_history,
-            )
-            logger.info(f"Query understanding result: {query_understanding}")
+            logger.info("Starting search", query=query, limit=limit)
+            # Use web search for more context only when the query needs it
+            web_decision = await self.web_context_classifier.decide(query)
+            web_results: List[Dict] = []
+            if web_decision.needed:
+                logger.debug("Fetching web context", query=query, reason=web_decision.reason)
+                try:
+                    web_results = await run_stage(
+                        "web_context",
+                        get_web_context(query, max_results=3),
+                        deadline,
+                        cap=self.budget.web_context_seconds,
+                        reserve=self.budget.understanding_seconds + self.budget.retrieval_seconds,
+                    )
+                except StageTimeout:
+                    degradations.append(DEGRADED_NO_WEB_CONTEXT)
+                logger.debug("Web context results", count=len(web_results), results=web_results)
 
-            # Generate SQL query
-            sql_config = SQLGenerationConfig(limit=limit)
-            sql_query = await self.sql_generation.run(query_understanding, sql_config)
-            logger.info(f"Generated SQL query: {sql_query}")
-
-            # Execute SQL query
-            logger.info("Executing SQL query")
-            async with get_db() as db:
-                # Extract parameters from query understanding
-                params = {
-                    "category_name": f"%{query_understanding.category}%" if query_understanding.category else None,
-                    "min_price": query_understanding.price_range.min if query_understanding.price_range else None,
-                    "max_price": query_understanding.price_range.max if query_understanding.price_range else None,
-                    "limit": limit
-                }
-                # Add feature parameters (ensure slots for all features used in the SQL)
-                max_features = max(7, len(query_understanding.features))  # Support up to 7 features
-                for i in range(max_features):
-                    if i < len(query_understanding.features):
-                        params[f"feature_{i}"] = f"%{query_understanding.features[i]}%"
-                    else:
-                        params[f"feature_{i}"] = None
-                        
-                # Add brand parameters (ensure slots for all brands used in the SQL)
-                max_brands = max(3, len(query_understanding.brands))  # Support up to 3 brands
-                for i in range(max_brands):
-                    if i < len(query_understanding.brands):
-                        params[f"brand_{i}"] = f"%{query_understanding.brands[i]}%"
-                    else:
-                        params[f"brand_{i}"] = None
-                        
-                # Add constraint parameters
-                max_constraints = max(1, len(query_understanding.constraints))
-                for i in range(max_constraints):
-                    if i < len(query_understanding.constraints):
-                        params[f"constraint_{i}"] = f"%{query_understanding.constraints[i]}%"
+            query_understanding = await self._understand(query, web_results, chat_history, deadline, degradations)
+            if DEGRADED_NO_UNDERSTANDING not in degradations and DEGRADED_CACHED_UNDERSTANDING not in degradations:
+                await self.web_context_classifier.record_outcome(
+                    query,
+                    understood=bool(query_understanding.category or query_understanding.features),
+                    used_web_context=web_decision.needed,
+                )
+
+            if pgvector_enabled():
+                # Vector similarity, keyword scoring and filters in one Postgres query
+                try:
+                    products = await run_stage(
+                        "hybrid_search",
+                        self._hybrid_search(query, query_understanding, limit),
+                        deadline,
+                    )
+                except StageTimeout:
+                    products = []
+                    degradations.append(DEGRADED_NO_RESULTS)
+                logger.debug("Hybrid search completed", count=len(products))
+                with time_stage("combine"):
+                    combined_results = await self._combine_results(products, [], limit)
+                candidate_ids = [product["id"] for product in products]
+            else:
+                # Vector search does not depend on the SQL path, so run them concurrently
+                vector_task = asyncio.create_task(search_similar_products(query, n_results=limit))
+                products = []
+                try:
+                    if DEGRADED_NO_UNDERSTANDING in degradations:
+                        degradations.append(DEGRADED_VECTOR_ONLY)
                     else:
-                        params[f"constraint_{i}"] = None
-                # Prepare parameters for SQL execution
-                string_keys = set()
-                # Identify string/text parameters
-                for k in params:
-                    if k.startswith("feature_") or k.startswith("brand_") or k.startswith("constraint_") or k == "category_name":
-                        string_keys.add(k)
-                # Cast only string/text parameters to strings
-                for k in string_keys:
-                    if params[k] is not None:
-                        params[k] = str(params[k])
-                # min_price, max_price, and limit remain as numbers or None
-                result = await db.execute(text(sql_query), params)
-                products = result.mappings().all()
-            logger.info(f"SQL query returned {len(products)} products")
-
-            # Perform vector search with limit
-            logger.info(f"Performing vector search for: {query}")
-            vector_results = await search_similar_products(
-                query,
-                n_results=limit,
-            )
-            logger.info(f"Vector search returned {len(vector_results)} results")
+                        try:
+                            products = await run_stage(
+                                "sql_search",
+                                self._sql_search(query_understanding, limit),
+                                deadline,
+                            )
+                            logger.debug("SQL search completed", count=len(products))
+                        except StageTimeout:
+                            degradations.append(DEGRADED_VECTOR_ONLY)
+                    try:
+                        vector_results = await run_stage("vector_search", vector_task, deadline)
+                    except StageTimeout:
+                        vector_results = []
+                        degradations.append(DEGRADED_KEYWORD_ONLY)
+                finally:
+                    vector_task.cancel()
+                vector_results = self._filter_vector_results(vector_results, query_understanding)
+                logger.debug("Vector search completed", count=len(vector_results))
 
-            # Combine and rank results
-            combined_results = self._combine_results(products, vector_results, limit)
-            logger.info(f"Combined results: {combined_results}")
+                # Combine and rank results
+                with time_stage("combine"):
+                    combined_results = await self._combine_results(products, vector_results, limit)
+                candidate_ids = [product["id"] for product in products] + [
+                    id_ for id_ in map(_vector_backend_id, vector_results) if id_ is not None
+                ]
+            if facets:
+                combined_results["facets"] = self._facets(candidate_ids, query_understanding)
+            logger.info(
+                "Search completed",
+                query=query,
+                total=combined_results["total"],
+                web_context=web_decision.needed,
+            )
+            logger.debug("Combined results", results=combined_results)
 
-            # Cache the results
-            await set_cache(cache_key, combined_results)
+            if degradations:
+                # Degraded results are marked so callers never cache them
+                combined_results["degradations"] = degradations
+                current_span().set_attribute("degradations", degradations)
+                logger.warning("Search degraded to meet latency budget", query=query, degradations=degradations)
 
             return combined_results
         except Exception as e:
             logger.error("Error in search", error=str(e))
             raise
 
-    def _combine_results(
+    async def _understand(
+        self,
+        query: str,
+        web_results: List[Dict],
+        chat_history: Optional[List[BaseMessage]],
+        deadline: Deadline,
+        degradations: List[str],
+    ) -> QueryUnderstandingResult:
+        """
+        Run query understanding within the budget, falling back to the last
+        understanding stored for this query, then to an empty one.
+        """
+        # Understand the query (pass web results as context)
+        query_context = query + "\nWeb context:\n" + "\n".join([r["title"] + ": " + (r["body"] or "") for r in web_results])
+        logger.debug("Running query understanding", context=query_context)
+        understanding_key = f"understanding:{query}"
+        try:
+            query_understanding = await run_stage(
+                "query_understanding",
+                self.query_understanding.run(query_context, chat_history),
+                deadline,
+                cap=self.budget.understanding_seconds,
+                reserve=self.budget.retrieval_seconds,
+            )
+        except StageTimeout:
+            cached = await get_cache(understanding_key)
+            if cached:
+                degradations.append(DEGRADED_CACHED_UNDERSTANDING)
+                return QueryUnderstandingResult(**cached)
+            degradations.append(DEGRADED_NO_UNDERSTANDING)
+            return QueryUnderstandingResult()
+        logger.debug("Query understanding result", result=query_understanding.dict())
+        await set_cache(understanding_key, query_understanding.dict(), ttl=self.budget.understanding_cache_ttl)
+        return query_understanding
+
+    async def _sql_search(
+        self,
+        query_understanding: QueryUnderstandingResult,
+        limit: int,
+    ) -> List[Dict]:
+        """
+        Generate and execute the SQL query for a query understanding.
+
+        Understandings with only a category and price range are answered
+        from the catalog snapshot instead, without an LLM call or a query.
+        """
+        products = await self._snapshot_search(query_understanding, limit)
+        if products is not None:
+            return products
+
+        sql_config = SQLGenerationConfig(limit=limit)
+        with time_stage("sql_generation"):
+            sql_query = await self.sql_generation.run(query_understanding, sql_config)
+        logger.debug("Generated SQL query", sql=sql_query)
+
+        # Execute SQL query
+        with time_stage("sql_execution"):
+            try:
+                return await self._execute_sql(sql_query, query_understanding, limit)
+            except Exception:
+                # Don't keep serving a cached query that cannot run
+                await self.sql_generation.invalidate(query_understanding, sql_config)
+                raise
+
+    async def _snapshot_search(
+        self,
+        query_understanding: QueryUnderstandingResult,
+        limit: int,
+    ) -> Optional[List[Dict]]:
+        """
+        Select products for a category/price-only understanding from the
+        catalog snapshot, in the order the SQL generation prompt asks for
+        (``ORDER BY score DESC, p.price ASC``). Every category match scores
+        1.0, so that is cheapest first; equal prices are ordered by id, which
+        the SQL left undefined.
+
+        Returns:
+            Product rows, or None if the understanding needs text matching
+            or no snapshot is loaded
+        """
+        snapshot = get_catalog_snapshot()
+        if (
+            snapshot is None
+            or not query_understanding.category
+            or query_understanding.features
+            or query_understanding.brands
+            or query_understanding.constraints
+        ):
+            return None
+        price_range = query_understanding.price_range
+        filters = CatalogFilter(
+            category=query_understanding.category,
+            min_price=price_range.min if price_range else None,
+            max_price=price_range.max if price_range else None,
+        )
+        with time_stage("snapshot_search"):
+            ids = snapshot.select(filters, limit)
+        records = await self.product_cache.get_many(ids)
+        return [{**records[id_], "score": 1.0} for id_ in ids if id_ in records]
+
+    def _filter_vector_results(
+        self,
+        vector_results: List[Dict],
+        query_understanding: QueryUnderstandingResult,
+    ) -> List[Dict]:
+        """Drop vector hits outside the understood price range, using the catalog snapshot."""
+        snapshot = get_catalog_snapshot()
+        price_range = query_understanding.price_range
+        if snapshot is None or price_range is None or not vector_results:
+            return vector_results
+        filters = CatalogFilter(min_price=price_range.min, max_price=price_range.max)
+        by_id: Dict[int, Dict] = {}
+        for result in vector_results:
+            backend_id = _vector_backend_id(result)
+            if backend_id is not None:
+                by_id[backend_id] = result
+        return [by_id[id_] for id_ in snapshot.filter_ids(list(by_id), filters)]
+
+    def _facets(
+        self,
+        candidate_ids: List[Any],
+        query_understanding: QueryUnderstandingResult,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Count the candidate set per category, price bucket and stock status
+        from the catalog snapshot's columns, without another query.
+
+        The candidate set is every product retrieved before the top-k cut,
+        plus every product matching the understood category and price range.
+        Without a category or price range there is nothing to match the
+        catalog on, so the counts cover only the retrieved products (at most
+        twice the limit); ``scope`` says which case applies.
+
+        Returns:
+            The facet counts, or None if no snapshot is loaded
+        """
+        snapshot = get_catalog_snapshot()
+        if snapshot is None:
+            return None
+        price_range = query_understanding.price_range
+        filters = CatalogFilter(
+            category=query_understanding.category,
+            min_price=price_range.min if price_range else None,
+            max_price=price_range.max if price_range else None,
+        )
+        with time_stage("facets"):
+            rows = snapshot.candidate_rows([int(id_) for id_ in candidate_ids], filters)
+            return {"scope": "retrieved" if filters.is_empty() else "filtered", **snapshot.facets(rows)}
+
+    async def _execute_sql(
+        self,
+        sql_query: str,
+        query_understanding: QueryUnderstandingResult,
+        limit: int,
+    ) -> List[Dict]:
+        """
+        Execute a generated SQL query with parameters from the query understanding.
+        
+        Args:
+            sql_query: The generated, validated SQL query
+            query_understanding: The structured query understanding result
+            limit: Maximum number of results to return
+            
+        Returns:
+            List of product rows
+        """
+        async with get_db() as db:
+            # Extract parameters from query understanding
+            params = {
+                "category_name": f"%{query_understanding.category}%" if query_understanding.category else None,
+                "min_price": query_understanding.price_range.min if query_understanding.price_range else None,
+                "max_price": query_understanding.price_range.max if query_understanding.price_range else None,
+                "limit": limit
+            }
+            # Add feature parameters (ensure slots for all features used in the SQL)
+            max_features = max(7, len(query_understanding.features))  # Support up to 7 features
+            for i in range(max_features):
+                if i < len(query_understanding.features):
+                    params[f"feature_{i}"] = f"%{query_understanding.features[i]}%"
+                else:
+                    params[f"feature_{i}"] = None
+                    
+            # Add brand parameters (ensure slots for all brands used in the SQL)
+            max_brands = max(3, len(query_understanding.brands))  # Support up to 3 brands
+            for i in range(max_brands):
+                if i < len(query_understanding.brands):
+                    params[f"brand_{i}"] = f"%{query_understanding.brands[i]}%"
+                else:
+                    params[f"brand_{i}"] = None
+                    
+            # Add constraint parameters
+            max_constraints = max(1, len(query_understanding.constraints))
+            for i in range(max_constraints):
+                if i < len(query_understanding.constraints):
+                    params[f"constraint_{i}"] = f"%{query_understanding.constraints[i]}%"
+                else:
+                    params[f"constraint_{i}"] = None
+            # Prepare parameters for SQL execution
+            string_keys = set()
+            # Identify string/text parameters
+            for k in params:
+                if k.startswith("feature_") or k.startswith("brand_") or k.startswith("constraint_") or k == "category_name":
+                    string_keys.add(k)
+            # Cast only string/text parameters to strings
+            for k in string_keys:
+                if params[k] is not None:
+                    params[k] = str(params[k])
+            # min_price, max_price, and limit remain as numbers or None
+            result = await db.execute(text(sql_query), params)
+            return result.mappings().all()
+
+    async def _hybrid_search(
+        self,
+        query: str,
+        query_understanding: QueryUnderstandingResult,
+        limit: int,
+    ) -> List[Dict]:
+        """
+        Search products with the Postgres pgvector backend.
+        
+        Args:
+            query: The user's search query
+            query_understanding: The structured query understanding result
+            limit: Maximum number of results to return
+            
+        Returns:
+            List of product rows including a combined score
+        """
+        query_embedding = await generate_query_embedding(query)
+        price_range = query_understanding.price_range
+        return await hybrid_search(
+            query_embedding,
+            category=query_understanding.category,
+            terms=query_understanding.features + query_understanding.brands,
+            min_price=price_range.min if price_range else None,
+            max_price=price_range.max if price_range else None,
+            limit=limit,
+        )
+
+    async def _combine_results(
         self,
         sql_results: List[Dict],
         vector_results: List[Dict],
@@ -196,6 +509,10 @@ class SearchAgent(BaseAgent):
     ) -> Dict:
         """
         Combine and rank results from SQL and vector search.
+
+        Vector hits only contribute ids and scores; those that make the top
+        ``limit`` without a SQL row are resolved to catalog records in one
+        batch, and dropped if the product no longer exists.
         
         Args:
             sql_results: List of products from SQL search
@@ -208,38 +525,8 @@ class SearchAgent(BaseAgent):
         # Create a dictionary of products by ID
         products_by_id = {}
         for product in sql_results:
-            # Convert features and specifications properly for SQL results
-            features = product.get("features", [])
-            if isinstance(features, str):
-                try:
-                    import json
-                    features = json.loads(features) if features else []
-                except:
-                    features = []
-            
-            specifications = product.get("specifications")
-            if isinstance(specifications, str):
-                try:
-                    import json
-                    specifications = json.loads(specifications) if specifications else {}
-                except:
-                    specifications = {}
-            
             products_by_id[str(product["id"])] = {
-                "id": int(product["id"]),  # Ensure ID is integer
-                "name": product["name"],
-                "description": product.get("description"),
-                "price": float(product["price"]),
-                "originalPrice": product.get("originalPrice"),
-                "image": product["image"],
-                "images": product.get("images", []),
-                "rating": float(product.get("rating", 0)),
-                "reviews": int(product.get("reviews", 0)),
-                "inStock": product.get("inStock", True),
-                "stock": int(product.get("stock", 0)),
-                "features": features,
-                "specifications": specifications,
-                "category_name": product["category_name"],
+                **normalize_product(product),
                 "score": float(product.get("score", 1.0)),  # Use SQL score if available
             }
 
@@ -250,50 +537,15 @@ class SearchAgent(BaseAgent):
                 # Increase score for products found in both searches
                 products_by_id[product_id]["score"] += 1.0 - result["distance"]
             else:
-                # Add new products from vector search with metadata
-                metadata = result.get("metadata", {})
                 # Try to get the backend ID from metadata, otherwise use the ChromaDB ID
-                backend_id = metadata.get("backend_id", result["id"])
+                backend_id = (result.get("metadata") or {}).get("backend_id", result["id"])
                 try:
                     backend_id = int(backend_id)
                 except (ValueError, TypeError):
-                    logger.warning(f"Could not convert backend_id to integer: {backend_id}")
+                    logger.warning("Could not convert backend_id to integer", backend_id=backend_id)
                     continue  # Skip this result if we can't get a valid backend ID
-                    
-                # Convert features and specifications from string metadata
-                features = metadata.get("features", "[]")
-                if isinstance(features, str):
-                    try:
-                        import json
-                        features = json.loads(features) if features else []
-                    except:
-                        features = []
-                
-                specifications = metadata.get("specifications", "{}")
-                if isinstance(specifications, str):
-                    try:
-                        import json
-                        specifications = json.loads(specifications) if specifications else {}
-                    except:
-                        specifications = {}
-                
-                products_by_id[product_id] = {
-                    "id": backend_id,
-                    "name": metadata.get("name", ""),
-                    "description": metadata.get("description", ""),
-                    "price": float(metadata.get("price", 0.0)),
-                    "originalPrice": None,
-                    "image": metadata.get("image", ""),
-                    "images": [],
-                    "rating": float(metadata.get("rating", 0)),
-                    "reviews": int(metadata.get("reviews", 0)),
-                    "inStock": metadata.get("in_stock", True),
-                    "stock": int(metadata.get("stock", 0)),
-                    "features": features,
-                    "specifications": specifications,
-                    "category_name": metadata.get("category", ""),
-                    "score": 1.0 - result["distance"],
-                }
+                # Filled in from the catalog if it ranks high enough
+                products_by_id[product_id] = {"id": backend_id, "score": 1.0 - result["distance"]}
 
         # Sort products by score and take only the top n (limit)
         sorted_products = sorted(
@@ -301,6 +553,7 @@ class SearchAgent(BaseAgent):
             key=lambda x: x["score"],
             reverse=True,
         )[:limit]  # Take only the top n results
+        sorted_products = await self._hydrate(sorted_products)
 
         # Ensure IDs are integers and scores are clamped
         for product in sorted_products:
@@ -316,4 +569,22 @@ class SearchAgent(BaseAgent):
         return {
             "products": sorted_products,
             "total": len(sorted_products),
-        } 
\ No newline at end of file
+        }
+
+    async def _hydrate(self, products: List[Dict]) -> List[Dict]:
+        """Replace id-only vector hits with their catalog records, keeping order and scores."""
+        pending = [product["id"] for product in products if "name" not in product]
+        if not pending:
+            return products
+        try:
+            records = await self.product_cache.get_many(pending)
+        except Exception as e:
+            logger.error("Error hydrating vector results", error=str(e), products=len(pending))
+            records = {}
+        hydrated = []
+        for product in products:
+            if "name" in product:
+                hydrated.append(product)
+            elif product["id"] in records:
+                hydrated.append({**records[product["id"]], "score": product["score"]})
+        return hydrated 
\ No newline at end of file
@@ -0,0 +1,113 @@
+import sys
+import threading
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+from src.utils.logger import get_logger
+
+# Agent modules pull in LangChain, OpenAI and ChromaDB, which dominate import
+# time (see `python -X importtime -c "import src.main"`). They are imported and
+# constructed on first use instead, so the app starts serving immediately.
+if TYPE_CHECKING:
+    from src.agents.admin_agent import AdminAgent
+    from src.agents.image_agent import ImageAgent
+    from src.agents.recommendation_agent import RecommendationAgent
+    from src.agents.search_agent import SearchAgent
+
+logger = get_logger(__name__)
+
+_agents: Dict[str, Any] = {}
+# Re-entrant: the image agent is built while holding the lock for the search agent it reuses
+_agents_lock = threading.RLock()
+
+def _get_or_create(name: str, factory: Callable[[], Any]) -> Any:
+    """Return the named singleton, constructing it once under a lock."""
+    agent = _agents.get(name)
+    if agent is None:
+        with _agents_lock:
+            agent = _agents.get(name)
+            if agent is None:
+                agent = factory()
+                _agents[name] = agent
+                logger.info("Agent initialized", agent=name)
+    return agent
+
+def safe_database_search(query: str):
+    """Safely search products in the database using SQLAlchemy."""
+    from sqlalchemy import select
+    from src.database.models import Product
+    from src.database.postgres import get_db
+
+    db = get_db()
+    search_query = select(Product).where(
+        Product.name.ilike(f"%{query}%") | 
+        Product.description.ilike(f"%{query}%")
+    )
+    return db.execute(search_query).scalars().all()
+
+def _search_tools() -> List[Any]:
+    """Create tools for the search agent."""
+    from langchain_core.tools import Tool
+    from src.database.chromadb_client import search_similar_products
+
+    return [
+        Tool(
+            name="vector_search",
+            description="Search for similar products using vector similarity",
+            func=search_similar_products,
+        ),
+        Tool(
+            name="database_search",
+            description="Search for products in the database using safe SQLAlchemy queries",
+            func=safe_database_search,
+        ),
+    ]
+
+# FastAPI runs these sync dependencies in its threadpool, so first-use
+# construction never blocks the event loop.
+
+def get_search_agent() -> "SearchAgent":
+    """Return the shared search agent."""
+    def create() -> "SearchAgent":
+        from src.agents.search_agent import SearchAgent
+        return SearchAgent(tools=_search_tools())
+    return _get_or_create("search", create)
+
+def get_image_agent() -> "ImageAgent":
+    """Return the shared image agent, which reuses the shared search agent."""
+    def create() -> "ImageAgent":
+        from src.agents.image_agent import ImageAgent
+        return ImageAgent(search_agent=get_search_agent())
+    return _get_or_create("image", create)
+
+def get_recommendation_agent() -> "RecommendationAgent":
+    """Return the shared recommendation agent."""
+    def create() -> "RecommendationAgent":
+        from src.agents.recommendation_agent import RecommendationAgent
+        return RecommendationAgent()
+    return _get_or_create("recommendation", create)
+
+def get_admin_agent() -> "AdminAgent":
+    """Return the shared admin agent."""
+    def create() -> "AdminAgent":
+        from src.agents.admin_agent import AdminAgent
+        return AdminAgent()
+    return _get_or_create("admin", create)
+
+def preload_agents() -> None:
+    """Construct every agent up front (blocking; run in a worker thread)."""
+    for getter in (get_search_agent, get_image_agent, get_recommendation_agent, get_admin_agent):
+        getter()
+
+async def close_resources() -> None:
+    """Release shared clients that were created during the app's lifetime."""
+    from src.database.redis_client import close_redis
+
+    web_context = sys.modules.get("src.utils.web_context")
+    if web_context is not None:
+        await web_context.close_web_context()
+    await close_redis()
+    # Only dispose the engine if something actually imported it
+    postgres = sys.modules.get("src.database.postgres")
+    if postgres is not None:
+        await postgres.engine.dispose()
+    _agents.clear()
@@ -1,4 +1,4 @@
-from typing import List, Optional, Any
+from typing import Dict, List, Literal, Optional, Any
 from pydantic import BaseModel, Field, validator
 from decimal import Decimal
 from datetime import datetime
@@ -17,6 +17,10 @@ class TextSearchRequest(BaseModel):
         le=100,
         description="Number of top products to return"
     )
+    facets: bool = Field(
+        default=False,
+        description="Include category, price and stock counts over the candidate set"
+    )
 
     @validator('query')
     def validate_query(cls, v: str) -> str:
@@ -66,6 +70,21 @@ class ImageSearchRequest(BaseModel):
                 
         return v
 
+class ImageUploadFields(BaseModel):
+    """Form fields accompanying a multipart image upload."""
+    query: Optional[str] = Field(
+        default=None,
+        min_length=1,
+        max_length=500,
+        description="Optional text to accompany the image"
+    )
+    limit: int = Field(
+        default=5,
+        ge=1,
+        le=100,
+        description="Number of top products to return"
+    )
+
 class Product(BaseModel):
     """Product model for API responses."""
     id: int  # Changed from UUID to int to match backend
@@ -89,10 +108,46 @@ class Product(BaseModel):
             Decimal: str,
         }
 
+class CategoryFacet(BaseModel):
+    """Number of candidate products in one category."""
+    name: str
+    count: int = Field(..., ge=0)
+
+class PriceFacet(BaseModel):
+    """
+    Number of candidate products priced in [min, max); max is None for the
+    last bucket. A price equal to a bucket edge counts in the bucket above it.
+    """
+    min: float = Field(..., ge=0)
+    max: Optional[float] = None
+    count: int = Field(..., ge=0)
+
+class SearchFacets(BaseModel):
+    """Counts over every candidate product, not only the ones returned."""
+    scope: Literal["filtered", "retrieved"] = Field(
+        ...,
+        description=(
+            "filtered: every product matching the understood category and price range, "
+            "plus the retrieved ones; retrieved: only the products retrieved for the query"
+        )
+    )
+    total: int = Field(..., ge=0)
+    in_stock: int = Field(..., ge=0)
+    categories: List[CategoryFacet]
+    price: List[PriceFacet]
+
 class SearchResponse(BaseModel):
     """Response model for search results."""
     products: List[Product]
     total: int = Field(..., ge=0)
+    degradations: Optional[List[str]] = Field(
+        default=None,
+        description="Stages skipped or degraded to meet the latency budget (e.g. no_web_context, vector_only)"
+    )
+    facets: Optional[SearchFacets] = Field(
+        default=None,
+        description="Candidate set counts, when requested and the catalog snapshot is loaded"
+    )
 
 class RecommendationResponse(BaseModel):
     """Response model for product recommendations."""
@@ -113,8 +168,24 @@ class AdminTaskResponse(BaseModel):
     start_time: datetime = Field(..., description="When the task started")
     end_time: Optional[datetime] = Field(None, description="When the task ended (if completed or failed)")
     error: Optional[str] = Field(None, description="Error message if task failed")
+    processed: int = Field(default=0, description="Number of items processed so far")
+    total: Optional[int] = Field(None, description="Total number of items to process, if known")
+    items_per_sec: Optional[float] = Field(None, description="Current processing throughput")
+    eta_seconds: Optional[float] = Field(None, description="Estimated seconds until the task finishes")
+    attempts: int = Field(default=0, description="Number of times a worker has started the task")
 
 class AdminTaskListResponse(BaseModel):
     """Response model for list of admin tasks."""
     tasks: List[AdminTaskResponse] = Field(..., description="List of tasks")
-    total: int = Field(..., description="Total number of tasks") 
\ No newline at end of file
+    total: int = Field(..., description="Total number of tasks")
+
+class LLMCacheChainStats(BaseModel):
+    """Cache counters for a single LLM chain."""
+    hits: int = Field(..., ge=0, description="Results served from the cache")
+    misses: int = Field(..., ge=0, description="Results that required a model call")
+    errors: int = Field(..., ge=0, description="Cache reads or writes that failed")
+    hit_rate: float = Field(..., ge=0, le=1, description="hits / (hits + misses)")
+
+class LLMCacheStatsResponse(BaseModel):
+    """Response model for LLM cache statistics of this process."""
+    chains: Dict[str, LLMCacheChainStats] = Field(..., description="Stats keyed by chain name")
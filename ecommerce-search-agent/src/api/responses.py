@@ -0,0 +1,31 @@
+from typing import Any, Dict
+
+import orjson
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from src.api.models import RecommendationResponse, SearchResponse
+
+# Built once at import: validation and JSON encoding both run in pydantic-core
+SEARCH_RESPONSE = TypeAdapter(SearchResponse)
+RECOMMENDATION_RESPONSE = TypeAdapter(RecommendationResponse)
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson; bytes are taken as already-encoded
+    JSON and sent unchanged.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def encode_response(adapter: TypeAdapter, result: Dict[str, Any]) -> bytes:
+    """
+    Validate an agent result against a response model and encode it in one pass.
+
+    Produces the same JSON FastAPI would for ``response_model`` (e.g. prices
+    as strings), without building the model instance and re-validating it.
+    """
+    return adapter.dump_json(adapter.validate_python(result))
@@ -1,17 +1,17 @@
 from typing import Optional, List
 from fastapi import APIRouter, HTTPException, Depends, Header
-from src.agents.admin_agent import AdminAgent
-from src.api.models import AdminRebuildResponse, AdminTaskResponse, AdminTaskListResponse
+from src.api.dependencies import get_admin_agent
+from src.api.models import AdminRebuildResponse, AdminTaskResponse, AdminTaskListResponse, LLMCacheStatsResponse
 import logging
 import uuid
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 logger = logging.getLogger(__name__)
 
-# Initialize admin agent
-admin_agent = AdminAgent()
-
-async def verify_admin_token(x_admin_token: str = Header(...)) -> None:
+async def verify_admin_token(
+    x_admin_token: str = Header(...),
+    admin_agent=Depends(get_admin_agent),
+) -> None:
     """Verify admin token."""
     if not await admin_agent.verify_admin_token(x_admin_token):
         raise HTTPException(
@@ -21,7 +21,8 @@ async def verify_admin_token(x_admin_token: str = Header(...)) -> None:
 
 @router.post("/rebuild-embeddings", response_model=AdminRebuildResponse)
 async def rebuild_embeddings(
-    _: None = Depends(verify_admin_token)
+    _: None = Depends(verify_admin_token),
+    admin_agent=Depends(get_admin_agent),
 ) -> AdminRebuildResponse:
     """Trigger a background task to rebuild product embeddings."""
     try:
@@ -29,7 +30,7 @@ async def rebuild_embeddings(
         await admin_agent.rebuild_embeddings(task_id)
         return AdminRebuildResponse(
             status="success",
-            message="Embedding rebuild task started",
+            message="Embedding rebuild task queued",
             task_id=task_id
         )
     except ValueError as e:
@@ -47,7 +48,8 @@ async def rebuild_embeddings(
 @router.get("/tasks/{task_id}", response_model=AdminTaskResponse)
 async def get_task_status(
     task_id: str,
-    _: None = Depends(verify_admin_token)
+    _: None = Depends(verify_admin_token),
+    admin_agent=Depends(get_admin_agent),
 ) -> AdminTaskResponse:
     """Get the status of a specific admin task."""
     try:
@@ -58,6 +60,8 @@ async def get_task_status(
                 detail="Task not found"
             )
         return AdminTaskResponse(**task.dict())
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting task status: {str(e)}")
         raise HTTPException(
@@ -69,7 +73,8 @@ async def get_task_status(
 async def list_tasks(
     task_type: Optional[str] = None,
     status: Optional[str] = None,
-    _: None = Depends(verify_admin_token)
+    _: None = Depends(verify_admin_token),
+    admin_agent=Depends(get_admin_agent),
 ) -> AdminTaskListResponse:
     """List admin tasks with optional filtering."""
     try:
@@ -83,4 +88,13 @@ async def list_tasks(
         raise HTTPException(
             status_code=500,
             detail="Failed to list tasks"
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/llm-cache", response_model=LLMCacheStatsResponse)
+async def llm_cache_stats(
+    _: None = Depends(verify_admin_token),
+) -> LLMCacheStatsResponse:
+    """Get per-chain LLM cache hit rates for this process."""
+    from src.chains.llm_cache import get_llm_cache_stats
+
+    return LLMCacheStatsResponse(chains=get_llm_cache_stats())
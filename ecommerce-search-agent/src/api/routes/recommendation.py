@@ -1,18 +1,18 @@
 from typing import Optional
-from fastapi import APIRouter, HTTPException, Query, Path
+from fastapi import APIRouter, Depends, HTTPException, Query, Path
+from src.api.dependencies import get_recommendation_agent
 from src.api.models import RecommendationResponse
-from src.agents.recommendation_agent import RecommendationAgent
+from src.api.responses import RECOMMENDATION_RESPONSE, FastJSONResponse, encode_response
+from src.database.catalog_snapshot import CatalogFilter
 from src.utils.logger import get_logger
 
 router = APIRouter()
 logger = get_logger(__name__)
 
-# Instantiate recommendation agent
-recommendation_agent = RecommendationAgent()
-
 @router.get(
     "/{product_id}",
     response_model=RecommendationResponse,
+    response_class=FastJSONResponse,
     summary="Get product recommendations",
     description="Get personalized product recommendations based on a product ID",
     responses={
@@ -28,7 +28,13 @@ async def get_recommendations(
         ge=1,
         le=100,
         description="Number of recommendations to return"
-    )
+    ),
+    category: Optional[str] = Query(default=None, max_length=100, description="Only products whose category name contains this"),
+    min_price: Optional[float] = Query(default=None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(default=None, ge=0, description="Maximum price"),
+    in_stock: Optional[bool] = Query(default=None, description="Only products in (true) or out of (false) stock"),
+    min_rating: Optional[float] = Query(default=None, ge=0, le=5, description="Minimum rating"),
+    recommendation_agent=Depends(get_recommendation_agent),
 ) -> RecommendationResponse:
     """
     Get product recommendations based on a product ID.
@@ -36,6 +42,7 @@ async def get_recommendations(
     Args:
         product_id: The UUID of the product to get recommendations for
         limit: Maximum number of recommendations to return (default: 5)
+        category, min_price, max_price, in_stock, min_rating: Optional filters
     
     Returns:
         RecommendationResponse containing the recommended products
@@ -44,8 +51,15 @@ async def get_recommendations(
         HTTPException: If the product is not found or an error occurs
     """
     try:
-        result = await recommendation_agent.recommend(str(product_id), limit=limit)
-        return RecommendationResponse(**result)
+        filters = CatalogFilter(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            in_stock=in_stock,
+            min_rating=min_rating,
+        )
+        result = await recommendation_agent.recommend(str(product_id), n_results=limit, filters=filters)
+        return FastJSONResponse(encode_response(RECOMMENDATION_RESPONSE, result))
     except ValueError as e:
         logger.error("Invalid product ID", error=str(e), product_id=product_id)
         raise HTTPException(
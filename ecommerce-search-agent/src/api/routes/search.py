@@ -1,56 +1,38 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from src.api.models import TextSearchRequest, ImageSearchRequest, SearchResponse
-from src.agents.search_agent import SearchAgent
-from src.agents.image_agent import ImageAgent
+from fastapi import APIRouter, HTTPException, Request, status, Depends
+from pydantic import ValidationError
+from src.api.models import TextSearchRequest, ImageSearchRequest, ImageUploadFields, SearchResponse
+from src.api.dependencies import get_image_agent, get_search_agent
+from src.api.responses import SEARCH_RESPONSE, FastJSONResponse, encode_response
+from src.database.redis_client import get_cache_raw, get_catalog_generation, set_cache_raw
+from src.utils.deadline import StageTimeout
 from src.utils.logger import get_logger
+from src.utils.uploads import read_image_upload
 from src.utils.validators import validate_base64_image
-from langchain.tools import Tool
-from src.database.chromadb_client import search_similar_products
-from src.database.postgres import get_db
-from sqlalchemy import select
-from src.database.models import Product
 
 router = APIRouter()
 logger = get_logger(__name__)
 
-def safe_database_search(query: str):
-    """Safely search products in the database using SQLAlchemy."""
-    db = get_db()
-    search_query = select(Product).where(
-        Product.name.ilike(f"%{query}%") | 
-        Product.description.ilike(f"%{query}%")
-    )
-    return db.execute(search_query).scalars().all()
-
-# Create tools for the search agent
-search_tools = [
-    Tool(
-        name="vector_search",
-        description="Search for similar products using vector similarity",
-        func=search_similar_products,
-    ),
-    Tool(
-        name="database_search",
-        description="Search for products in the database using safe SQLAlchemy queries",
-        func=safe_database_search,
-    ),
-]
-
-# Instantiate agents
-search_agent = SearchAgent(tools=search_tools)
-image_agent = ImageAgent()
-
-@router.post("/text", response_model=SearchResponse)
-async def text_search(request: TextSearchRequest):
+@router.post("/text", response_model=SearchResponse, response_class=FastJSONResponse)
+async def text_search(request: TextSearchRequest, search_agent=Depends(get_search_agent)):
+    # Encoded responses are cached next to the agent's results and served without re-encoding
+    cache_key = f"search_response:{await get_catalog_generation()}:{request.query}:{request.limit}"
+    if request.facets:
+        cache_key += ":facets"
+    cached = await get_cache_raw(cache_key)
+    if cached:
+        return FastJSONResponse(cached)
     try:
-        result = await search_agent.search(request.query, limit=request.limit)
-        return SearchResponse(**result)
+        result = await search_agent.search(request.query, limit=request.limit, facets=request.facets)
+        body = encode_response(SEARCH_RESPONSE, result)
     except Exception as e:
         logger.error("Text search failed", error=str(e))
         raise HTTPException(status_code=500, detail="Search failed")
+    if not result.get("degradations"):
+        await set_cache_raw(cache_key, body)
+    return FastJSONResponse(body)
 
-@router.post("/image", response_model=SearchResponse)
-async def image_search(request: ImageSearchRequest):
+@router.post("/image", response_model=SearchResponse, response_class=FastJSONResponse)
+async def image_search(request: ImageSearchRequest, image_agent=Depends(get_image_agent)):
     try:
         # Validate base64 image data and get properly formatted data URL
         try:
@@ -65,7 +47,10 @@ async def image_search(request: ImageSearchRequest):
                 data_url,
                 request.query
             )
-            return SearchResponse(**result)
+            return FastJSONResponse(encode_response(SEARCH_RESPONSE, result))
+        except StageTimeout as e:
+            logger.error("Image search timed out", error=str(e))
+            raise HTTPException(status_code=504, detail="Image search timed out")
         except Exception as e:
             logger.error("Image search failed", error=str(e))
             raise HTTPException(
@@ -79,4 +64,55 @@ async def image_search(request: ImageSearchRequest):
         raise HTTPException(
             status_code=500,
             detail="An unexpected error occurred during image search"
-        ) 
\ No newline at end of file
+        )
+
+# The body is parsed by read_image_upload (streamed, size-limited), so the
+# multipart schema is declared here for the OpenAPI docs only.
+IMAGE_UPLOAD_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["image"],
+                    "properties": {
+                        "image": {"type": "string", "format": "binary"},
+                        "query": {"type": "string", "maxLength": 500},
+                        "limit": {"type": "integer", "minimum": 1, "maximum": 100, "default": 5},
+                    },
+                }
+            }
+        },
+    }
+}
+
+@router.post(
+    "/image/upload",
+    response_model=SearchResponse,
+    response_class=FastJSONResponse,
+    openapi_extra=IMAGE_UPLOAD_OPENAPI,
+)
+async def image_upload_search(request: Request, image_agent=Depends(get_image_agent)):
+    """Image search from a multipart/form-data upload, avoiding base64 overhead."""
+    image_bytes, form = await read_image_upload(request)
+    try:
+        fields = ImageUploadFields(
+            query=form.get("query") or None,
+            limit=form.get("limit") or 5,
+        )
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors())
+
+    try:
+        result = await image_agent.search(image_bytes, fields.query, limit=fields.limit)
+        return FastJSONResponse(encode_response(SEARCH_RESPONSE, result))
+    except StageTimeout as e:
+        logger.error("Image upload search timed out", error=str(e))
+        raise HTTPException(status_code=504, detail="Image search timed out")
+    except Exception as e:
+        logger.error("Image upload search failed", error=str(e))
+        raise HTTPException(
+            status_code=500,
+            detail=f"Image search failed: {str(e)}"
+        )
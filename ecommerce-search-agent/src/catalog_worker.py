@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+import signal
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from src.embeddings.change_capture import CatalogChangeListener, install_change_triggers
+from src.utils.logger import configure_logging, get_logger
+
+# Configure logging
+configure_logging()
+logger = get_logger(__name__)
+
+async def main(install_triggers: bool = False) -> None:
+    """Run the catalog change listener until SIGINT/SIGTERM."""
+    if install_triggers:
+        await install_change_triggers()
+    listener = CatalogChangeListener()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, listener.stop)
+    await listener.run_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply catalog changes to the vector index")
+    parser.add_argument(
+        "--install-triggers",
+        action="store_true",
+        help="Create or replace the products/categories change triggers before listening",
+    )
+    args = parser.parse_args()
+    asyncio.run(main(install_triggers=args.install_triggers))
@@ -0,0 +1,171 @@
+import os
+import hashlib
+import json
+from dotenv import load_dotenv
+load_dotenv()
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import BaseOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
+
+from src.database.redis_client import get_redis
+from src.utils.logger import get_logger
+from src.utils.metrics import record_cache
+from src.utils.tracing import span
+
+logger = get_logger(__name__)
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL = int(os.environ.get("LLM_CACHE_TTL", "86400"))
+
+class LLMCacheStats(BaseModel):
+    """Hit/miss counters for one cached chain."""
+    hits: int = Field(default=0, ge=0)
+    misses: int = Field(default=0, ge=0)
+    errors: int = Field(default=0, ge=0)
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups served from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+_stats: Dict[str, LLMCacheStats] = {}
+
+def get_llm_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Return per-chain cache counters and hit rates for this process."""
+    return {
+        name: {**stats.dict(), "hit_rate": round(stats.hit_rate, 4)}
+        for name, stats in _stats.items()
+    }
+
+class CachedLLMChain:
+    """
+    A ``prompt | llm | parser`` pipeline whose results are cached in Redis.
+
+    The key is a hash of the model's identifying parameters (model name,
+    temperature, token limit) and the fully rendered prompt messages, so any
+    change to the prompt template, inputs or model settings is a miss. The
+    parser output must be JSON-serializable.
+
+    Callers that post-process the output pass a ``parse`` function: a
+    response is cached only once it parses, so a malformed or rejected
+    response is retried rather than served until it expires.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prompt: ChatPromptTemplate,
+        llm: BaseChatModel,
+        parser: BaseOutputParser,
+        ttl: int = LLM_CACHE_TTL,
+        enabled: bool = LLM_CACHE_ENABLED,
+    ):
+        """
+        Initialize the cached chain.
+
+        Args:
+            name: Chain name, used in cache keys and stats
+            prompt: Prompt template rendered with the invocation inputs
+            llm: Chat model to call on a miss
+            parser: Output parser applied to the model response
+            ttl: Seconds a cached result stays valid
+            enabled: Set to False to always call the model
+        """
+        self.name = name
+        self.prompt = prompt
+        self.llm = llm
+        self.ttl = ttl
+        self.enabled = enabled
+        self.chain = prompt | llm | parser
+        self.stats = _stats.setdefault(name, LLMCacheStats())
+        self._model_key = json.dumps(
+            {"type": llm._llm_type, "params": llm._identifying_params},
+            sort_keys=True,
+            default=str,
+        )
+
+    def cache_key(self, inputs: Dict[str, Any]) -> str:
+        """Return the Redis key for the prompt rendered from ``inputs``."""
+        messages = [
+            (message.type, message.content)
+            for message in self.prompt.invoke(inputs).to_messages()
+        ]
+        digest = hashlib.sha256(
+            json.dumps([self._model_key, messages], default=str).encode("utf-8")
+        ).hexdigest()
+        return f"llm:{self.name}:{digest}"
+
+    async def aget_cached(self, inputs: Dict[str, Any]) -> Optional[Any]:
+        """
+        Return the cached result for ``inputs`` without calling the model.
+
+        Returns:
+            The cached parser output, or None on a miss or Redis error
+        """
+        if not self.enabled:
+            return None
+        try:
+            value = await get_redis().get(self.cache_key(inputs))
+        except RedisError as e:
+            self.stats.errors += 1
+            logger.warning("LLM cache read failed", chain=self.name, error=str(e))
+            return None
+        return json.loads(value) if value is not None else None
+
+    async def ainvalidate(self, inputs: Dict[str, Any]) -> None:
+        """Drop the cached result for ``inputs``, e.g. after it failed downstream."""
+        if not self.enabled:
+            return
+        try:
+            await get_redis().delete(self.cache_key(inputs))
+        except RedisError as e:
+            self.stats.errors += 1
+            logger.warning("LLM cache delete failed", chain=self.name, error=str(e))
+
+    async def ainvoke(self, inputs: Dict[str, Any], parse: Optional[Callable[[Any], Any]] = None) -> Any:
+        """
+        Return the result for ``inputs``, running the chain on a miss.
+
+        Args:
+            inputs: Prompt variables
+            parse: Converts the parser output and raises if it is unusable.
+                The output is cached only if it succeeds.
+
+        Returns:
+            The parsed result (the raw parser output without ``parse``)
+        """
+        parse = parse or (lambda result: result)
+        with span(f"llm.{self.name}") as llm_span:
+            if not self.enabled:
+                return parse(await self.chain.ainvoke(inputs))
+
+            cached = await self.aget_cached(inputs)
+            if cached is not None:
+                try:
+                    parsed = parse(cached)
+                except Exception as e:
+                    # Stored before it was checked (or the checks changed); ask again
+                    logger.warning("Discarding unusable LLM cache entry", chain=self.name, error=str(e))
+                    await self.ainvalidate(inputs)
+                    cached = None
+            record_cache(f"llm_{self.name}", cached is not None)
+            llm_span.set_attribute("cache_hit", cached is not None)
+            if cached is not None:
+                self.stats.hits += 1
+                logger.debug("LLM cache hit", chain=self.name, hit_rate=self.stats.hit_rate)
+                return parsed
+
+            self.stats.misses += 1
+            result = await self.chain.ainvoke(inputs)
+            parsed = parse(result)
+            try:
+                await get_redis().set(self.cache_key(inputs), json.dumps(result), ex=self.ttl)
+            except RedisError as e:
+                self.stats.errors += 1
+                logger.warning("LLM cache write failed", chain=self.name, error=str(e))
+            return parsed
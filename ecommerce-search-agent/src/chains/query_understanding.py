@@ -1,11 +1,13 @@
 from typing import Dict, List, Optional, Any, TypedDict
 from pydantic import BaseModel, Field, validator
-from langchain.chains import LLMChain
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.language_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from langchain_openai import ChatOpenAI
 import json
+from src.chains.llm_cache import CachedLLMChain
+from src.chains.usage_callback import OpenAIUsageCallback
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -99,25 +101,33 @@ Output:"""
 class QueryUnderstandingChain:
     """Chain for understanding and structuring user queries."""
 
-    def __init__(self, model_name: str = "gpt-4-turbo-preview"):
-        """Initialize the query understanding chain."""
+    def __init__(self, model_name: str = "gpt-4-turbo-preview", llm: Optional[BaseChatModel] = None):
+        """
+        Initialize the query understanding chain.
+
+        Args:
+            model_name: Name of the OpenAI model to use
+            llm: Optional chat model to use instead (e.g. a fake model in tests)
+        """
         self.model_name = model_name
+        self.llm = llm
         self.chain = self._create_chain()
 
-    def _create_chain(self) -> LLMChain:
-        """Create the chain with prompt and model."""
+    def _create_chain(self) -> CachedLLMChain:
+        """Create the cached chain with prompt and model."""
         prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", QUERY_UNDERSTANDING_PROMPT),
                 ("human", "{query}"),
             ]
         )
-        llm = ChatOpenAI(
+        llm = self.llm or ChatOpenAI(
             model=self.model_name,
             temperature=0.1,  # Lower temperature for more consistent results
             max_tokens=500,   # Limit response size
+            callbacks=[OpenAIUsageCallback("query_understanding")],
         )
-        return prompt | llm | StrOutputParser()
+        return CachedLLMChain("query_understanding", prompt, llm, StrOutputParser())
 
     async def run(
         self,
@@ -150,34 +160,36 @@ class QueryUnderstandingChain:
                 )
                 query = f"Context from previous queries:\n{context}\n\nCurrent query: {query}"
 
-            # Run the chain
-            result = await self.chain.ainvoke({"query": query})
-            
-            # Parse and validate the result
-            try:
-                raw_result = json.loads(result)
-                structured_result = QueryUnderstandingResult(**raw_result)
-                
-                logger.info(
-                    "Query understanding completed",
-                    query=query,
-                    result=structured_result.dict(),
-                )
-                return structured_result
-            except json.JSONDecodeError as e:
-                logger.error(
-                    "Error parsing query understanding result",
-                    error=str(e),
-                    result=result,
-                )
-                raise
-            except ValueError as e:
-                logger.error(
-                    "Error validating query understanding result",
-                    error=str(e),
-                    result=raw_result,
-                )
-                raise
+            # Run the chain; only responses that parse are cached
+            structured_result = await self.chain.ainvoke({"query": query}, parse=self._parse)
+            logger.debug(
+                "Query understanding completed",
+                query=query,
+                result=structured_result.dict(),
+            )
+            return structured_result
         except Exception as e:
             logger.error("Error in query understanding", error=str(e))
-            raise 
\ No newline at end of file
+            raise
+
+    @staticmethod
+    def _parse(result: str) -> QueryUnderstandingResult:
+        """Parse and validate the model's JSON response."""
+        try:
+            raw_result = json.loads(result)
+        except json.JSONDecodeError as e:
+            logger.error(
+                "Error parsing query understanding result",
+                error=str(e),
+                result=result,
+            )
+            raise
+        try:
+            return QueryUnderstandingResult(**raw_result)
+        except (TypeError, ValueError) as e:
+            logger.error(
+                "Error validating query understanding result",
+                error=str(e),
+                result=raw_result,
+            )
+            raise
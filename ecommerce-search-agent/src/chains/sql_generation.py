@@ -4,11 +4,13 @@ import json
 import re
 from enum import Enum
 
-from langchain.chains import LLMChain
 from langchain.prompts import ChatPromptTemplate
+from langchain_core.language_models import BaseChatModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_openai import ChatOpenAI
 
+from src.chains.llm_cache import CachedLLMChain
+from src.chains.usage_callback import OpenAIUsageCallback
 from src.utils.logger import get_logger
 from src.chains.query_understanding import QueryUnderstandingResult
 
@@ -117,25 +119,33 @@ Remember to:
 class SQLGenerationChain:
     """Chain for generating SQL queries from query understanding results."""
 
-    def __init__(self, model_name: str = "gpt-4-turbo-preview"):
-        """Initialize the SQL generation chain."""
+    def __init__(self, model_name: str = "gpt-4-turbo-preview", llm: Optional[BaseChatModel] = None):
+        """
+        Initialize the SQL generation chain.
+
+        Args:
+            model_name: Name of the OpenAI model to use
+            llm: Optional chat model to use instead (e.g. a fake model in tests)
+        """
         self.model_name = model_name
+        self.llm = llm
         self.chain = self._create_chain()
 
-    def _create_chain(self) -> LLMChain:
-        """Create the chain with prompt and model."""
+    def _create_chain(self) -> CachedLLMChain:
+        """Create the cached chain with prompt and model."""
         prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", SQL_GENERATION_PROMPT),
                 ("human", "{query_understanding}\nLimit: {limit}"),
             ]
         )
-        llm = ChatOpenAI(
+        llm = self.llm or ChatOpenAI(
             model=self.model_name,
             temperature=0.1,  # Lower temperature for more consistent results
             max_tokens=1000,  # Allow for longer queries
+            callbacks=[OpenAIUsageCallback("sql_generation")],
         )
-        return prompt | llm | StrOutputParser()
+        return CachedLLMChain("sql_generation", prompt, llm, StrOutputParser())
 
     async def run(
         self,
@@ -162,22 +172,13 @@ class SQLGenerationChain:
         config = config or SQLGenerationConfig()
         
         try:
-            # Run the chain
-            result = await self.chain.ainvoke({
-                "query_understanding": query_understanding.json(),
-                "limit": config.limit
-            })
-
-            # Extract SQL query from the response
-            sql_query = self._extract_sql_query(result)
-            
-            # Validate and clean the query
-            sql_query = self._clean_sql_query(sql_query, config)
-            
-            if not self._validate_sql(sql_query):
-                raise ValueError("Generated SQL query contains dangerous operations")
+            # Run the chain; only queries that pass validation are cached
+            sql_query = await self.chain.ainvoke(
+                self._inputs(query_understanding, config),
+                parse=lambda result: self._parse(result, config),
+            )
             
-            logger.info(
+            logger.debug(
                 "SQL generation completed",
                 query_understanding=query_understanding.dict(),
                 config=config.dict(),
@@ -188,6 +189,34 @@ class SQLGenerationChain:
             logger.error("Error in SQL generation", error=str(e))
             raise
 
+    async def invalidate(
+        self,
+        query_understanding: QueryUnderstandingResult,
+        config: Optional[SQLGenerationConfig] = None,
+    ) -> None:
+        """Forget the cached query for ``query_understanding``, e.g. after it failed to execute."""
+        await self.chain.ainvalidate(self._inputs(query_understanding, config or SQLGenerationConfig()))
+
+    @staticmethod
+    def _inputs(query_understanding: QueryUnderstandingResult, config: SQLGenerationConfig) -> Dict[str, Any]:
+        """Return the prompt variables for a query understanding."""
+        return {
+            "query_understanding": query_understanding.json(),
+            "limit": config.limit
+        }
+
+    def _parse(self, result: str, config: SQLGenerationConfig) -> str:
+        """Extract, clean and validate the SQL query in the model's response."""
+        # Extract SQL query from the response
+        sql_query = self._extract_sql_query(result)
+        
+        # Validate and clean the query
+        sql_query = self._clean_sql_query(sql_query, config)
+        
+        if not self._validate_sql(sql_query):
+            raise ValueError("Generated SQL query contains dangerous operations")
+        return sql_query
+
     def _extract_sql_query(self, result: str) -> str:
         """Extract SQL query from the LLM response."""
         if "```sql" in result:
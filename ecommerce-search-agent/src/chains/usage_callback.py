@@ -0,0 +1,31 @@
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from src.utils.metrics import record_openai_call
+
+class OpenAIUsageCallback(BaseCallbackHandler):
+    """Counts the calls and tokens of a LangChain OpenAI model in the Prometheus metrics."""
+
+    # Run in the caller's context so the endpoint label is preserved
+    run_inline = True
+
+    def __init__(self, operation: str):
+        """
+        Initialize the callback.
+
+        Args:
+            operation: Metrics label for what the model is used for
+        """
+        self.operation = operation
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        llm_output = response.llm_output or {}
+        usage = llm_output.get("token_usage") or {}
+        record_openai_call(
+            self.operation,
+            llm_output.get("model_name"),
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
@@ -0,0 +1,156 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+from datetime import datetime
+from typing import Any, AsyncGenerator, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+
+from src.database.postgres import get_db
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Rows fetched per round trip from the server-side cursor
+CATALOG_FETCH_SIZE = int(os.environ.get("CATALOG_FETCH_SIZE", "500"))
+
+CATALOG_COLUMNS = """
+    p.id, p.name, p.description, p.price, p."originalPrice", p.image, p.images,
+    p.rating, p.reviews, p."inStock", p.stock, p.features, p.specifications,
+    p."categoryId", c.name as category_name
+"""
+
+def _catalog_query(after_id: Optional[int]) -> str:
+    """Build the catalog query, optionally resuming after a product id."""
+    where = 'WHERE p.id > :after_id' if after_id is not None else ""
+    return f"""
+        SELECT {CATALOG_COLUMNS}
+        FROM products p
+        JOIN categories c ON p."categoryId" = c.id
+        {where}
+        ORDER BY p.id
+    """
+
+async def fetch_products_by_ids(ids: List[int]) -> List[Dict[str, Any]]:
+    """Fetch catalog rows for the given product ids in a single query."""
+    if not ids:
+        return []
+    async with get_db() as db:
+        result = await db.execute(
+            text(f"""
+                SELECT {CATALOG_COLUMNS}
+                FROM products p
+                JOIN categories c ON p."categoryId" = c.id
+                WHERE p.id = ANY(:ids)
+            """),
+            {"ids": list(ids)},
+        )
+        return [dict(row) for row in result.mappings().all()]
+
+async def fetch_product_ids_in_categories(category_ids: List[str]) -> List[int]:
+    """Return the ids of all products in the given categories."""
+    if not category_ids:
+        return []
+    async with get_db() as db:
+        result = await db.execute(
+            text('SELECT p.id FROM products p WHERE p."categoryId" = ANY(:category_ids)'),
+            {"category_ids": list(category_ids)},
+        )
+        return [row[0] for row in result.all()]
+
+async def fetch_ids_updated_since(since: datetime) -> Tuple[List[int], List[str]]:
+    """Return the ids of products and categories whose ``updatedAt`` is after ``since``."""
+    async with get_db() as db:
+        products = await db.execute(
+            text('SELECT p.id FROM products p WHERE p."updatedAt" > :since'),
+            {"since": since},
+        )
+        categories = await db.execute(
+            text('SELECT c.id FROM categories c WHERE c."updatedAt" > :since'),
+            {"since": since},
+        )
+        return [row[0] for row in products.all()], [row[0] for row in categories.all()]
+
+async def fetch_catalog_terms() -> Set[str]:
+    """
+    Return the distinct lower-cased words used in product names, features
+    and category names, tokenized in Postgres so only the vocabulary is sent.
+    """
+    async with get_db() as db:
+        result = await db.execute(text("""
+            SELECT DISTINCT term
+            FROM (
+                SELECT regexp_split_to_table(
+                    lower(p.name || ' ' || c.name || ' ' || coalesce(p.features::text, '')),
+                    '[^[:alnum:]]+'
+                ) AS term
+                FROM products p
+                JOIN categories c ON p."categoryId" = c.id
+            ) terms
+            WHERE length(term) > 1
+        """))
+        return {row[0] for row in result.all()}
+
+async def stream_filter_columns(
+    fetch_size: Optional[int] = None,
+) -> AsyncGenerator[List[Tuple[int, Any, Any, Any, Any, str]], None]:
+    """
+    Stream the columns products are filtered on, in id order.
+
+    Yields:
+        Batches of (id, price, rating, stock, inStock, category name) tuples
+    """
+    query = text("""
+        SELECT p.id, p.price, p.rating, p.stock, p."inStock", c.name
+        FROM products p
+        JOIN categories c ON p."categoryId" = c.id
+        ORDER BY p.id
+    """).execution_options(yield_per=fetch_size or CATALOG_FETCH_SIZE)
+    async with get_db() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield [tuple(row) for row in partition]
+
+async def count_products() -> int:
+    """Return the number of products the catalog query yields."""
+    async with get_db() as db:
+        result = await db.execute(text("""
+            SELECT COUNT(*)
+            FROM products p
+            JOIN categories c ON p."categoryId" = c.id
+        """))
+        return int(result.scalar_one())
+
+async def stream_product_batches(
+    fetch_size: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> AsyncGenerator[List[Dict[str, Any]], None]:
+    """
+    Stream the product catalog in batches using a server-side cursor.
+
+    Rows are ordered by product id so a consumer can resume a partial
+    read by passing the last id it handled as ``after_id``.
+
+    Args:
+        fetch_size: Rows per cursor fetch (defaults to CATALOG_FETCH_SIZE)
+        after_id: Only return products with an id greater than this
+
+    Yields:
+        Lists of product dicts, at most ``fetch_size`` long
+    """
+    fetch_size = fetch_size or CATALOG_FETCH_SIZE
+    params = {"after_id": after_id} if after_id is not None else {}
+    query = text(_catalog_query(after_id)).execution_options(yield_per=fetch_size)
+    async with get_db() as db:
+        result = await db.stream(query, params)
+        async for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+
+async def stream_products(
+    fetch_size: Optional[int] = None,
+    after_id: Optional[int] = None,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Stream the product catalog one product dict at a time."""
+    async for batch in stream_product_batches(fetch_size, after_id):
+        for product in batch:
+            yield product
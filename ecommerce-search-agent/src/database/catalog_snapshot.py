@@ -0,0 +1,347 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+import asyncio
+import time
+from typing import Any, AsyncIterable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CATALOG_SNAPSHOT_ENABLED = os.environ.get("CATALOG_SNAPSHOT_ENABLED", "true").lower() == "true"
+CATALOG_SNAPSHOT_REFRESH_SECONDS = float(os.environ.get("CATALOG_SNAPSHOT_REFRESH_SECONDS", "300"))
+
+# Upper bounds of the price facet buckets; prices above the last one share an open bucket
+FACET_PRICE_EDGES = [
+    float(edge) for edge in os.environ.get("FACET_PRICE_EDGES", "25,50,100,250,500,1000").split(",") if edge.strip()
+]
+# Categories listed in the category facet, most products first
+FACET_MAX_CATEGORIES = int(os.environ.get("FACET_MAX_CATEGORIES", "20"))
+
+FilterRow = Tuple[int, Any, Any, Any, Any, str]
+SnapshotLoader = Callable[[], AsyncIterable[List[FilterRow]]]
+
+class CatalogFilter(BaseModel):
+    """Structured product filters, evaluated against the catalog snapshot."""
+    # Case-insensitive substring of the category name, like ILIKE '%category%'
+    category: Optional[str] = None
+    min_price: Optional[float] = Field(default=None, ge=0)
+    max_price: Optional[float] = Field(default=None, ge=0)
+    in_stock: Optional[bool] = None
+    min_rating: Optional[float] = Field(default=None, ge=0, le=5)
+
+    def is_empty(self) -> bool:
+        """Whether no filter is set."""
+        return (
+            not self.category
+            and self.min_price is None
+            and self.max_price is None
+            and self.in_stock is None
+            and self.min_rating is None
+        )
+
+    def matches(self, product: Dict[str, Any]) -> bool:
+        """Evaluate the filters on one product record, for when no snapshot is loaded."""
+        price = float(product.get("price") or 0)
+        return (
+            (not self.category or self.category.lower() in (product.get("category_name") or "").lower())
+            and (self.min_price is None or price >= self.min_price)
+            and (self.max_price is None or price <= self.max_price)
+            and (self.in_stock is None or bool(product.get("inStock", True)) == self.in_stock)
+            and (self.min_rating is None or float(product.get("rating") or 0) >= self.min_rating)
+        )
+
+class CatalogSnapshot:
+    """
+    Column arrays of the fields products are filtered on, one row per product
+    in id order.
+
+    A snapshot is never modified after it is built; refreshing builds a new
+    one and swaps the module-level reference, so readers need no locking.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        price: np.ndarray,
+        rating: np.ndarray,
+        stock: np.ndarray,
+        in_stock: np.ndarray,
+        category_codes: np.ndarray,
+        categories: Sequence[str],
+    ):
+        self.ids = ids
+        self.price = price
+        self.rating = rating
+        self.stock = stock
+        self.in_stock = in_stock
+        self.category_codes = category_codes
+        self.categories = list(categories)
+        self._categories_lower = [name.lower() for name in self.categories]
+        self.loaded_at = time.time()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[FilterRow]) -> "CatalogSnapshot":
+        """
+        Build a snapshot from (id, price, rating, stock, inStock, category) rows.
+
+        Rows need not be sorted; NULL numbers become 0 and NULL stock flags
+        count as in stock, as elsewhere in the API.
+        """
+        ids: List[int] = []
+        prices: List[float] = []
+        ratings: List[float] = []
+        stocks: List[int] = []
+        flags: List[bool] = []
+        codes: List[int] = []
+        category_codes: Dict[str, int] = {}
+        for product_id, price, rating, stock, in_stock, category in rows:
+            ids.append(product_id)
+            prices.append(float(price or 0))
+            ratings.append(float(rating or 0))
+            stocks.append(int(stock or 0))
+            flags.append(True if in_stock is None else bool(in_stock))
+            codes.append(category_codes.setdefault(category or "", len(category_codes)))
+
+        order = np.argsort(np.asarray(ids, dtype=np.int64), kind="stable")
+        return cls(
+            ids=np.asarray(ids, dtype=np.int64)[order],
+            price=np.asarray(prices, dtype=np.float64)[order],
+            rating=np.asarray(ratings, dtype=np.float32)[order],
+            stock=np.asarray(stocks, dtype=np.int32)[order],
+            in_stock=np.asarray(flags, dtype=bool)[order],
+            category_codes=np.asarray(codes, dtype=np.int32)[order],
+            categories=list(category_codes),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the column arrays."""
+        return sum(
+            column.nbytes
+            for column in (self.ids, self.price, self.rating, self.stock, self.in_stock, self.category_codes)
+        )
+
+    def positions(self, ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Locate products by id.
+
+        Returns:
+            Row positions and a mask of which ids are in the snapshot (the
+            position of a missing id is meaningless)
+        """
+        wanted = np.asarray(ids, dtype=np.int64)
+        positions = np.searchsorted(self.ids, wanted)
+        positions = np.minimum(positions, max(len(self.ids) - 1, 0))
+        found = self.ids[positions] == wanted if len(self.ids) else np.zeros(len(wanted), dtype=bool)
+        return positions, found
+
+    def category_codes_matching(self, term: str) -> np.ndarray:
+        """Codes of the categories whose name contains ``term``, case-insensitively."""
+        term = term.lower()
+        return np.asarray(
+            [code for code, name in enumerate(self._categories_lower) if term in name],
+            dtype=np.int32,
+        )
+
+    def mask(self, filters: CatalogFilter, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Evaluate ``filters`` as a boolean mask.
+
+        Args:
+            filters: The filters to apply
+            rows: Row positions to evaluate (defaults to the whole catalog)
+
+        Returns:
+            One flag per row, True where every filter holds
+        """
+        def column(values: np.ndarray) -> np.ndarray:
+            return values if rows is None else values[rows]
+
+        mask = np.ones(len(self.ids) if rows is None else len(rows), dtype=bool)
+        if filters.category:
+            # Lookup table indexed by category code; cheaper than np.isin
+            wanted = np.zeros(len(self.categories), dtype=bool)
+            wanted[self.category_codes_matching(filters.category)] = True
+            mask &= wanted[column(self.category_codes)]
+        if filters.min_price is not None:
+            mask &= column(self.price) >= filters.min_price
+        if filters.max_price is not None:
+            mask &= column(self.price) <= filters.max_price
+        if filters.in_stock is not None:
+            mask &= column(self.in_stock) == filters.in_stock
+        if filters.min_rating is not None:
+            mask &= column(self.rating) >= filters.min_rating
+        return mask
+
+    def filter_ids(self, ids: Sequence[int], filters: CatalogFilter) -> List[int]:
+        """
+        Keep the ids that pass ``filters``, in their original order.
+
+        Ids not in the snapshot (products added since it was built) are kept;
+        the snapshot cannot judge them.
+        """
+        if not len(ids) or filters.is_empty():
+            return list(ids)
+        positions, found = self.positions(ids)
+        keep = ~found | self.mask(filters, positions)
+        return [id_ for id_, kept in zip(ids, keep) if kept]
+
+    def select(self, filters: CatalogFilter, limit: int) -> List[int]:
+        """
+        Return up to ``limit`` ids passing ``filters``, cheapest first.
+
+        Products with the same price are returned in id order, so the result
+        is the same on every call.
+        """
+        rows = np.flatnonzero(self.mask(filters))
+        if len(rows) > limit:
+            # Partition first so only the selected rows are fully sorted
+            rows = rows[np.argpartition(self.price[rows], limit - 1)[:limit]]
+        rows = rows[np.lexsort((self.ids[rows], self.price[rows]))]
+        return self.ids[rows].tolist()
+
+    def candidate_rows(self, ids: Sequence[int], filters: Optional[CatalogFilter] = None) -> np.ndarray:
+        """
+        Row positions of the products in ``ids`` plus every product passing
+        ``filters``, without duplicates. Ids not in the snapshot are skipped.
+        """
+        if filters is not None and not filters.is_empty():
+            selected = self.mask(filters)
+        else:
+            selected = np.zeros(len(self.ids), dtype=bool)
+        if len(ids):
+            positions, found = self.positions(ids)
+            selected[positions[found]] = True
+        return np.flatnonzero(selected)
+
+    def facets(
+        self,
+        rows: np.ndarray,
+        price_edges: Sequence[float] = FACET_PRICE_EDGES,
+        max_categories: int = FACET_MAX_CATEGORIES,
+    ) -> Dict[str, Any]:
+        """
+        Count products per category, per price bucket and in stock.
+
+        Args:
+            rows: Row positions of the products to count
+            price_edges: Ascending upper bounds of the price buckets; a
+                price equal to an edge counts in the bucket above it, so
+                buckets are [min, max)
+            max_categories: Categories listed, most products first
+
+        Returns:
+            Dict with ``total``, ``in_stock``, ``categories`` (name and count)
+            and ``price`` (bucket bounds and count; every bucket, empty or not)
+        """
+        category_counts = np.bincount(self.category_codes[rows], minlength=len(self.categories))
+        categories = [
+            {"name": self.categories[code], "count": int(category_counts[code])}
+            for code in np.flatnonzero(category_counts)
+            if self.categories[code]
+        ]
+        categories.sort(key=lambda facet: (-facet["count"], facet["name"]))
+
+        edges = np.asarray(price_edges, dtype=np.float64)
+        # side="right" puts a price equal to an edge past it, in the next bucket
+        bucket_counts = np.bincount(
+            np.searchsorted(edges, self.price[rows], side="right"),
+            minlength=len(edges) + 1,
+        )
+        bounds = [0.0, *edges.tolist()]
+        price = [
+            {"min": bounds[i], "max": bounds[i + 1] if i < len(edges) else None, "count": int(count)}
+            for i, count in enumerate(bucket_counts)
+        ]
+        return {
+            "total": int(len(rows)),
+            "in_stock": int(np.count_nonzero(self.in_stock[rows])),
+            "categories": categories[:max_categories],
+            "price": price,
+        }
+
+_snapshot: Optional[CatalogSnapshot] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+def get_catalog_snapshot() -> Optional[CatalogSnapshot]:
+    """Return the current catalog snapshot, or None if none has been loaded."""
+    return _snapshot
+
+def set_catalog_snapshot(snapshot: Optional[CatalogSnapshot]) -> None:
+    """Make ``snapshot`` the current one; requests already holding the old one keep it."""
+    global _snapshot
+    _snapshot = snapshot
+
+async def load_catalog_snapshot(loader: Optional[SnapshotLoader] = None) -> CatalogSnapshot:
+    """
+    Build a snapshot from the catalog.
+
+    Args:
+        loader: Yields batches of filter rows (defaults to ``stream_filter_columns``)
+    """
+    if loader is None:
+        from src.database.catalog import stream_filter_columns
+        loader = stream_filter_columns
+    rows: List[FilterRow] = []
+    async for batch in loader():
+        rows.extend(batch)
+    # Array building is CPU work; keep it off the event loop
+    return await asyncio.to_thread(CatalogSnapshot.from_rows, rows)
+
+async def refresh_catalog_snapshot(loader: Optional[SnapshotLoader] = None) -> Optional[CatalogSnapshot]:
+    """
+    Load a new snapshot and swap it in.
+
+    On failure the previous snapshot stays in use.
+
+    Returns:
+        The new snapshot, or None if loading failed
+    """
+    started = time.perf_counter()
+    try:
+        snapshot = await load_catalog_snapshot(loader)
+    except Exception as e:
+        logger.error("Failed to load catalog snapshot", error=str(e))
+        return None
+    set_catalog_snapshot(snapshot)
+    logger.info(
+        "Catalog snapshot loaded",
+        products=len(snapshot),
+        categories=len(snapshot.categories),
+        bytes=snapshot.nbytes,
+        seconds=round(time.perf_counter() - started, 3),
+    )
+    return snapshot
+
+async def _refresh_forever(interval: float, loader: Optional[SnapshotLoader]) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        await refresh_catalog_snapshot(loader)
+
+def start_catalog_snapshot_refresh(
+    interval: float = CATALOG_SNAPSHOT_REFRESH_SECONDS,
+    loader: Optional[SnapshotLoader] = None,
+) -> None:
+    """Refresh the snapshot every ``interval`` seconds in the background."""
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        _refresh_task = asyncio.create_task(_refresh_forever(interval, loader))
+
+async def stop_catalog_snapshot_refresh() -> None:
+    """Stop the background refresh, if running."""
+    global _refresh_task
+    if _refresh_task is not None:
+        task, _refresh_task = _refresh_task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
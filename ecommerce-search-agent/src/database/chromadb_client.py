@@ -1,13 +1,21 @@
 import os
+import re
+import time
+import asyncio
+import threading
 from dotenv import load_dotenv
 load_dotenv()
-from typing import List, Optional, Dict, Any
-from chromadb.api.models.Collection import Collection
+from typing import TYPE_CHECKING, List, Optional, Dict, Any
 
-import chromadb
-from chromadb.config import Settings as ChromaSettings
+from redis.exceptions import RedisError
 
+from src.database.redis_client import get_redis
 from src.utils.logger import get_logger
+from src.utils.metrics import CHROMA_IN_PROGRESS, time_stage
+from src.utils.tracing import traced
+
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
 
 logger = get_logger(__name__)
 
@@ -18,35 +26,201 @@ def get_required_env_var(name: str) -> str:
         raise ValueError(f"Required environment variable {name} is not set")
     return value
 
-# Initialize ChromaDB client with graceful failure handling
-chroma_client = None
-collection = None
-
-try:
-    chroma_client = chromadb.HttpClient(
-        host=get_required_env_var("CHROMA_HOST"),
-        port=int(get_required_env_var("CHROMA_PORT")),
-        settings=ChromaSettings(
-            anonymized_telemetry=False,
-            allow_reset=True,
-        ),
+# The client (and the chromadb package itself, which is slow to import) is
+# created on first use. After a failed attempt, retry at most this often.
+CHROMA_RETRY_SECONDS = float(os.environ.get("CHROMA_RETRY_SECONDS", "30"))
+
+_chroma_client = None
+_chroma_lock = threading.Lock()
+_chroma_failed_at: Optional[float] = None
+
+def get_chroma_client() -> Optional[Any]:
+    """
+    Return the shared ChromaDB HTTP client, connecting on first use.
+
+    This blocks on network I/O the first time; async callers should go through
+    ``get_collection``, which connects in a worker thread.
+
+    Returns:
+        The client, or None if ChromaDB is not configured or unreachable
+    """
+    global _chroma_client, _chroma_failed_at
+    if _chroma_client is not None:
+        return _chroma_client
+    with _chroma_lock:
+        if _chroma_client is not None:
+            return _chroma_client
+        if _chroma_failed_at and time.monotonic() - _chroma_failed_at < CHROMA_RETRY_SECONDS:
+            return None
+        try:
+            import chromadb
+            from chromadb.config import Settings as ChromaSettings
+
+            _chroma_client = chromadb.HttpClient(
+                host=get_required_env_var("CHROMA_HOST"),
+                port=int(get_required_env_var("CHROMA_PORT")),
+                settings=ChromaSettings(
+                    anonymized_telemetry=False,
+                    allow_reset=True,
+                ),
+            )
+            _chroma_failed_at = None
+            logger.info("ChromaDB client initialized successfully")
+        except Exception as e:
+            _chroma_failed_at = time.monotonic()
+            logger.error("Failed to initialize ChromaDB client", error=str(e))
+            logger.warning("ChromaDB functionality will be disabled")
+    return _chroma_client
+
+# Searches go through the PRODUCTS_ALIAS, which Redis maps to a versioned
+# collection (products_v{n}). Without an alias the base collection is used.
+PRODUCTS_ALIAS = "products"
+ALIAS_KEY = f"chroma:alias:{PRODUCTS_ALIAS}"
+ALIAS_VERSION_KEY = f"chroma:alias:{PRODUCTS_ALIAS}:version"
+# Collection a rebuild is filling. Catalog changes are written to it as well as
+# to the live collection, so none are lost when the alias is swapped to it.
+BUILDING_KEY = f"chroma:alias:{PRODUCTS_ALIAS}:building"
+ALIAS_CACHE_SECONDS = float(os.environ.get("CHROMA_ALIAS_CACHE_SECONDS", "5"))
+_VERSIONED_NAME = re.compile(rf"^{PRODUCTS_ALIAS}_v(\d+)$")
+
+_resolved_alias: Dict[str, Any] = {"name": None, "expires": 0.0}
+_collections: Dict[str, "Collection"] = {}
+
+def _get_or_create_collection(name: str, client: Optional[Any] = None) -> "Collection":
+    """Get or create a collection without embedding function (we handle embeddings manually)."""
+    shared = client is None or client is _chroma_client
+    if shared and name in _collections:
+        return _collections[name]
+    client = client or get_chroma_client()
+    if client is None:
+        raise RuntimeError("ChromaDB is not available")
+    result = client.get_or_create_collection(
+        name=name,
+        metadata={"hnsw:space": "cosine"},
     )
-    logger.info("ChromaDB client initialized successfully")
-except Exception as e:
-    logger.error("Failed to initialize ChromaDB client", error=str(e))
-    logger.warning("ChromaDB functionality will be disabled")
+    if shared:
+        _collections[name] = result
+    return result
 
-# Create or get collection without embedding function (we'll handle embeddings manually)
-if chroma_client:
+async def resolve_collection_name() -> str:
+    """Resolve the products alias to a concrete collection name."""
+    if _resolved_alias["name"] and _resolved_alias["expires"] > time.monotonic():
+        return _resolved_alias["name"]
     try:
-        collection: Collection = chroma_client.get_or_create_collection(
-            name="products",
-            metadata={"hnsw:space": "cosine"},
-        )
-        logger.info("ChromaDB collection initialized successfully")
+        name = await get_redis().get(ALIAS_KEY) or PRODUCTS_ALIAS
+    except RedisError as e:
+        logger.warning("Could not resolve ChromaDB alias", error=str(e))
+        return _resolved_alias["name"] or PRODUCTS_ALIAS
+    _resolved_alias.update(name=name, expires=time.monotonic() + ALIAS_CACHE_SECONDS)
+    return name
+
+async def get_collection() -> Optional["Collection"]:
+    """
+    Return the collection the products alias currently points to.
+
+    The first call connects to ChromaDB in a worker thread; afterwards
+    resolved collections are served from memory.
+    """
+    if _chroma_client is None and await asyncio.to_thread(get_chroma_client) is None:
+        return None
+    name = await resolve_collection_name()
+    if name in _collections:
+        return _collections[name]
+    try:
+        return await asyncio.to_thread(_get_or_create_collection, name)
     except Exception as e:
-        logger.error("Failed to create/get ChromaDB collection", error=str(e))
-        collection = None
+        logger.error("Failed to get aliased ChromaDB collection", error=str(e), name=name)
+        # Fall back to the base (unaliased) collection if it was ever opened
+        return _collections.get(PRODUCTS_ALIAS)
+
+def get_named_collection(name: str, client: Optional[Any] = None) -> "Collection":
+    """Return a product collection by its concrete name, creating it if needed."""
+    return _get_or_create_collection(name, client)
+
+async def create_versioned_collection(client: Optional[Any] = None) -> "Collection":
+    """Create a fresh, empty products_v{n} collection for a rebuild."""
+    version = await get_redis().incr(ALIAS_VERSION_KEY)
+    name = f"{PRODUCTS_ALIAS}_v{version}"
+    target = await asyncio.to_thread(_get_or_create_collection, name, client)
+    logger.info("Created versioned ChromaDB collection", name=name)
+    return target
+
+async def set_building_collection(name: Optional[str]) -> None:
+    """Record the collection a rebuild is filling, or clear it with ``None``."""
+    if name:
+        await get_redis().set(BUILDING_KEY, name)
+    else:
+        await get_redis().delete(BUILDING_KEY)
+
+async def get_write_collections() -> List["Collection"]:
+    """
+    Return every collection catalog changes must be written to.
+
+    That is the live collection plus, while a rebuild runs, the one being
+    filled. Both names are read together and bypass the alias cache, so a
+    change is never written only to a collection the alias just left.
+    """
+    if _chroma_client is None and await asyncio.to_thread(get_chroma_client) is None:
+        return []
+    live, building = await get_redis().mget(ALIAS_KEY, BUILDING_KEY)
+    names = [live or PRODUCTS_ALIAS]
+    if building and building != names[0]:
+        names.append(building)
+    return [
+        _collections.get(name) or await asyncio.to_thread(_get_or_create_collection, name)
+        for name in names
+    ]
+
+async def swap_alias(name: str) -> None:
+    """Atomically point the products alias at collection ``name`` and end its rebuild."""
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.getset(ALIAS_KEY, name)
+        pipe.delete(BUILDING_KEY)
+        previous, _ = await pipe.execute()
+    _resolved_alias.update(name=name, expires=time.monotonic() + ALIAS_CACHE_SECONDS)
+    logger.info("Swapped ChromaDB alias", alias=PRODUCTS_ALIAS, previous=previous, current=name)
+
+async def garbage_collect_collections(keep: int = 2, client: Optional[Any] = None) -> List[str]:
+    """
+    Delete old product collections that the alias no longer points to.
+
+    The current collection and the ``keep - 1`` most recent previous versions
+    are retained so in-flight readers and rollbacks still have a target.
+
+    Returns:
+        Names of the deleted collections
+    """
+    client = client or await asyncio.to_thread(get_chroma_client)
+    current = await resolve_collection_name()
+    # A rebuild in progress is never collected
+    building = await get_redis().get(BUILDING_KEY)
+    versions = []
+    for item in await asyncio.to_thread(client.list_collections):
+        # Older Chroma versions return Collection objects, newer ones names
+        name = getattr(item, "name", item)
+        match = _VERSIONED_NAME.match(name)
+        if match:
+            versions.append((int(match.group(1)), name))
+        elif name == PRODUCTS_ALIAS:
+            versions.append((0, name))
+    versions.sort(reverse=True)
+
+    deleted = []
+    retained = [name for _, name in versions if name == current]
+    for _, name in versions:
+        if name in (current, building):
+            continue
+        if len(retained) < keep:
+            retained.append(name)
+            continue
+        try:
+            await asyncio.to_thread(client.delete_collection, name)
+            _collections.pop(name, None)
+            deleted.append(name)
+        except Exception as e:
+            logger.error("Failed to delete old ChromaDB collection", error=str(e), name=name)
+    logger.info("Garbage collected ChromaDB collections", deleted=deleted, retained=retained)
+    return deleted
 
 async def add_product_embedding(
     product_id: str,
@@ -54,6 +228,7 @@ async def add_product_embedding(
     metadata: Optional[Dict[str, Any]] = None,
 ) -> None:
     """Add a product embedding to ChromaDB."""
+    collection = await get_collection()
     if not collection:
         logger.warning("ChromaDB not available, skipping embedding addition")
         return
@@ -66,7 +241,8 @@ async def add_product_embedding(
         raise ValueError("metadata must be a dictionary or None")
 
     try:
-        collection.add(
+        await asyncio.to_thread(
+            collection.add,
             ids=[product_id],
             documents=[text],
             metadatas=[metadata or {}],
@@ -76,12 +252,14 @@ async def add_product_embedding(
         logger.error("Error adding product embedding", error=str(e), product_id=product_id)
         # Don't raise, just log the error
 
+@traced("chroma.search_similar_products")
 async def search_similar_products(
     query: str,
     n_results: int = 1,
     where: Optional[Dict[str, Any]] = None,
 ) -> List[Dict[str, Any]]:
     """Search for similar products using vector similarity."""
+    collection = await get_collection()
     if not collection:
         logger.warning("ChromaDB not available, returning empty results")
         return []
@@ -95,14 +273,16 @@ async def search_similar_products(
 
     try:
         # Generate embedding for the query using our embedding generator
-        from src.embeddings.generator import generate_embedding
-        query_embedding = await generate_embedding(query)
+        from src.embeddings.generator import generate_query_embedding
+        query_embedding = await generate_query_embedding(query)
         
-        results = collection.query(
-            query_embeddings=[query_embedding],
-            n_results=n_results,
-            where=where,
-        )
+        with time_stage("chroma_query"), CHROMA_IN_PROGRESS.track_inprogress():
+            results = await asyncio.to_thread(
+                collection.query,
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where,
+            )
         
         return [
             {
@@ -122,8 +302,46 @@ async def search_similar_products(
         logger.error("Error searching similar products", error=str(e))
         return []
 
+async def update_product_metadata(
+    patches: Dict[str, Dict[str, Any]],
+    target: Optional["Collection"] = None,
+    batch_size: int = 500,
+) -> int:
+    """
+    Patch metadata fields of existing product vectors without re-embedding.
+
+    Only the keys present in each patch are changed; other metadata and the
+    stored embedding are left untouched.
+
+    Args:
+        patches: Mapping of product ID to the metadata fields to set
+        target: Collection to patch (defaults to the aliased live collection)
+        batch_size: Maximum number of products per update call
+
+    Returns:
+        Number of products patched
+    """
+    collection = target or await get_collection()
+    if not collection:
+        logger.warning("ChromaDB not available, skipping metadata update")
+        return 0
+    if not isinstance(patches, dict):
+        raise ValueError("patches must be a dictionary")
+
+    ids = [product_id for product_id, patch in patches.items() if patch]
+    for i in range(0, len(ids), batch_size):
+        chunk = ids[i:i + batch_size]
+        await asyncio.to_thread(
+            collection.update,
+            ids=chunk,
+            metadatas=[patches[product_id] for product_id in chunk],
+        )
+    logger.info("Product metadata updated", count=len(ids))
+    return len(ids)
+
 async def delete_product_embedding(product_id: str) -> None:
     """Delete a product embedding from ChromaDB."""
+    collection = await get_collection()
     if not collection:
         logger.warning("ChromaDB not available, skipping embedding deletion")
         return
@@ -132,7 +350,7 @@ async def delete_product_embedding(product_id: str) -> None:
         raise ValueError("product_id must be a non-empty string")
 
     try:
-        collection.delete(ids=[product_id])
+        await asyncio.to_thread(collection.delete, ids=[product_id])
         logger.info("Product embedding deleted successfully", product_id=product_id)
     except Exception as e:
         logger.error("Error deleting product embedding", error=str(e), product_id=product_id)
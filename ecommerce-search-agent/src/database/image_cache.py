@@ -0,0 +1,99 @@
+import os
+import hashlib
+from dotenv import load_dotenv
+load_dotenv()
+from typing import Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from src.database.redis_client import get_redis
+from src.utils.image_hash import HASH_BITS, hamming_distance
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+IMAGE_CACHE_TTL = int(os.environ.get("IMAGE_CACHE_TTL", str(7 * 86400)))
+# Perceptual hashes are split into bands; two hashes within BANDS - 1 bits of
+# each other always share at least one band exactly (pigeonhole), so a band
+# lookup finds every near-duplicate up to that distance.
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+MAX_DISTANCE = min(int(os.environ.get("IMAGE_HASH_MAX_DISTANCE", "3")), BANDS - 1)
+
+def _scope(prompt: Optional[str]) -> str:
+    """Descriptions depend on the prompt, so each prompt gets its own namespace."""
+    return hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()[:16]
+
+def _bands(phash: int) -> Tuple[str, ...]:
+    mask = (1 << BAND_BITS) - 1
+    return tuple(f"{(phash >> (i * BAND_BITS)) & mask:04x}" for i in range(BANDS))
+
+def _description_key(scope: str, image_key: str) -> str:
+    return f"imgdesc:{scope}:{image_key}"
+
+def _band_key(scope: str, index: int, band: str) -> str:
+    return f"imgdesc:{scope}:band:{index}:{band}"
+
+async def get_cached_description(
+    prompt: Optional[str],
+    phash: Optional[int],
+    content_hash: str,
+) -> Optional[str]:
+    """
+    Look up a stored description for the same or a near-duplicate image.
+
+    Args:
+        prompt: Prompt the description was generated with
+        phash: Perceptual hash of the image, if it could be computed
+        content_hash: Exact content hash of the image bytes
+
+    Returns:
+        The cached description, or None on a miss
+    """
+    scope = _scope(prompt)
+    try:
+        exact_key = f"{phash:016x}" if phash is not None else content_hash
+        description = await get_redis().get(_description_key(scope, exact_key))
+        if description or phash is None:
+            return description
+
+        candidates = await get_redis().sunion(
+            [_band_key(scope, i, band) for i, band in enumerate(_bands(phash))]
+        )
+        best: Optional[Tuple[int, str]] = None
+        for candidate in candidates:
+            distance = hamming_distance(phash, int(candidate, 16))
+            if distance <= MAX_DISTANCE and (best is None or distance < best[0]):
+                best = (distance, candidate)
+        if best is None:
+            return None
+        description = await get_redis().get(_description_key(scope, best[1]))
+        if description:
+            logger.info("Near-duplicate image description cache hit", distance=best[0])
+        return description
+    except RedisError as e:
+        logger.error("Error reading image description cache", error=str(e))
+        return None
+
+async def set_cached_description(
+    prompt: Optional[str],
+    phash: Optional[int],
+    content_hash: str,
+    description: str,
+) -> None:
+    """Store a description under the image's hash and index its bands."""
+    scope = _scope(prompt)
+    try:
+        async with get_redis().pipeline(transaction=False) as pipe:
+            if phash is None:
+                pipe.set(_description_key(scope, content_hash), description, ex=IMAGE_CACHE_TTL)
+            else:
+                hash_hex = f"{phash:016x}"
+                pipe.set(_description_key(scope, hash_hex), description, ex=IMAGE_CACHE_TTL)
+                for i, band in enumerate(_bands(phash)):
+                    key = _band_key(scope, i, band)
+                    pipe.sadd(key, hash_hex)
+                    pipe.expire(key, IMAGE_CACHE_TTL)
+            await pipe.execute()
+    except RedisError as e:
+        logger.error("Error writing image description cache", error=str(e))
@@ -0,0 +1,173 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+
+from src.database.catalog import CATALOG_COLUMNS
+from src.database.postgres import engine, get_db
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# "chroma" (default) or "pgvector"
+VECTOR_BACKEND = os.environ.get("VECTOR_BACKEND", "chroma").lower()
+EMBEDDING_DIMENSIONS = int(os.environ.get("EMBEDDING_DIMENSIONS", "1536"))
+# "hnsw" or "ivfflat"
+PGVECTOR_INDEX_TYPE = os.environ.get("PGVECTOR_INDEX_TYPE", "hnsw").lower()
+# Nearest neighbours fetched from the index before keyword re-scoring
+PGVECTOR_CANDIDATES = int(os.environ.get("PGVECTOR_CANDIDATES", "100"))
+# Index candidates scanned per filtered query (hnsw.ef_search / ivfflat.probes x 10);
+# filters drop rows after the index scan, so selective ones need a wider scan
+PGVECTOR_FILTERED_SCAN = int(os.environ.get("PGVECTOR_FILTERED_SCAN", "400"))
+
+# products.vector stays a FLOAT[] column (the backend schema owns the table);
+# the index and queries use this expression, which pgvector casts immutably.
+VECTOR_EXPRESSION = f"(p.vector::vector({EMBEDDING_DIMENSIONS}))"
+
+def pgvector_enabled() -> bool:
+    """Return True if vector retrieval should use Postgres instead of ChromaDB."""
+    return VECTOR_BACKEND == "pgvector"
+
+def _vector_literal(embedding: List[float]) -> str:
+    """Format an embedding as a pgvector text literal."""
+    return "[" + ",".join(repr(float(value)) for value in embedding) + "]"
+
+async def setup_pgvector() -> None:
+    """Enable pgvector and build the approximate nearest neighbour index on products.vector."""
+    index_expression = f"(vector::vector({EMBEDDING_DIMENSIONS}))"
+    if PGVECTOR_INDEX_TYPE == "ivfflat":
+        index_sql = (
+            "CREATE INDEX IF NOT EXISTS products_vector_ivfflat_idx ON products "
+            f"USING ivfflat ({index_expression} vector_cosine_ops) WITH (lists = 100)"
+        )
+    else:
+        index_sql = (
+            "CREATE INDEX IF NOT EXISTS products_vector_hnsw_idx ON products "
+            f"USING hnsw ({index_expression} vector_cosine_ops)"
+        )
+
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS vector"))
+        await conn.execute(text("ALTER TABLE products ADD COLUMN IF NOT EXISTS vector FLOAT[]"))
+        await conn.execute(text(index_sql))
+    logger.info("pgvector index ready", index_type=PGVECTOR_INDEX_TYPE, dimensions=EMBEDDING_DIMENSIONS)
+
+async def write_embeddings(embeddings: Iterable[Tuple[int, List[float]]]) -> int:
+    """
+    Store product embeddings in products.vector.
+
+    Args:
+        embeddings: (product id, embedding) pairs
+
+    Returns:
+        Number of products updated
+    """
+    rows = [{"id": int(product_id), "vector": embedding} for product_id, embedding in embeddings]
+    if not rows:
+        return 0
+    async with get_db() as db:
+        await db.execute(text("UPDATE products SET vector = :vector WHERE id = :id"), rows)
+    logger.info("Stored embeddings in Postgres", count=len(rows))
+    return len(rows)
+
+def _like(value: Optional[str]) -> Optional[str]:
+    return f"%{value}%" if value else None
+
+async def hybrid_search(
+    query_embedding: List[float],
+    category: Optional[str] = None,
+    terms: Optional[List[str]] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: int = 5,
+) -> List[Dict[str, Any]]:
+    """
+    Run vector similarity, keyword scoring and filters in a single Postgres query.
+
+    The nearest neighbours are taken from the ANN index with the category
+    and price filters applied in the same plan, then re-scored by keyword
+    matches. Scores are vector similarity (0-1) plus keyword score (0-0.5).
+
+    The index scan returns a fixed number of candidates and the filters are
+    applied to them afterwards, so filtered queries widen the scan (see
+    ``PGVECTOR_FILTERED_SCAN``) to still fill ``limit``.
+
+    Args:
+        query_embedding: Embedding of the search query
+        category: Optional category name filter (substring, case-insensitive)
+        terms: Optional feature/brand terms to boost
+        min_price: Optional minimum price filter
+        max_price: Optional maximum price filter
+        limit: Maximum number of products to return
+
+    Returns:
+        Product rows with catalog columns and a ``score`` column
+    """
+    terms = [term for term in (terms or []) if term][:10]
+    params: Dict[str, Any] = {
+        "embedding": _vector_literal(query_embedding),
+        "category": _like(category),
+        "min_price": min_price,
+        "max_price": max_price,
+        "candidates": max(PGVECTOR_CANDIDATES, limit),
+        "limit": limit,
+    }
+    term_matches = []
+    for i, term in enumerate(terms):
+        params[f"term_{i}"] = _like(term)
+        term_matches.append(f"(CASE WHEN p.name ILIKE :term_{i} OR p.description ILIKE :term_{i} THEN 1 ELSE 0 END)")
+    term_score = (
+        f"0.5 * ({' + '.join(term_matches)})::float / {len(term_matches)}" if term_matches else "0.0"
+    )
+
+    filters = ["p.vector IS NOT NULL"]
+    if category:
+        filters.append("c.name ILIKE :category")
+    else:
+        params.pop("category")
+    if min_price is not None:
+        filters.append("p.price >= :min_price")
+    if max_price is not None:
+        filters.append("p.price <= :max_price")
+    if min_price is None:
+        params.pop("min_price")
+    if max_price is None:
+        params.pop("max_price")
+
+    query = text(f"""
+        WITH nearest AS (
+            SELECT p.id, {VECTOR_EXPRESSION} <=> CAST(:embedding AS vector) AS distance
+            FROM products p
+            JOIN categories c ON p."categoryId" = c.id
+            WHERE {' AND '.join(filters)}
+            ORDER BY {VECTOR_EXPRESSION} <=> CAST(:embedding AS vector)
+            LIMIT :candidates
+        )
+        SELECT {CATALOG_COLUMNS},
+               GREATEST(1.0 - n.distance, 0.0) + {term_score} AS score
+        FROM nearest n
+        JOIN products p ON p.id = n.id
+        JOIN categories c ON p."categoryId" = c.id
+        ORDER BY score DESC
+        LIMIT :limit
+    """)
+    async with get_db() as db:
+        if len(filters) > 1:
+            # Local to this transaction, so pooled connections keep the defaults
+            await db.execute(*_filtered_scan_setting(params["candidates"]))
+        result = await db.execute(query, params)
+        return [dict(row) for row in result.mappings().all()]
+
+def _filtered_scan_setting(candidates: int) -> Tuple[Any, Dict[str, str]]:
+    """Statement widening the index scan for the current transaction."""
+    scan = max(PGVECTOR_FILTERED_SCAN, candidates)
+    if PGVECTOR_INDEX_TYPE == "ivfflat":
+        # Index lists probed; each of the 100 lists holds about 1% of the catalog
+        name, value = "ivfflat.probes", min(max(scan // 10, 1), 100)
+    else:
+        # pgvector caps ef_search at 1000
+        name, value = "hnsw.ef_search", min(scan, 1000)
+    statement = text("SELECT set_config(:name, :value, true)")
+    return statement, {"name": name, "value": str(value)}
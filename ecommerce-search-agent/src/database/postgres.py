@@ -4,6 +4,7 @@ load_dotenv()
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
@@ -11,6 +12,7 @@ from sqlalchemy.ext.asyncio import (
 )
 
 from src.utils.logger import get_logger
+from src.utils.tracing import end_span, start_span
 from src.database.models import Base
 
 logger = get_logger(__name__)
@@ -21,15 +23,32 @@ DATABASE_URL = (
     f"postgresql+asyncpg://{os.environ.get('POSTGRES_USER', 'postgres')}:{os.environ.get('POSTGRES_PASSWORD', 'postgres')}@{os.environ.get('POSTGRES_HOST', 'localhost')}:{os.environ.get('POSTGRES_PORT', '5432')}/{os.environ.get('POSTGRES_DB', 'postgres')}"
 )
 
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,
-    pool_size=5,
-    max_overflow=10,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
     pool_timeout=30,
     pool_recycle=1800,
 )
 
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_span(conn, cursor, statement, parameters, context, executemany):
+    context._trace_span = start_span("postgres.query", statement=statement[:200])
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _end_query_span(conn, cursor, statement, parameters, context, executemany):
+    end_span(*context._trace_span)
+
+@event.listens_for(engine.sync_engine, "handle_error")
+def _fail_query_span(exception_context):
+    context = exception_context.execution_context
+    if context is not None and hasattr(context, "_trace_span"):
+        end_span(*context._trace_span, error=exception_context.original_exception)
+
 # Create async session factory
 async_session = async_sessionmaker(
     engine,
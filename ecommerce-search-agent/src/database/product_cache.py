@@ -0,0 +1,192 @@
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from dotenv import load_dotenv
+from redis.exceptions import RedisError
+
+from src.database.catalog import fetch_products_by_ids
+from src.database.redis_client import get_redis
+from src.utils.logger import get_logger
+from src.utils.metrics import record_cache, time_stage
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+# Products kept in each process, least recently used evicted first
+PRODUCT_CACHE_SIZE = int(os.environ.get("PRODUCT_CACHE_SIZE", "5000"))
+# Seconds a process serves its own copy; bounds staleness in processes that missed an invalidation
+PRODUCT_CACHE_LOCAL_TTL = float(os.environ.get("PRODUCT_CACHE_LOCAL_TTL", "30"))
+# Seconds products stay in Redis (0 disables the Redis layer)
+PRODUCT_CACHE_TTL = int(os.environ.get("PRODUCT_CACHE_TTL", "3600"))
+
+ProductLoader = Callable[[List[int]], Awaitable[List[Dict[str, Any]]]]
+
+def product_cache_key(product_id: int) -> str:
+    """Return the Redis key of a cached product."""
+    return f"product:{product_id}"
+
+def _parse_json_field(value: Any, default: Any) -> Any:
+    """Decode a JSON column that the driver returned as text."""
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value) if value else default
+    except ValueError:
+        return default
+
+def normalize_product(row: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a catalog row into the product shape served by the API.
+
+    The result holds only JSON types (prices as floats), so it can be cached
+    in Redis and encoded without conversion.
+    """
+    original_price = row.get("originalPrice")
+    return {
+        "id": int(row["id"]),
+        "name": row["name"],
+        "description": row.get("description"),
+        "price": float(row["price"]),
+        "originalPrice": float(original_price) if original_price is not None else None,
+        "image": row.get("image"),
+        "images": row.get("images", []),
+        "rating": float(row.get("rating") or 0),
+        "reviews": int(row.get("reviews") or 0),
+        "inStock": row.get("inStock", True),
+        "stock": int(row.get("stock") or 0),
+        "features": _parse_json_field(row.get("features", []), []),
+        "specifications": _parse_json_field(row.get("specifications"), {}),
+        "category_name": row.get("category_name"),
+    }
+
+class ProductCache:
+    """
+    Id-keyed product records: a bounded in-process LRU in front of Redis in
+    front of one batched Postgres query.
+
+    Records are authoritative catalog rows, so results built from them are
+    fresh even when the vector index is not.
+    """
+
+    def __init__(
+        self,
+        loader: Optional[ProductLoader] = None,
+        max_size: int = PRODUCT_CACHE_SIZE,
+        local_ttl: float = PRODUCT_CACHE_LOCAL_TTL,
+        redis_ttl: int = PRODUCT_CACHE_TTL,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            loader: Fetches catalog rows by id (defaults to ``fetch_products_by_ids``)
+            max_size: Products kept in this process
+            local_ttl: Seconds an in-process entry is served
+            redis_ttl: Seconds an entry is kept in Redis; 0 skips Redis
+        """
+        self.loader = loader or fetch_products_by_ids
+        self.max_size = max_size
+        self.local_ttl = local_ttl
+        self.redis_ttl = redis_ttl
+        self._local: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+    def _get_local(self, product_id: int, now: float) -> Optional[Dict[str, Any]]:
+        entry = self._local.get(product_id)
+        if entry is None:
+            return None
+        expires, product = entry
+        if expires < now:
+            del self._local[product_id]
+            return None
+        self._local.move_to_end(product_id)
+        return product
+
+    def _put_local(self, product: Dict[str, Any], now: float) -> None:
+        self._local[product["id"]] = (now + self.local_ttl, product)
+        self._local.move_to_end(product["id"])
+        while len(self._local) > self.max_size:
+            self._local.popitem(last=False)
+
+    async def _get_redis(self, ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        try:
+            values = await get_redis().mget([product_cache_key(id_) for id_ in ids])
+        except RedisError as e:
+            logger.warning("Error reading product cache", error=str(e))
+            return {}
+        return {id_: orjson.loads(value) for id_, value in zip(ids, values) if value}
+
+    async def _set_redis(self, products: Iterable[Dict[str, Any]]) -> None:
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for product in products:
+                    pipe.set(product_cache_key(product["id"]), orjson.dumps(product), ex=self.redis_ttl)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning("Error writing product cache", error=str(e))
+
+    async def get_many(self, ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Resolve products by id.
+
+        Args:
+            ids: Product ids; duplicates are fine
+
+        Returns:
+            Copies of the products found, keyed by id. Ids missing from the
+            catalog are left out.
+        """
+        found: Dict[int, Dict[str, Any]] = {}
+        now = time.monotonic()
+        missing: List[int] = []
+        for product_id in dict.fromkeys(int(id_) for id_ in ids):
+            product = self._get_local(product_id, now)
+            if product is None:
+                missing.append(product_id)
+            else:
+                found[product_id] = product
+
+        with time_stage("hydrate"):
+            if missing and self.redis_ttl:
+                from_redis = await self._get_redis(missing)
+                for product in from_redis.values():
+                    self._put_local(product, now)
+                found.update(from_redis)
+                missing = [id_ for id_ in missing if id_ not in from_redis]
+            record_cache("product", True, len(found))
+            record_cache("product", False, len(missing))
+
+            if missing:
+                rows = [normalize_product(row) for row in await self.loader(missing)]
+                for product in rows:
+                    self._put_local(product, now)
+                    found[product["id"]] = product
+                if rows and self.redis_ttl:
+                    await self._set_redis(rows)
+
+        return {product_id: dict(product) for product_id, product in found.items()}
+
+    async def invalidate(self, ids: Iterable[int]) -> None:
+        """Forget products in this process and in Redis."""
+        ids = [int(id_) for id_ in ids]
+        for product_id in ids:
+            self._local.pop(product_id, None)
+        if not ids or not self.redis_ttl:
+            return
+        try:
+            await get_redis().delete(*(product_cache_key(id_) for id_ in ids))
+        except RedisError as e:
+            logger.warning("Error invalidating product cache", error=str(e), products=len(ids))
+
+_product_cache: Optional[ProductCache] = None
+
+def get_product_cache() -> ProductCache:
+    """Return the shared product cache, creating it on first use."""
+    global _product_cache
+    if _product_cache is None:
+        _product_cache = ProductCache()
+    return _product_cache
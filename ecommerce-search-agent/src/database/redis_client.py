@@ -1,12 +1,14 @@
-import json
-from typing import Any, Optional, List
+from typing import Any, Dict, Optional, List, Union
 import os
 from dotenv import load_dotenv
-from redis.asyncio import Redis
+import orjson
+from redis.asyncio import ConnectionPool, Redis
 from redis.asyncio.client import Redis as RedisClient
 from redis.exceptions import RedisError
 
 from src.utils.logger import get_logger
+from src.utils.metrics import record_cache, time_stage
+from src.utils.tracing import span
 
 load_dotenv()
 
@@ -19,17 +21,97 @@ def get_required_env_var(name: str, default: Optional[str] = None) -> str:
         raise ValueError(f"Required environment variable {name} is not set")
     return value
 
-# Initialize Redis client
-try:
-    redis_client: RedisClient = Redis(
-        host=get_required_env_var("REDIS_HOST", "localhost"),
-        port=int(get_required_env_var("REDIS_PORT", "6379")),
-        db=int(get_required_env_var("REDIS_DB", "0")),
-        decode_responses=True,
-    )
-except (ValueError, redis.RedisError) as e:
-    logger.error("Failed to initialize Redis client", error=str(e))
-    raise
+class TracedRedis(Redis):
+    """Redis client that records every command as a tracing span."""
+
+    async def execute_command(self, *args: Any, **options: Any) -> Any:
+        with span(f"redis.{args[0]}".lower()):
+            return await super().execute_command(*args, **options)
+
+class CountingConnectionPool(ConnectionPool):
+    """Connection pool that counts its connections for the pool metrics."""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.created = 0
+        self.in_use = 0
+
+    def reset(self) -> None:
+        super().reset()
+        self.created = 0
+        self.in_use = 0
+
+    def make_connection(self) -> Any:
+        self.created += 1
+        return super().make_connection()
+
+    async def get_connection(self, *args: Any, **kwargs: Any) -> Any:
+        connection = await super().get_connection(*args, **kwargs)
+        self.in_use += 1
+        return connection
+
+    async def release(self, connection: Any) -> None:
+        self.in_use = max(self.in_use - 1, 0)
+        await super().release(connection)
+
+_redis: Optional[RedisClient] = None
+# Returns bytes, for values served as-is (the shared client decodes to str)
+_redis_bytes: Optional[RedisClient] = None
+
+CATALOG_GENERATION_KEY = "catalog:generation"
+
+def get_redis() -> RedisClient:
+    """
+    Return the shared Redis client, creating it on first use.
+
+    The client connects lazily, so creating it never blocks; this only keeps
+    configuration errors and pool setup out of import time.
+    """
+    global _redis
+    if _redis is None:
+        _redis = _create_client(decode_responses=True)
+    return _redis
+
+def get_redis_bytes() -> RedisClient:
+    """Return the shared Redis client that leaves responses as bytes, creating it on first use."""
+    global _redis_bytes
+    if _redis_bytes is None:
+        _redis_bytes = _create_client(decode_responses=False)
+    return _redis_bytes
+
+def _create_client(decode_responses: bool) -> RedisClient:
+    try:
+        return TracedRedis.from_pool(CountingConnectionPool(
+            host=get_required_env_var("REDIS_HOST", "localhost"),
+            port=int(get_required_env_var("REDIS_PORT", "6379")),
+            db=int(get_required_env_var("REDIS_DB", "0")),
+            decode_responses=decode_responses,
+        ))
+    except (ValueError, RedisError) as e:
+        logger.error("Failed to initialize Redis client", error=str(e))
+        raise
+
+async def close_redis() -> None:
+    """Close the shared Redis clients and their connection pools, if created."""
+    global _redis, _redis_bytes
+    clients = [client for client in (_redis, _redis_bytes) if client is not None]
+    _redis = _redis_bytes = None
+    for client in clients:
+        await client.aclose()
+
+def get_pool_stats() -> Optional[Dict[str, int]]:
+    """Return connection counts summed over the shared clients' pools, or None if none was created."""
+    pools = [
+        pool for pool in (getattr(client, "connection_pool", None) for client in (_redis, _redis_bytes))
+        if isinstance(pool, CountingConnectionPool)
+    ]
+    if not pools:
+        return None
+    return {
+        "in_use": sum(pool.in_use for pool in pools),
+        "idle": sum(max(pool.created - pool.in_use, 0) for pool in pools),
+        "max": sum(pool.max_connections for pool in pools),
+    }
 
 async def get_cache(key: str) -> Optional[Any]:
     """Get a value from cache."""
@@ -37,14 +119,17 @@ async def get_cache(key: str) -> Optional[Any]:
         raise ValueError("key must be a non-empty string")
 
     try:
-        value = await redis_client.get(key)
+        with time_stage("cache_get"):
+            value = await get_redis().get(key)
+        # Keys are namespaced "<cache>:...", e.g. "search:..." or "understanding:..."
+        record_cache(key.split(":", 1)[0], bool(value))
         if value:
-            return json.loads(value)
+            return orjson.loads(value)
         return None
     except RedisError as e:
         logger.error("Error getting cache", error=str(e), key=key)
         return None
-    except json.JSONDecodeError as e:
+    except orjson.JSONDecodeError as e:
         logger.error("Error decoding cached value", error=str(e), key=key)
         return None
 
@@ -61,24 +146,133 @@ async def set_cache(
 
     try:
         ttl = ttl or int(get_required_env_var("CACHE_TTL", "300"))
-        await redis_client.set(
-            key,
-            json.dumps(value),
-            ex=ttl,
-        )
+        with time_stage("cache_set"):
+            await get_redis().set(
+                key,
+                orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS),
+                ex=ttl,
+            )
         logger.debug("Cache set successfully", key=key)
     except RedisError as e:
         logger.error("Error setting cache", error=str(e), key=key)
-    except json.JSONDecodeError as e:
+    except orjson.JSONEncodeError as e:
         logger.error("Error encoding value for cache", error=str(e), key=key)
 
+async def get_cache_raw(key: str) -> Optional[bytes]:
+    """
+    Get an already-encoded value from cache, without decoding it.
+
+    Pairs with ``set_cache_raw`` for values that are served as-is, such as
+    encoded API responses.
+    """
+    if not key or not isinstance(key, str):
+        raise ValueError("key must be a non-empty string")
+
+    try:
+        with time_stage("cache_get"):
+            value = await get_redis_bytes().get(key)
+        record_cache(key.split(":", 1)[0], bool(value))
+        return value or None
+    except RedisError as e:
+        logger.error("Error getting cache", error=str(e), key=key)
+        return None
+
+async def set_cache_raw(
+    key: str,
+    value: Union[bytes, str],
+    ttl: Optional[int] = None,
+) -> None:
+    """Set an already-encoded value in cache with optional TTL."""
+    if not key or not isinstance(key, str):
+        raise ValueError("key must be a non-empty string")
+    if ttl is not None and (not isinstance(ttl, int) or ttl < 0):
+        raise ValueError("ttl must be a non-negative integer or None")
+
+    try:
+        ttl = ttl or int(get_required_env_var("CACHE_TTL", "300"))
+        with time_stage("cache_set"):
+            await get_redis_bytes().set(key, value, ex=ttl)
+        logger.debug("Cache set successfully", key=key)
+    except RedisError as e:
+        logger.error("Error setting cache", error=str(e), key=key)
+
+async def get_cache_field(key: str, field: str) -> Optional[Any]:
+    """
+    Get a value stored under ``field`` of the hash at ``key``.
+
+    Grouping related entries in one hash lets them be invalidated together
+    with a single ``delete_cache(key)``.
+    """
+    if not key or not isinstance(key, str):
+        raise ValueError("key must be a non-empty string")
+
+    try:
+        with time_stage("cache_get"):
+            value = await get_redis().hget(key, field)
+        record_cache(key.split(":", 1)[0], bool(value))
+        if value:
+            return orjson.loads(value)
+        return None
+    except RedisError as e:
+        logger.error("Error getting cache", error=str(e), key=key, field=field)
+        return None
+    except orjson.JSONDecodeError as e:
+        logger.error("Error decoding cached value", error=str(e), key=key, field=field)
+        return None
+
+async def set_cache_field(
+    key: str,
+    field: str,
+    value: Any,
+    ttl: Optional[int] = None,
+) -> None:
+    """Set ``field`` of the hash at ``key``; the TTL applies to the whole hash."""
+    if not key or not isinstance(key, str):
+        raise ValueError("key must be a non-empty string")
+    if ttl is not None and (not isinstance(ttl, int) or ttl < 0):
+        raise ValueError("ttl must be a non-negative integer or None")
+
+    try:
+        ttl = ttl or int(get_required_env_var("CACHE_TTL", "300"))
+        with time_stage("cache_set"):
+            async with get_redis().pipeline(transaction=True) as pipe:
+                pipe.hset(key, field, orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS))
+                pipe.expire(key, ttl)
+                await pipe.execute()
+        logger.debug("Cache set successfully", key=key, field=field)
+    except RedisError as e:
+        logger.error("Error setting cache", error=str(e), key=key, field=field)
+    except orjson.JSONEncodeError as e:
+        logger.error("Error encoding value for cache", error=str(e), key=key, field=field)
+
+async def get_catalog_generation() -> int:
+    """
+    Return the current catalog generation.
+
+    Cached results that depend on the whole catalog, such as search
+    responses, include it in their keys, so bumping it retires all of them
+    at once without scanning for keys.
+    """
+    try:
+        return int(await get_redis().get(CATALOG_GENERATION_KEY) or 0)
+    except RedisError as e:
+        logger.error("Error getting catalog generation", error=str(e))
+        return 0
+
+async def bump_catalog_generation() -> None:
+    """Start a new catalog generation; entries of the old one expire with their TTL."""
+    try:
+        await get_redis().incr(CATALOG_GENERATION_KEY)
+    except RedisError as e:
+        logger.error("Error bumping catalog generation", error=str(e))
+
 async def delete_cache(key: str) -> None:
     """Delete a value from cache."""
     if not key or not isinstance(key, str):
         raise ValueError("key must be a non-empty string")
 
     try:
-        await redis_client.delete(key)
+        await get_redis().delete(key)
         logger.debug("Cache deleted successfully", key=key)
     except RedisError as e:
         logger.error("Error deleting cache", error=str(e), key=key)
@@ -89,9 +283,9 @@ async def clear_cache(pattern: str = "*") -> None:
         raise ValueError("pattern must be a string")
 
     try:
-        keys: List[str] = await redis_client.keys(pattern)
+        keys: List[str] = await get_redis().keys(pattern)
         if keys:
-            await redis_client.delete(*keys)
+            await get_redis().delete(*keys)
         logger.info("Cache cleared successfully", pattern=pattern)
     except RedisError as e:
         logger.error("Error clearing cache", error=str(e), pattern=pattern) 
\ No newline at end of file
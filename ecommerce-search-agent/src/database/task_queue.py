@@ -0,0 +1,119 @@
+import json
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from redis.exceptions import RedisError
+
+from src.database.redis_client import get_redis
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+TASK_KEY = "admin:task:{task_id}"
+CHECKPOINT_KEY = "admin:task:{task_id}:checkpoint"
+TASK_INDEX_KEY = "admin:tasks"
+QUEUE_KEY = "admin:tasks:queue"
+# Each worker moves the tasks it claims into its own processing list and
+# keeps a liveness key alive while it runs. The liveness key exists before a
+# claim, so a task is never requeued between being claimed and first heartbeat.
+PROCESSING_KEY = "admin:tasks:processing:{worker_id}"
+WORKER_KEY = "admin:worker:{worker_id}"
+WORKERS_KEY = "admin:workers"
+# Finished tasks and their checkpoints are kept for a week
+TASK_RETENTION_SECONDS = 7 * 86400
+
+def _encode(value: Any) -> Any:
+    """JSON encoder for task fields that are not natively serializable."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+async def save_task(task_id: str, data: Dict[str, Any]) -> None:
+    """Store the serialized state of a task and index it by creation time."""
+    if not task_id or not isinstance(task_id, str):
+        raise ValueError("task_id must be a non-empty string")
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.set(TASK_KEY.format(task_id=task_id), json.dumps(data, default=_encode), ex=TASK_RETENTION_SECONDS)
+        pipe.zadd(TASK_INDEX_KEY, {task_id: time.time()}, nx=True)
+        await pipe.execute()
+
+async def load_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Load the stored state of a task."""
+    value = await get_redis().get(TASK_KEY.format(task_id=task_id))
+    return json.loads(value) if value else None
+
+async def list_tasks(limit: int = 100) -> List[Dict[str, Any]]:
+    """Return the most recent tasks, newest first."""
+    cutoff = time.time() - TASK_RETENTION_SECONDS
+    await get_redis().zremrangebyscore(TASK_INDEX_KEY, 0, cutoff)
+    task_ids = await get_redis().zrevrange(TASK_INDEX_KEY, 0, limit - 1)
+    if not task_ids:
+        return []
+    values = await get_redis().mget([TASK_KEY.format(task_id=task_id) for task_id in task_ids])
+    return [json.loads(value) for value in values if value]
+
+async def enqueue_task(task_id: str) -> None:
+    """Push a task onto the work queue."""
+    await get_redis().lpush(QUEUE_KEY, task_id)
+
+async def heartbeat_worker(worker_id: str, ttl: float) -> None:
+    """
+    Mark a worker alive for ``ttl`` seconds.
+
+    Workers call this before claiming and then more often than ``ttl``; the
+    tasks of a worker whose mark expires are requeued.
+    """
+    async with get_redis().pipeline(transaction=True) as pipe:
+        pipe.sadd(WORKERS_KEY, worker_id)
+        pipe.set(WORKER_KEY.format(worker_id=worker_id), time.time(), ex=max(int(ttl), 1))
+        await pipe.execute()
+
+async def claim_task(worker_id: str, timeout: int = 5) -> Optional[str]:
+    """
+    Block until a task is available and move it to the worker's processing list.
+
+    The task stays there until it is acknowledged, so a worker that dies
+    mid-task leaves it recoverable by requeue_stale_tasks.
+    """
+    return await get_redis().brpoplpush(QUEUE_KEY, PROCESSING_KEY.format(worker_id=worker_id), timeout=timeout)
+
+async def ack_task(worker_id: str, task_id: str) -> None:
+    """Remove a finished task from the worker's processing list."""
+    await get_redis().lrem(PROCESSING_KEY.format(worker_id=worker_id), 0, task_id)
+
+async def requeue_stale_tasks() -> List[str]:
+    """
+    Return the tasks of workers that stopped heartbeating to the work queue.
+
+    Returns:
+        IDs of the requeued tasks
+    """
+    requeued = []
+    try:
+        for worker_id in await get_redis().smembers(WORKERS_KEY):
+            if await get_redis().exists(WORKER_KEY.format(worker_id=worker_id)):
+                continue
+            # Each move is atomic, so concurrent requeuers never duplicate a task
+            processing = PROCESSING_KEY.format(worker_id=worker_id)
+            while (task_id := await get_redis().rpoplpush(processing, QUEUE_KEY)) is not None:
+                requeued.append(task_id)
+            await get_redis().srem(WORKERS_KEY, worker_id)
+    except RedisError as e:
+        logger.error("Error requeueing stale tasks", error=str(e))
+    if requeued:
+        logger.warning("Requeued stale admin tasks", task_ids=requeued)
+    return requeued
+
+async def save_checkpoint(task_id: str, checkpoint: Dict[str, Any]) -> None:
+    """Store the resumable checkpoint of a task."""
+    await get_redis().set(
+        CHECKPOINT_KEY.format(task_id=task_id),
+        json.dumps(checkpoint),
+        ex=TASK_RETENTION_SECONDS,
+    )
+
+async def load_checkpoint(task_id: str) -> Optional[Dict[str, Any]]:
+    """Load the checkpoint of a task, if it has one."""
+    value = await get_redis().get(CHECKPOINT_KEY.format(task_id=task_id))
+    return json.loads(value) if value else None
@@ -0,0 +1,373 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set
+
+import asyncpg
+from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
+from sqlalchemy import text
+
+from src.database.catalog import (
+    fetch_ids_updated_since,
+    fetch_product_ids_in_categories,
+    fetch_products_by_ids,
+)
+from src.database.chromadb_client import get_write_collections
+from src.database.pgvector_store import pgvector_enabled
+from src.database.postgres import DATABASE_URL, engine
+from src.database.product_cache import get_product_cache
+from src.database.redis_client import bump_catalog_generation, get_redis
+from src.embeddings.indexer import IndexerConfig, index_products, patch_products_metadata
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CHANGE_CHANNEL = "catalog_changes"
+# Database time (UTC, ISO format) up to which all catalog changes are applied
+SYNCED_AT_KEY = "catalog:changes:synced_at"
+
+# Updates that only touch the vector column or the timestamp are not catalog
+# changes; skipping them keeps embedding write-back from re-notifying. Product
+# updates that only touch non-embedded fields are sent as a PATCH carrying the
+# new values, so they can be applied without reading the row or re-embedding.
+TRIGGER_SQL = [
+    f"""
+    CREATE OR REPLACE FUNCTION search_agent_notify_catalog_change() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE'
+           AND (to_jsonb(NEW) - 'vector' - 'updatedAt') = (to_jsonb(OLD) - 'vector' - 'updatedAt') THEN
+            RETURN NULL;
+        END IF;
+        IF TG_OP = 'UPDATE' AND TG_TABLE_NAME = 'products' THEN
+            IF (to_jsonb(NEW) - 'vector' - 'updatedAt' - 'price' - 'rating' - 'reviews' - 'inStock' - 'stock')
+               = (to_jsonb(OLD) - 'vector' - 'updatedAt' - 'price' - 'rating' - 'reviews' - 'inStock' - 'stock') THEN
+                PERFORM pg_notify(
+                    '{CHANGE_CHANNEL}',
+                    json_build_object(
+                        'table', TG_TABLE_NAME,
+                        'op', 'PATCH',
+                        'id', NEW.id,
+                        'patch', json_build_object(
+                            'price', NEW.price,
+                            'rating', NEW.rating,
+                            'reviews', NEW.reviews,
+                            'inStock', NEW."inStock",
+                            'stock', NEW.stock
+                        )
+                    )::text
+                );
+                RETURN NULL;
+            END IF;
+        END IF;
+        PERFORM pg_notify(
+            '{CHANGE_CHANNEL}',
+            json_build_object(
+                'table', TG_TABLE_NAME,
+                'op', TG_OP,
+                'id', CASE WHEN TG_OP = 'DELETE' THEN OLD.id ELSE NEW.id END
+            )::text
+        );
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "DROP TRIGGER IF EXISTS search_agent_products_change ON products",
+    """
+    CREATE TRIGGER search_agent_products_change
+    AFTER INSERT OR UPDATE OR DELETE ON products
+    FOR EACH ROW EXECUTE FUNCTION search_agent_notify_catalog_change()
+    """,
+    "DROP TRIGGER IF EXISTS search_agent_categories_change ON categories",
+    """
+    CREATE TRIGGER search_agent_categories_change
+    AFTER UPDATE OR DELETE ON categories
+    FOR EACH ROW EXECUTE FUNCTION search_agent_notify_catalog_change()
+    """,
+]
+
+async def install_change_triggers() -> None:
+    """Install the triggers that emit catalog change notifications."""
+    async with engine.begin() as conn:
+        for statement in TRIGGER_SQL:
+            await conn.execute(text(statement))
+    logger.info("Installed catalog change triggers", channel=CHANGE_CHANNEL)
+
+class ChangeCaptureConfig(BaseModel):
+    """Configuration for the catalog change listener."""
+    debounce_seconds: float = Field(
+        default=float(os.environ.get("CATALOG_CHANGE_DEBOUNCE_MS", "500")) / 1000,
+        ge=0.0,
+        le=60.0,
+    )
+    max_batch: int = Field(default=int(os.environ.get("CATALOG_CHANGE_MAX_BATCH", "500")), ge=1, le=10000)
+    reconnect_seconds: float = Field(default=5.0, ge=0.5, le=300.0)
+    # Delay before retrying a batch that failed to apply
+    retry_seconds: float = Field(default=5.0, ge=0.1, le=300.0)
+    # On (re)connect, rows updated this long before the sync point are re-read
+    # too, covering transactions that were still open at the time
+    catch_up_margin_seconds: float = Field(default=60.0, ge=0.0, le=3600.0)
+
+class ChangeBatch(BaseModel):
+    """Coalesced set of catalog changes."""
+    product_ids: Set[int] = Field(default_factory=set)
+    deleted_product_ids: Set[int] = Field(default_factory=set)
+    category_ids: Set[str] = Field(default_factory=set)
+    # Latest non-embedded field values for products with metadata-only changes
+    patches: Dict[int, Dict[str, Any]] = Field(default_factory=dict)
+
+    def add(self, change: Dict[str, Any]) -> None:
+        """Merge a single notification payload into the batch."""
+        if change.get("table") == "categories":
+            self.category_ids.add(str(change["id"]))
+            return
+        product_id = int(change["id"])
+        if change.get("op") == "PATCH":
+            self.patches[product_id] = {**change.get("patch", {}), "id": product_id}
+        elif change.get("op") == "DELETE":
+            self.deleted_product_ids.add(product_id)
+            self.product_ids.discard(product_id)
+            self.patches.pop(product_id, None)
+        else:
+            self.product_ids.add(product_id)
+            self.deleted_product_ids.discard(product_id)
+            self.patches.pop(product_id, None)
+
+    def __len__(self) -> int:
+        return (
+            len(self.product_ids)
+            + len(self.deleted_product_ids)
+            + len(self.category_ids)
+            + len(self.patches)
+        )
+
+def _listener_dsn() -> str:
+    """Convert the SQLAlchemy database URL into a plain asyncpg DSN."""
+    return DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://", 1)
+
+async def _database_now(connection: Any) -> datetime:
+    """Return the database clock as naive UTC, matching the ``updatedAt`` columns."""
+    return await connection.fetchval("SELECT now() AT TIME ZONE 'UTC'")
+
+class CatalogChangeListener:
+    """
+    Keep the vector index fresh from Postgres change notifications.
+
+    Notifications are coalesced over a short debounce window, then
+    price/stock-only changes are patched straight into vector metadata,
+    other changed products are re-indexed in one batch (unchanged embedding
+    text only gets a metadata patch), deleted products are removed, and cached
+    product records and recommendations for the affected products are
+    invalidated.
+
+    A batch that fails to apply is retried, merged with the changes that
+    arrived since. Notifications sent while the listener was disconnected or
+    not running are lost, so on every (re)connect it re-reads the products
+    and categories whose ``updatedAt`` is newer than its sync point: the
+    database time up to which every change is applied, kept in Redis so it
+    survives restarts. Deletions made while disconnected leave no row behind
+    and are only removed by the next full rebuild.
+    """
+
+    def __init__(self, config: Optional[ChangeCaptureConfig] = None):
+        """
+        Initialize the listener.
+
+        Args:
+            config: Optional listener configuration
+        """
+        self.config = config or ChangeCaptureConfig()
+        self._changes: asyncio.Queue = asyncio.Queue()
+        self._stopping = asyncio.Event()
+        # Changes of a batch that failed to apply, retried with the next one
+        self._pending = ChangeBatch()
+        # Database time (UTC) up to which every change is applied; loaded
+        # from Redis on the first connect
+        self._synced_at: Optional[datetime] = None
+        self._synced_at_loaded = False
+
+    def stop(self) -> None:
+        """Ask the listener to stop after the current batch."""
+        self._stopping.set()
+
+    def _on_notification(self, connection: Any, pid: int, channel: str, payload: str) -> None:
+        try:
+            self._changes.put_nowait(json.loads(payload))
+        except json.JSONDecodeError as e:
+            logger.error("Invalid catalog change payload", error=str(e), payload=payload)
+
+    async def run_forever(self) -> None:
+        """Listen for changes and apply them until stopped, reconnecting on failure."""
+        while not self._stopping.is_set():
+            connection = None
+            try:
+                connection = await asyncpg.connect(_listener_dsn())
+                await connection.add_listener(CHANGE_CHANNEL, self._on_notification)
+                logger.info("Listening for catalog changes", channel=CHANGE_CHANNEL)
+                listening_since = await _database_now(connection)
+                if not self._synced_at_loaded:
+                    self._synced_at = await self._load_synced_at()
+                    self._synced_at_loaded = True
+                if self._synced_at is None:
+                    # First run: the full index build covers everything before now
+                    await self._save_synced_at(listening_since)
+                else:
+                    try:
+                        await self._catch_up(self._synced_at)
+                    except Exception as e:
+                        # Keep the old sync point and try again on a new connection
+                        logger.error("Failed to catch up on catalog changes", error=str(e))
+                        await asyncio.sleep(self.config.reconnect_seconds)
+                        continue
+                    if self._changes.empty() and not self._pending:
+                        await self._save_synced_at(listening_since)
+                while not self._stopping.is_set() and not connection.is_closed():
+                    batch = await self._collect_batch()
+                    if not batch:
+                        continue
+                    # Everything committed before this point was notified; with
+                    # the queue drained it is all in this batch
+                    drained = self._changes.empty()
+                    synced_at = await _database_now(connection)
+                    try:
+                        await self.apply(batch)
+                    except Exception as e:
+                        logger.error("Failed to apply catalog changes, will retry", error=str(e), changes=len(batch))
+                        self._pending = batch
+                        await asyncio.sleep(self.config.retry_seconds)
+                        continue
+                    if drained:
+                        await self._save_synced_at(synced_at)
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError, RedisError) as e:
+                logger.error("Catalog change listener connection failed", error=str(e))
+                await asyncio.sleep(self.config.reconnect_seconds)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+    async def _load_synced_at(self) -> Optional[datetime]:
+        """
+        Read the persisted sync point, or None if there is none.
+
+        Redis errors propagate: starting without the sync point would skip
+        the catch-up, so the listener retries as for a failed connection.
+        """
+        value = await get_redis().get(SYNCED_AT_KEY)
+        try:
+            return datetime.fromisoformat(value) if value else None
+        except ValueError as e:
+            logger.error("Invalid catalog change sync point", error=str(e), value=value)
+            return None
+
+    async def _save_synced_at(self, synced_at: datetime) -> None:
+        """
+        Record that every change committed before ``synced_at`` is applied.
+
+        If Redis is unavailable the sync point still advances in memory, so
+        reconnects catch up correctly; only a restart would miss changes.
+        """
+        self._synced_at = synced_at
+        try:
+            await get_redis().set(SYNCED_AT_KEY, synced_at.isoformat())
+        except RedisError as e:
+            logger.error("Failed to persist catalog change sync point", error=str(e))
+
+    async def _catch_up(self, synced_at: datetime) -> None:
+        """Queue the products and categories updated since the sync point."""
+        since = synced_at - timedelta(seconds=self.config.catch_up_margin_seconds)
+        product_ids, category_ids = await fetch_ids_updated_since(since)
+        # Re-reading the current rows is correct whatever the missed change was
+        for product_id in product_ids:
+            self._changes.put_nowait({"table": "products", "op": "UPDATE", "id": product_id})
+        for category_id in category_ids:
+            self._changes.put_nowait({"table": "categories", "op": "UPDATE", "id": category_id})
+        logger.info(
+            "Caught up on catalog changes missed while not listening",
+            since=since.isoformat(),
+            products=len(product_ids),
+            categories=len(category_ids),
+        )
+
+    async def _collect_batch(self) -> ChangeBatch:
+        """
+        Wait for the first change, then coalesce changes for the debounce window.
+
+        A pending failed batch is the starting point, so newer changes to the
+        same products override it.
+        """
+        batch, self._pending = self._pending, ChangeBatch()
+        if not batch:
+            try:
+                batch.add(await asyncio.wait_for(self._changes.get(), timeout=1.0))
+            except asyncio.TimeoutError:
+                return batch
+        deadline = asyncio.get_running_loop().time() + self.config.debounce_seconds
+        while len(batch) < self.config.max_batch:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                batch.add(await asyncio.wait_for(self._changes.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def apply(self, batch: ChangeBatch) -> None:
+        """
+        Apply a coalesced batch of changes to the vector index and caches.
+
+        Args:
+            batch: The changes to apply
+        """
+        product_ids = set(batch.product_ids)
+        product_ids.update(await fetch_product_ids_in_categories(sorted(batch.category_ids)))
+
+        rows = await fetch_products_by_ids(sorted(product_ids))
+        # Products that no longer join to a category are gone from the catalog
+        deleted = set(batch.deleted_product_ids) | (product_ids - {row["id"] for row in rows})
+        # Full re-indexing already refreshes all metadata of these products
+        patches = [
+            patch for product_id, patch in batch.patches.items()
+            if product_id not in product_ids and product_id not in deleted
+        ]
+
+        # During a rebuild this is the live collection and the one being filled.
+        # With the pgvector backend ChromaDB is optional and products.vector is
+        # written once, with the first collection.
+        collections = await get_write_collections() or [None]
+        for i, collection in enumerate(collections):
+            if collection is not None and patches:
+                await patch_products_metadata(patches, collection)
+            if rows:
+                config = IndexerConfig(write_pgvector=pgvector_enabled() and i == 0)
+                stats = await index_products(rows, config, target=collection)
+                if stats.failed:
+                    raise RuntimeError(f"{stats.failed} products failed to index")
+            if collection is not None and deleted:
+                await asyncio.to_thread(collection.delete, ids=[str(id_) for id_ in deleted])
+        await self._invalidate_caches(product_ids | deleted | set(batch.patches))
+
+        logger.info(
+            "Applied catalog changes",
+            patched=len(patches),
+            upserted=len(rows),
+            deleted=len(deleted),
+            categories=len(batch.category_ids),
+        )
+
+    async def _invalidate_caches(self, product_ids: Set[int]) -> None:
+        """
+        Drop cached data affected by the changed products.
+
+        Product records and recommendation rankings are deleted by key; search
+        results can involve any product, so they are retired together by
+        bumping the catalog generation.
+        """
+        if not product_ids:
+            return
+        await get_product_cache().invalidate(product_ids)
+        await get_redis().delete(*(f"recommend:{id_}" for id_ in product_ids))
+        await bump_catalog_generation()
@@ -1,22 +1,100 @@
 import os
+import asyncio
+import hashlib
 from dotenv import load_dotenv
 load_dotenv()
-from typing import List
+from typing import Dict, List
 import openai
+from src.embeddings.store import get_embedding_store
 from src.utils.logger import get_logger
+from src.utils.metrics import record_openai_call, time_stage
+from src.utils.tracing import current_span
 
 logger = get_logger(__name__)
 
-async def generate_embedding(text: str, model: str = "text-embedding-ada-002") -> List[float]:
+DEFAULT_EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "text-embedding-ada-002")
+
+def embedding_input_hash(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> str:
+    """Return a stable hash identifying the embedding of ``text`` under ``model``."""
+    return hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).hexdigest()
+
+async def _request_embeddings(texts: List[str], model: str) -> List[List[float]]:
+    """Call the OpenAI embeddings API for a batch of texts."""
+    response = await openai.AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"]).embeddings.create(
+        input=texts,
+        model=model,
+    )
+    record_openai_call("embedding", response.model, prompt_tokens=response.usage.prompt_tokens)
+    # The API may return items out of order; restore input order by index
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+async def generate_embedding(
+    text: str,
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    use_store: bool = True,
+) -> List[float]:
     """Generate an embedding for the given text using OpenAI API."""
-    try:
-        response = await openai.AsyncOpenAI(api_key=os.environ["OPENAI_API_KEY"]).embeddings.create(
-            input=text,
-            model=model,
+    embedding = (await generate_embeddings([text], model, use_store=use_store))[0]
+    logger.debug("Generated embedding", length=len(embedding))
+    return embedding
+
+async def generate_query_embedding(text: str, model: str = DEFAULT_EMBEDDING_MODEL) -> List[float]:
+    """
+    Generate the embedding of a search query.
+
+    Queries bypass the local embedding store: it is meant for product texts,
+    and storing every distinct query would put a SQLite write on the search
+    path and grow the file without bound.
+    """
+    return await generate_embedding(text, model, use_store=False)
+
+async def generate_embeddings(
+    texts: List[str],
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    use_store: bool = True,
+) -> List[List[float]]:
+    """
+    Generate embeddings for a batch of texts with a single OpenAI API call.
+
+    Reads through the local embedding store first; only texts it does not
+    have are sent to the API, and their vectors are written back. Pass
+    ``use_store=False`` to skip the store entirely.
+    """
+    if not texts:
+        return []
+    with time_stage("embedding"):
+        keys = [embedding_input_hash(text, model) for text in texts]
+        store = get_embedding_store() if use_store else None
+        found: Dict[str, List[float]] = {}
+        if store:
+            try:
+                found = await asyncio.to_thread(store.get_many, keys)
+            except Exception as e:
+                logger.warning("Error reading embedding store", error=str(e))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        current_span().set_attribute("from_api", len(missing))
+        if missing:
+            try:
+                fresh = await _request_embeddings(list(missing.values()), model)
+            except Exception as e:
+                logger.error("Error generating embeddings", error=str(e), count=len(missing))
+                raise
+            fresh_by_key = dict(zip(missing.keys(), fresh))
+            found.update(fresh_by_key)
+            if store:
+                try:
+                    await asyncio.to_thread(
+                        store.put_many,
+                        [(key, model, vector) for key, vector in fresh_by_key.items()],
+                    )
+                except Exception as e:
+                    logger.warning("Error writing embedding store", error=str(e))
+
+        logger.info(
+            "Generated embeddings",
+            count=len(texts),
+            from_store=len(texts) - len(missing),
+            from_api=len(missing),
         )
-        embedding = response.data[0].embedding
-        logger.info("Generated embedding", length=len(embedding))
-        return embedding
-    except Exception as e:
-        logger.error("Error generating embedding", error=str(e))
-        raise 
\ No newline at end of file
+        return [found[key] for key in keys]
@@ -1,41 +1,483 @@
-from typing import List, Dict, Any
-from src.embeddings.generator import generate_embedding
-from src.database.chromadb_client import collection
+import asyncio
+import os
+import time
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+from pydantic import BaseModel, Field
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
+from src.embeddings.generator import (
+    DEFAULT_EMBEDDING_MODEL,
+    embedding_input_hash,
+    generate_embedding,
+    generate_embeddings,
+)
+from src.database.chromadb_client import get_collection, update_product_metadata
+from src.database.pgvector_store import pgvector_enabled, write_embeddings
 from src.utils.logger import get_logger
 
+if TYPE_CHECKING:
+    from chromadb.api.models.Collection import Collection
+
 logger = get_logger(__name__)
 
-async def index_product(product: Dict[str, Any]) -> None:
-    """Generate and store embedding for a single product."""
-    text = f"{product['name']} {product.get('description', '')}"
-    embedding = await generate_embedding(text)
-    metadata = {
+def build_embedding_text(product: Dict[str, Any]) -> str:
+    """Build the text that is embedded for a product."""
+    return f"{product['name']} {product.get('description') or ''}"
+
+def build_product_metadata(
+    product: Dict[str, Any],
+    embedding_hash: str,
+    model: str = DEFAULT_EMBEDDING_MODEL,
+) -> Dict[str, Any]:
+    """
+    Build the ChromaDB metadata stored alongside a product vector.
+
+    Only the id and the fields vector queries filter on are stored; results
+    are resolved to full records from the catalog (see ``ProductCache``).
+    """
+    return {
         "backend_id": product["id"],  # Store the backend integer ID
-        "name": product["name"],
-        "description": product.get("description", ""),
-        "price": product.get("price", 0.0),
-        "image": product.get("image", ""),
-        "rating": product.get("rating", 0),
-        "reviews": product.get("reviews", 0),
-        "in_stock": product.get("inStock", True),
-        "stock": product.get("stock", 0),
-        "features": str(product.get("features", [])),  # Convert list to string
-        "specifications": str(product.get("specifications", {})),  # Convert JSON to string
-        "category": product.get("category_name", ""),
+        "category": product.get("category_name") or "",
+        "price": float(product.get("price") or 0.0),
+        "rating": float(product.get("rating") or 0.0),
+        "in_stock": bool(product.get("inStock", True)),
+        "embedding_hash": embedding_hash,
+        "embedding_model": model,
+    }
+
+# Product fields stored in vector metadata but not embedded, mapped to their
+# metadata keys. Changing only these never needs a new embedding.
+METADATA_PATCH_FIELDS = {
+    "price": "price",
+    "rating": "rating",
+    "inStock": "in_stock",
+}
+# Types of the patched metadata values, as written by build_product_metadata
+METADATA_PATCH_TYPES = {
+    "price": float,
+    "rating": float,
+    "in_stock": bool,
+}
+
+def build_metadata_patch(product: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a metadata patch from the non-embedded fields present in ``product``."""
+    return {
+        metadata_key: METADATA_PATCH_TYPES[metadata_key](product[field])
+        for field, metadata_key in METADATA_PATCH_FIELDS.items()
+        if field in product and product[field] is not None
     }
+
+async def patch_products_metadata(
+    products: Iterable[Dict[str, Any]],
+    target: Optional["Collection"] = None,
+) -> int:
+    """
+    Apply price/stock/rating changes to indexed products without embedding calls.
+
+    Args:
+        products: Dicts with an ``id`` and any of the METADATA_PATCH_FIELDS
+        target: Collection to patch (defaults to the aliased live collection)
+
+    Returns:
+        Number of products patched
+    """
+    patches = {str(product["id"]): build_metadata_patch(product) for product in products}
+    return await update_product_metadata(patches, target)
+
+async def _stored_embedding(
+    collection: "Collection",
+    product_id: str,
+    with_embedding: bool = False,
+) -> Tuple[Optional[str], Optional[List[float]]]:
+    """Return the embedding hash stored for a product and, if asked for, its vector."""
+    include = ["metadatas", "embeddings"] if with_embedding else ["metadatas"]
     try:
-        collection.add(
-            ids=[str(product["id"])],  # Use string ID for ChromaDB
-            embeddings=[embedding],
-            metadatas=[metadata],
-            documents=[text],
-        )
-        logger.info("Indexed product in ChromaDB", product_id=product["id"])
+        existing = await asyncio.to_thread(collection.get, ids=[product_id], include=include)
+    except Exception as e:
+        logger.warning("Could not read stored embedding hash", error=str(e), product_id=product_id)
+        return None, None
+    if not existing["ids"]:
+        return None, None
+    metadata = existing["metadatas"][0] or {}
+    embedding = _as_vector(existing["embeddings"][0]) if with_embedding else None
+    return metadata.get("embedding_hash"), embedding
+
+def _as_vector(embedding: Any) -> Optional[List[float]]:
+    """Convert an embedding returned by ChromaDB (list or numpy array) to floats."""
+    return [float(value) for value in embedding] if embedding is not None else None
+
+async def index_product(
+    product: Dict[str, Any],
+    model: str = DEFAULT_EMBEDDING_MODEL,
+    target: Optional["Collection"] = None,
+) -> bool:
+    """
+    Generate and store embedding for a single product.
+
+    Products whose embedding text and model are unchanged since they were
+    last indexed keep their vector and only get a metadata refresh. With the
+    pgvector backend the vector is written to products.vector as well, and
+    ChromaDB is optional.
+
+    Args:
+        product: Product dict as returned by the catalog query
+        model: Embedding model name
+        target: Collection to write to (defaults to the aliased live collection)
+
+    Returns:
+        bool: True if a new embedding was generated
+    """
+    write_pgvector = pgvector_enabled()
+    collection = target or await get_collection()
+    if not collection and not write_pgvector:
+        raise RuntimeError("ChromaDB not available")
+    product_id = str(product["id"])  # Use string ID for ChromaDB
+    text = build_embedding_text(product)
+    embedding_hash = embedding_input_hash(text, model)
+    metadata = build_product_metadata(product, embedding_hash, model)
+    try:
+        if collection:
+            stored_hash, embedding = await _stored_embedding(collection, product_id, with_embedding=write_pgvector)
+            if stored_hash == embedding_hash and (embedding is not None or not write_pgvector):
+                await asyncio.to_thread(collection.update, ids=[product_id], metadatas=[metadata])
+                if write_pgvector:
+                    await write_embeddings([(product["id"], embedding)])
+                logger.info("Refreshed product metadata, embedding unchanged", product_id=product["id"])
+                return False
+
+        embedding = await generate_embedding(text, model)
+        if collection:
+            await asyncio.to_thread(
+                collection.upsert,
+                ids=[product_id],
+                embeddings=[embedding],
+                metadatas=[metadata],
+                documents=[text],
+            )
+        if write_pgvector:
+            await write_embeddings([(product["id"], embedding)])
+        logger.info("Indexed product", product_id=product["id"])
+        return True
     except Exception as e:
         logger.error("Error indexing product", error=str(e), product_id=product["id"])
         raise
 
-async def index_products(products: List[Dict[str, Any]]) -> None:
-    """Index a list of products in ChromaDB."""
-    for product in products:
-        await index_product(product) 
\ No newline at end of file
+class IndexerConfig(BaseModel):
+    """Configuration for the batched indexing pipeline."""
+    batch_size: int = Field(default=int(os.environ.get("INDEX_BATCH_SIZE", "64")), ge=1, le=2048)
+    max_concurrency: int = Field(default=int(os.environ.get("INDEX_CONCURRENCY", "4")), ge=1, le=32)
+    queue_size: int = Field(default=8, ge=1, le=256)  # Batches buffered between stages
+    max_attempts: int = Field(default=3, ge=1, le=10)
+    model: str = Field(default=DEFAULT_EMBEDDING_MODEL)
+    write_pgvector: bool = Field(default_factory=pgvector_enabled)  # Also store vectors in products.vector
+
+class IndexingStats(BaseModel):
+    """Running counters for an indexing run."""
+    processed: int = 0
+    embedded: int = 0
+    refreshed: int = 0  # Metadata patched, embedding reused
+    unchanged: int = 0  # Nothing to write
+    failed: int = 0
+    failed_ids: List[str] = Field(default_factory=list)
+    # Id of the last source product such that it and every product before it
+    # have been indexed, and how many products that covers. It stops before
+    # the first batch that failed, so resuming after it retries that batch.
+    watermark: Optional[Any] = None
+    watermark_count: int = 0
+    started_at: float = Field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started."""
+        return time.monotonic() - self.started_at
+
+    @property
+    def items_per_sec(self) -> float:
+        """Average throughput of the run so far."""
+        elapsed = self.elapsed
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+class _PreparedBatch(BaseModel):
+    """A batch ready to be written to ChromaDB and, with pgvector, products.vector."""
+    seq: int
+    ids: List[str]
+    documents: List[str]
+    metadatas: List[Dict[str, Any]]
+    embeddings: List[List[float]]
+    patch_ids: List[str]
+    patch_metadatas: List[Dict[str, Any]]
+    unchanged: int = 0
+    # Stored vectors of refreshed and unchanged products, for products.vector
+    reused_vectors: List[Tuple[int, List[float]]] = Field(default_factory=list)
+
+ProductSource = Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+ProgressCallback = Callable[[IndexingStats], Awaitable[None]]
+
+async def _batched(products: ProductSource, size: int) -> AsyncIterable[List[Dict[str, Any]]]:
+    """Group a sync or async product source into lists of ``size``."""
+    batch: List[Dict[str, Any]] = []
+    if isinstance(products, AsyncIterable):
+        async for product in products:
+            batch.append(product)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    else:
+        for product in products:
+            batch.append(product)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+async def _with_retries(config: IndexerConfig, func: Callable[[], Awaitable[Any]]) -> Any:
+    """Run ``func`` with exponential backoff between failed attempts."""
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(config.max_attempts),
+        wait=wait_exponential(multiplier=0.5, max=10),
+        reraise=True,
+    ):
+        with attempt:
+            return await func()
+
+async def _stored_metadatas(
+    collection: Optional["Collection"],
+    ids: List[str],
+    with_embeddings: bool = False,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, List[float]]]:
+    """Return the metadata and, if asked for, the vectors stored for a batch of product ids."""
+    if collection is None:
+        return {}, {}
+    include = ["metadatas", "embeddings"] if with_embeddings else ["metadatas"]
+    try:
+        existing = await asyncio.to_thread(collection.get, ids=ids, include=include)
+    except Exception as e:
+        logger.warning("Could not read stored metadata", error=str(e), count=len(ids))
+        return {}, {}
+    metadatas = {
+        id_: metadata or {}
+        for id_, metadata in zip(existing["ids"], existing["metadatas"], strict=True)
+    }
+    embeddings = (
+        {
+            id_: _as_vector(embedding)
+            for id_, embedding in zip(existing["ids"], existing["embeddings"], strict=True)
+        }
+        if with_embeddings else {}
+    )
+    return metadatas, embeddings
+
+async def _prepare_batch(
+    collection: Optional["Collection"],
+    seq: int,
+    batch: List[Dict[str, Any]],
+    config: IndexerConfig,
+) -> _PreparedBatch:
+    """
+    Sort a batch into products that need a new embedding, products whose
+    embedding text is unchanged but whose other metadata changed (patched
+    without an embedding call), and products with nothing to write. Without
+    a ChromaDB collection every product is embedded; the local embedding
+    store keeps that from calling the API for unchanged text.
+    """
+    ids = [str(product["id"]) for product in batch]
+    texts = [build_embedding_text(product) for product in batch]
+    hashes = [embedding_input_hash(text, config.model) for text in texts]
+    stored, stored_vectors = await _stored_metadatas(collection, ids, with_embeddings=config.write_pgvector)
+
+    prepared = _PreparedBatch(
+        seq=seq,
+        ids=[], documents=[], metadatas=[], embeddings=[],
+        patch_ids=[], patch_metadatas=[],
+    )
+    for product, id_, text, embedding_hash in zip(batch, ids, texts, hashes, strict=True):
+        metadata = build_product_metadata(product, embedding_hash, config.model)
+        previous = stored.get(id_)
+        reusable = previous is not None and previous.get("embedding_hash") == embedding_hash
+        if reusable and config.write_pgvector:
+            # products.vector is written for every product, so the stored vector is needed too
+            reusable = stored_vectors.get(id_) is not None
+            if reusable:
+                prepared.reused_vectors.append((product["id"], stored_vectors[id_]))
+        if reusable:
+            patch = {key: value for key, value in metadata.items() if previous.get(key) != value}
+            if patch:
+                prepared.patch_ids.append(id_)
+                prepared.patch_metadatas.append(patch)
+            else:
+                prepared.unchanged += 1
+        else:
+            prepared.ids.append(id_)
+            prepared.documents.append(text)
+            prepared.metadatas.append(metadata)
+
+    if prepared.ids:
+        prepared.embeddings = await _with_retries(
+            config, lambda: generate_embeddings(prepared.documents, config.model)
+        )
+    return prepared
+
+async def _write_batch(
+    collection: Optional["Collection"],
+    prepared: _PreparedBatch,
+    config: IndexerConfig,
+) -> None:
+    """Write a prepared batch to ChromaDB and, with pgvector, to products.vector."""
+    if collection is not None and prepared.ids:
+        await _with_retries(config, lambda: asyncio.to_thread(
+            collection.upsert,
+            ids=prepared.ids,
+            embeddings=prepared.embeddings,
+            metadatas=prepared.metadatas,
+            documents=prepared.documents,
+        ))
+    if config.write_pgvector:
+        # Refreshed and unchanged products too, so products.vector is complete
+        new_ids = [int(id_) for id_ in prepared.ids]
+        vectors = list(zip(new_ids, prepared.embeddings, strict=True)) + prepared.reused_vectors
+        if vectors:
+            await _with_retries(config, lambda: write_embeddings(vectors))
+    if collection is not None and prepared.patch_ids:
+        await _with_retries(config, lambda: asyncio.to_thread(
+            collection.update,
+            ids=prepared.patch_ids,
+            metadatas=prepared.patch_metadatas,
+        ))
+
+async def index_products(
+    products: ProductSource,
+    config: Optional[IndexerConfig] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    target: Optional["Collection"] = None,
+) -> IndexingStats:
+    """
+    Index products through a batched, bounded-concurrency pipeline.
+
+    A producer groups products into batches, up to ``max_concurrency`` workers
+    embed them with one API call per batch, and a single writer upserts each
+    batch into ChromaDB. Products whose embedding text is unchanged only get
+    their changed metadata fields patched. Bounded queues between the stages apply backpressure
+    to the product source. Batches that still fail after ``max_attempts`` are
+    recorded in the returned stats instead of aborting the run.
+
+    Vectors go to ChromaDB and, when ``config.write_pgvector`` is set (the
+    default with the pgvector backend), to products.vector for every product
+    in the run. ChromaDB is only required without pgvector.
+
+    Args:
+        products: Product dicts, either a plain or an async iterable
+        config: Optional pipeline configuration
+        on_progress: Optional coroutine called after every written batch
+        target: Collection to write to (defaults to the aliased live collection)
+
+    Returns:
+        IndexingStats for the run
+    """
+    config = config or IndexerConfig()
+    collection = target or await get_collection()
+    if not collection and not config.write_pgvector:
+        raise RuntimeError("ChromaDB not available")
+    stats = IndexingStats()
+    embed_queue: asyncio.Queue = asyncio.Queue(maxsize=config.queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=config.queue_size)
+    # Batches finish out of order; track them by sequence to advance the watermark
+    batch_tails: Dict[int, Any] = {}
+    finished: set = set()
+    failed_seqs: set = set()
+    next_seq = 0
+
+    def finish(seq: int, failed: bool = False) -> None:
+        nonlocal next_seq
+        finished.add(seq)
+        if failed:
+            failed_seqs.add(seq)
+        while next_seq in finished and next_seq not in failed_seqs:
+            finished.remove(next_seq)
+            stats.watermark, size = batch_tails.pop(next_seq)
+            stats.watermark_count += size
+            next_seq += 1
+
+    async def produce() -> None:
+        seq = 0
+        async for batch in _batched(products, config.batch_size):
+            batch_tails[seq] = (batch[-1]["id"], len(batch))
+            await embed_queue.put((seq, batch))
+            seq += 1
+        for _ in range(config.max_concurrency):
+            await embed_queue.put(None)
+
+    async def embed() -> None:
+        while (item := await embed_queue.get()) is not None:
+            seq, batch = item
+            try:
+                prepared = await _prepare_batch(collection, seq, batch, config)
+            except Exception as e:
+                ids = [str(product["id"]) for product in batch]
+                stats.failed += len(ids)
+                stats.failed_ids.extend(ids)
+                stats.processed += len(ids)
+                finish(seq, failed=True)
+                logger.error("Failed to embed batch", error=str(e), count=len(ids))
+                continue
+            await write_queue.put(prepared)
+
+    async def write() -> None:
+        while (prepared := await write_queue.get()) is not None:
+            count = len(prepared.ids) + len(prepared.patch_ids) + prepared.unchanged
+            failed = False
+            try:
+                await _write_batch(collection, prepared, config)
+                stats.embedded += len(prepared.ids)
+                stats.refreshed += len(prepared.patch_ids)
+                stats.unchanged += prepared.unchanged
+            except Exception as e:
+                written = len(prepared.ids) + len(prepared.patch_ids)
+                stats.failed += written
+                stats.unchanged += prepared.unchanged
+                stats.failed_ids.extend(prepared.ids + prepared.patch_ids)
+                failed = True
+                logger.error("Failed to write batch", error=str(e), count=written)
+            stats.processed += count
+            finish(prepared.seq, failed=failed)
+            logger.info(
+                "Indexing progress",
+                processed=stats.processed,
+                embedded=stats.embedded,
+                refreshed=stats.refreshed,
+                unchanged=stats.unchanged,
+                failed=stats.failed,
+                items_per_sec=round(stats.items_per_sec, 2),
+            )
+            if on_progress:
+                await on_progress(stats)
+
+    async with asyncio.TaskGroup() as tg:
+        tg.create_task(produce())
+        tg.create_task(write())
+        workers = [tg.create_task(embed()) for _ in range(config.max_concurrency)]
+        await asyncio.gather(*workers)
+        await write_queue.put(None)
+
+    logger.info(
+        "Indexed products",
+        total=stats.processed,
+        embedded=stats.embedded,
+        refreshed=stats.refreshed,
+        unchanged=stats.unchanged,
+        failed=stats.failed,
+        elapsed=round(stats.elapsed, 2),
+        items_per_sec=round(stats.items_per_sec, 2),
+    )
+    return stats
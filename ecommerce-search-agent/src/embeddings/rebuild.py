@@ -0,0 +1,133 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+
+from pydantic import BaseModel, Field
+
+from src.database.catalog import count_products, fetch_products_by_ids, stream_products
+from src.database.chromadb_client import (
+    create_versioned_collection,
+    garbage_collect_collections,
+    get_chroma_client,
+    get_named_collection,
+    set_building_collection,
+    swap_alias,
+)
+from src.embeddings.indexer import IndexerConfig, IndexingStats, index_products
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fraction of catalog products the new collection must contain before the alias is swapped
+MIN_COUNT_RATIO = float(os.environ.get("REBUILD_MIN_COUNT_RATIO", "0.99"))
+# Collections kept after a swap (current + previous versions for rollback)
+KEEP_COLLECTIONS = int(os.environ.get("REBUILD_KEEP_COLLECTIONS", "2"))
+
+class RebuildCheckpoint(BaseModel):
+    """Resumable state of a collection rebuild."""
+    collection: str
+    expected: int = Field(..., ge=0)
+    processed: int = Field(default=0, ge=0)  # Products up to and including after_id
+    after_id: Optional[int] = None
+
+CheckpointCallback = Callable[[RebuildCheckpoint, IndexingStats], Awaitable[None]]
+
+async def rebuild_collection(
+    checkpoint: Optional[RebuildCheckpoint] = None,
+    on_checkpoint: Optional[CheckpointCallback] = None,
+    config: Optional[IndexerConfig] = None,
+) -> RebuildCheckpoint:
+    """
+    Rebuild the product collection blue/green style.
+
+    Products are indexed into a fresh versioned collection while searches keep
+    using the live one. Once the new collection holds enough of the catalog the
+    products alias is swapped to it and old versions are garbage-collected.
+    While it runs, the catalog change listener writes changes to both
+    collections.
+
+    Args:
+        checkpoint: Checkpoint of an interrupted rebuild to resume
+        on_checkpoint: Optional coroutine called whenever the checkpoint advances
+        config: Optional indexing pipeline configuration
+
+    Returns:
+        The final checkpoint of the rebuild
+
+    Raises:
+        ValueError: If products still fail to index after a retry, or the
+            rebuilt collection fails validation
+    """
+    if checkpoint is None:
+        expected = await count_products()
+        target = await create_versioned_collection()
+        checkpoint = RebuildCheckpoint(collection=target.name, expected=expected)
+        if on_checkpoint:
+            # Record the target right away so a crash before the first batch resumes into it
+            await on_checkpoint(checkpoint, IndexingStats())
+    else:
+        target = await asyncio.to_thread(get_named_collection, checkpoint.collection)
+        logger.info(
+            "Resuming embedding rebuild",
+            collection=checkpoint.collection,
+            after_id=checkpoint.after_id,
+            processed=checkpoint.processed,
+        )
+    # From here on the change listener also writes catalog changes to the
+    # target, so changes to already indexed products are not lost at the swap
+    await set_building_collection(target.name)
+    resumed_from = checkpoint.processed
+
+    async def on_progress(stats: IndexingStats) -> None:
+        if stats.watermark is not None:
+            checkpoint.after_id = stats.watermark
+            checkpoint.processed = resumed_from + stats.watermark_count
+        if on_checkpoint:
+            await on_checkpoint(checkpoint, stats)
+
+    # Indexing starts on the first cursor batch instead of after a full fetch
+    stats = await index_products(
+        stream_products(after_id=checkpoint.after_id),
+        config,
+        on_progress=on_progress,
+        target=target,
+    )
+    if stats.failed_ids:
+        # The checkpoint stops before the first failed batch; retry the
+        # failures now rather than swap to an index that lacks them
+        logger.warning("Retrying products that failed to index", count=len(stats.failed_ids))
+        retry = await index_products(
+            await fetch_products_by_ids([int(id_) for id_ in stats.failed_ids]),
+            config,
+            target=target,
+        )
+        if retry.failed:
+            # The target and checkpoint are kept, so the task can be resumed
+            raise ValueError(
+                f"{retry.failed} products could not be indexed into {target.name}, "
+                "keeping the current collection"
+            )
+        stats.embedded += retry.embedded
+        stats.failed = 0
+
+    indexed = await asyncio.to_thread(target.count)
+    if indexed < checkpoint.expected * MIN_COUNT_RATIO:
+        await set_building_collection(None)
+        client = await asyncio.to_thread(get_chroma_client)
+        await asyncio.to_thread(client.delete_collection, target.name)
+        raise ValueError(
+            f"Rebuilt collection {target.name} has {indexed} of {checkpoint.expected} products, "
+            "keeping the current collection"
+        )
+
+    await swap_alias(target.name)
+    await garbage_collect_collections(keep=KEEP_COLLECTIONS)
+    logger.info(
+        "Rebuilt product collection",
+        collection=target.name,
+        expected=checkpoint.expected,
+        indexed=indexed,
+        embedded=stats.embedded,
+        failed=stats.failed,
+    )
+    return checkpoint
@@ -0,0 +1,209 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+import sqlite3
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Set EMBEDDING_STORE_PATH to an empty string to disable the local store
+EMBEDDING_STORE_PATH = os.environ.get("EMBEDDING_STORE_PATH", "./embedding_store.sqlite3")
+# Vectors kept; the least recently used are evicted beyond this (0 keeps everything)
+EMBEDDING_STORE_MAX_ROWS = int(os.environ.get("EMBEDDING_STORE_MAX_ROWS", "1000000"))
+# Reads refresh a vector's last_used_at at most this often, so most reads write nothing
+EMBEDDING_STORE_TOUCH_SECONDS = float(os.environ.get("EMBEDDING_STORE_TOUCH_SECONDS", "86400"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS embeddings_model_idx ON embeddings (model);
+CREATE INDEX IF NOT EXISTS embeddings_last_used_idx ON embeddings (last_used_at);
+"""
+
+# SQLite caps the number of bound parameters per statement
+_MAX_PARAMS = 500
+# Rows written between checks of the row limit
+_EVICT_CHECK_ROWS = 1000
+
+class EmbeddingStore:
+    """
+    Durable local embedding store backed by SQLite.
+
+    Vectors are keyed by ``embedding_input_hash(text, model)`` and stored as
+    packed float32 arrays, so any process sharing the file (rebuilds,
+    migrations, new replicas) can reuse embeddings without calling the API.
+    Methods are blocking; call them through ``asyncio.to_thread`` from async code.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_rows: int = EMBEDDING_STORE_MAX_ROWS,
+        touch_seconds: float = EMBEDDING_STORE_TOUCH_SECONDS,
+    ):
+        """
+        Open (and create if needed) the store at ``path``.
+
+        Args:
+            path: Filesystem path of the SQLite database
+            max_rows: Vectors kept before the least recently used are evicted (0 for no limit)
+            touch_seconds: Minimum interval between last_used_at updates of a vector
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self.touch_seconds = touch_seconds
+        # Check the row limit on the first write
+        self._written_since_check = _EVICT_CHECK_ROWS
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, List[float]]:
+        """Return the stored vectors for ``keys``, skipping keys that are missing."""
+        keys = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        touched: List[Tuple[float, str]] = []
+        now = time.time()
+        with self._lock:
+            for i in range(0, len(keys), _MAX_PARAMS):
+                chunk = keys[i:i + _MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector, last_used_at FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, blob, _ in rows:
+                    found[key] = self._unpack(blob)
+                # Track usage so eviction and compaction drop vectors nothing reads
+                # anymore; coarse timestamps keep reads from writing every time
+                touched.extend(
+                    (now, key) for key, _, last_used_at in rows
+                    if now - last_used_at >= self.touch_seconds
+                )
+            if touched:
+                self._conn.executemany("UPDATE embeddings SET last_used_at = ? WHERE key = ?", touched)
+                self._conn.commit()
+        return found
+
+    def put_many(self, items: Iterable[Tuple[str, str, List[float]]]) -> None:
+        """Store ``(key, model, vector)`` tuples, replacing existing keys."""
+        now = time.time()
+        rows = [
+            (key, model, len(vector), self._pack(vector), now, now)
+            for key, model, vector in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(key, model, dim, vector, created_at, last_used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._written_since_check += len(rows)
+            if self.max_rows and self._written_since_check >= _EVICT_CHECK_ROWS:
+                self._written_since_check = 0
+                self._evict_locked()
+
+    def _evict_locked(self) -> int:
+        """Delete the least recently used vectors beyond ``max_rows``. Hold the lock."""
+        excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_rows
+        if excess <= 0:
+            return 0
+        deleted = self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used_at LIMIT ?)",
+            (excess,),
+        ).rowcount
+        self._conn.commit()
+        logger.info("Evicted least recently used embeddings", deleted=deleted, path=self.path)
+        return deleted
+
+    def count(self) -> int:
+        """Return the number of stored vectors."""
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def compact(
+        self,
+        keep_models: Optional[List[str]] = None,
+        max_age_days: Optional[float] = None,
+    ) -> Dict[str, int]:
+        """
+        Drop stale vectors and reclaim disk space.
+
+        Args:
+            keep_models: If set, delete vectors produced by any other model
+            max_age_days: If set, delete vectors not used within this many days
+
+        Returns:
+            Dict with the number of deleted and remaining vectors
+        """
+        with self._lock:
+            deleted = 0
+            if keep_models:
+                placeholders = ",".join("?" * len(keep_models))
+                deleted += self._conn.execute(
+                    f"DELETE FROM embeddings WHERE model NOT IN ({placeholders})",
+                    keep_models,
+                ).rowcount
+            if max_age_days is not None:
+                cutoff = time.time() - max_age_days * 86400
+                deleted += self._conn.execute(
+                    "DELETE FROM embeddings WHERE last_used_at < ?",
+                    (cutoff,),
+                ).rowcount
+            self._conn.commit()
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+            remaining = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logger.info("Compacted embedding store", deleted=deleted, remaining=remaining, path=self.path)
+        return {"deleted": deleted, "remaining": remaining}
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+_store: Optional[EmbeddingStore] = None
+_store_lock = threading.Lock()
+
+def get_embedding_store() -> Optional[EmbeddingStore]:
+    """Return the shared embedding store, or None if it is disabled or unavailable."""
+    global _store
+    if not EMBEDDING_STORE_PATH:
+        return None
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                try:
+                    _store = EmbeddingStore(EMBEDDING_STORE_PATH)
+                    logger.info("Embedding store opened", path=EMBEDDING_STORE_PATH)
+                except sqlite3.Error as e:
+                    logger.error("Failed to open embedding store", error=str(e), path=EMBEDDING_STORE_PATH)
+                    return None
+    return _store
@@ -1,11 +1,30 @@
 import os
-from typing import List
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from src.utils.logger import configure_logging, get_logger
+from src.utils.logger import (
+    LOG_DEBUG_TOKEN,
+    configure_logging,
+    get_logger,
+    reset_verbose_logging,
+    set_verbose_logging,
+    stop_logging,
+)
 
-from src.api.routes import search, recommendation, admin
+from src.api.dependencies import close_resources, preload_agents
+from src.api.routes import search, recommendation, admin, metrics
+from src.utils.metrics import (
+    REQUEST_SECONDS,
+    bind_request,
+    current_endpoint,
+    register_pool_collector,
+    unbind_request,
+)
+from src.utils.tracing import shutdown_tracing, span
 
 # Load environment variables
 load_dotenv()
@@ -26,12 +45,37 @@ CORS_ORIGINS: List[str] = os.environ.get("CORS_ORIGINS", "*").split(",")
 CORS_METHODS: List[str] = os.environ.get("CORS_METHODS", "*").split(",")
 CORS_HEADERS: List[str] = os.environ.get("CORS_HEADERS", "*").split(",")
 
+# Agents are built on first request by default; set PRELOAD_AGENTS=true to
+# build them during startup instead (slower start, no first-request penalty).
+PRELOAD_AGENTS = os.environ.get("PRELOAD_AGENTS", "false").lower() == "true"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Manage agent and client lifetimes for the application."""
+    from src.database import catalog_snapshot
+
+    register_pool_collector()
+    if catalog_snapshot.CATALOG_SNAPSHOT_ENABLED:
+        # Search works without it (filters fall back to SQL), so a failed load is not fatal
+        await catalog_snapshot.refresh_catalog_snapshot()
+        catalog_snapshot.start_catalog_snapshot_refresh()
+    if PRELOAD_AGENTS:
+        await asyncio.to_thread(preload_agents)
+        logger.info("Agents preloaded")
+    yield
+    await catalog_snapshot.stop_catalog_snapshot_refresh()
+    await close_resources()
+    shutdown_tracing()
+    logger.info("Shared clients closed")
+    stop_logging()
+
 # Initialize FastAPI app
 try:
     app = FastAPI(
         title=get_required_env_var("APP_NAME"),
         description="AI-powered e-commerce search and recommendation API",
         version="1.0.0",
+        lifespan=lifespan,
     )
 except ValueError as e:
     logger.error("Failed to initialize FastAPI app", error=str(e))
@@ -46,7 +90,38 @@ app.add_middleware(
     allow_headers=CORS_HEADERS,
 )
 
+@app.middleware("http")
+async def instrument_request(request: Request, call_next):
+    """
+    Label everything measured while serving a request with its endpoint, and
+    open the root tracing span (its id is returned in ``X-Trace-Id``).
+
+    A request whose ``X-Debug-Log`` header matches LOG_DEBUG_TOKEN is logged
+    in full at DEBUG; its log lines carry the same trace id.
+    """
+    token = bind_request(request.scope)
+    verbose = bool(LOG_DEBUG_TOKEN) and request.headers.get("X-Debug-Log") == LOG_DEBUG_TOKEN
+    verbose_token = set_verbose_logging(verbose)
+    started = time.perf_counter()
+    status = 500
+    try:
+        with span("http.request", method=request.method, path=request.url.path) as root:
+            response = await call_next(request)
+            status = response.status_code
+            root.set_attribute("endpoint", current_endpoint())
+            root.set_attribute("status", status)
+            if verbose:
+                root.set_attribute("debug_log", True)
+            if root.sampled:
+                response.headers["X-Trace-Id"] = root.trace_id
+        return response
+    finally:
+        REQUEST_SECONDS.labels(current_endpoint(), request.method, str(status)).observe(time.perf_counter() - started)
+        reset_verbose_logging(verbose_token)
+        unbind_request(token)
+
 # Include routers
 app.include_router(search.router, prefix="/search", tags=["search"])
 app.include_router(recommendation.router, prefix="/recommendations", tags=["recommendation"])
-app.include_router(admin.router, prefix="/admin", tags=["admin"]) 
\ No newline at end of file
+app.include_router(admin.router, prefix="/admin", tags=["admin"]) 
+app.include_router(metrics.router)
@@ -0,0 +1,102 @@
+import asyncio
+import time
+from typing import Awaitable, Optional, TypeVar
+
+from src.utils.logger import get_logger
+from src.utils.metrics import time_stage
+
+logger = get_logger(__name__)
+
+T = TypeVar("T")
+
+# Stages given less time than this are skipped rather than started
+MIN_STAGE_SECONDS = 0.05
+
+class StageTimeout(Exception):
+    """Raised when a stage is skipped or cut off to stay within the latency budget."""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"Stage {stage} exceeded its {timeout:.3f}s budget")
+        self.stage = stage
+        self.timeout = timeout
+
+class Deadline:
+    """
+    A request-level latency budget.
+
+    Created once per request and passed down to each stage, which asks for
+    the time it may use via ``timeout``.
+    """
+
+    def __init__(self, budget_seconds: float):
+        """
+        Start the budget clock.
+
+        Args:
+            budget_seconds: Total time available to the request
+        """
+        self.budget = budget_seconds
+        self.expires_at = time.monotonic() + budget_seconds
+
+    def remaining(self) -> float:
+        """Return the seconds left before the deadline (never negative)."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    @property
+    def expired(self) -> bool:
+        """Whether the budget is used up."""
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """
+        Return the time a stage may take.
+
+        Args:
+            cap: Upper bound for this stage regardless of the remaining budget
+            reserve: Time to hold back for later stages
+
+        Returns:
+            Seconds available to the stage (possibly 0)
+        """
+        available = max(self.remaining() - reserve, 0.0)
+        return min(available, cap) if cap is not None else available
+
+async def run_stage(
+    stage: str,
+    awaitable: Awaitable[T],
+    deadline: Deadline,
+    cap: Optional[float] = None,
+    reserve: float = 0.0,
+) -> T:
+    """
+    Await a stage within its share of the latency budget.
+
+    The time spent is recorded in the ``search_stage_duration_seconds``
+    histogram under ``stage``, including stages that time out.
+
+    Args:
+        stage: Stage name, used in logs and the raised exception
+        awaitable: Coroutine or future running the stage
+        deadline: Request deadline
+        cap: Maximum time for this stage
+        reserve: Time to keep for the stages after this one
+
+    Returns:
+        The stage result
+
+    Raises:
+        StageTimeout: If there is not enough budget to start or the stage runs out of time
+    """
+    timeout = deadline.timeout(cap, reserve)
+    if timeout < MIN_STAGE_SECONDS:
+        # Never started, so close it to avoid "coroutine was never awaited"
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        logger.warning("Skipping stage, latency budget exhausted", stage=stage, remaining=deadline.remaining())
+        raise StageTimeout(stage, timeout)
+    try:
+        with time_stage(stage):
+            return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as e:
+        logger.warning("Stage timed out", stage=stage, timeout=round(timeout, 3))
+        raise StageTimeout(stage, timeout) from e
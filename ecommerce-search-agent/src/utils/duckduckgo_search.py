@@ -10,7 +10,6 @@ try:
     HAS_DDGS = True
 except ImportError:
     import requests
-    from bs4 import BeautifulSoup
     HAS_DDGS = False
 
 def clean_query(query: str) -> str:
@@ -30,6 +29,34 @@ def clean_query(query: str) -> str:
     
     return query
 
+def parse_html_results(html: str, max_results: int) -> List[Dict]:
+    """
+    Parse results from the DuckDuckGo HTML search page.
+    
+    Args:
+        html: Page body from html.duckduckgo.com
+        max_results: Maximum number of results to return
+        
+    Returns:
+        List of search results with title, href, and body
+    """
+    from bs4 import BeautifulSoup
+
+    results = []
+    soup = BeautifulSoup(html, "html.parser")
+    for result in soup.select(".result")[:max_results]:
+        title_elem = result.select_one(".result__title")
+        snippet_elem = result.select_one(".result__snippet")
+        link_elem = result.select_one(".result__url")
+        
+        if title_elem and link_elem:
+            results.append({
+                "title": title_elem.get_text(strip=True),
+                "href": link_elem.get_text(strip=True),
+                "body": snippet_elem.get_text(strip=True) if snippet_elem else "",
+            })
+    return results
+
 def duckduckgo_web_search(query: str, max_results: int = 5) -> List[Dict]:
     """
     Perform a web search using DuckDuckGo.
@@ -74,18 +101,7 @@ def duckduckgo_web_search(query: str, max_results: int = 5) -> List[Dict]:
         resp = requests.get(url, headers=headers, timeout=10)
         resp.raise_for_status()
         
-        soup = BeautifulSoup(resp.text, "html.parser")
-        for result in soup.select(".result")[:max_results]:
-            title_elem = result.select_one(".result__title")
-            snippet_elem = result.select_one(".result__snippet")
-            link_elem = result.select_one(".result__url")
-            
-            if title_elem and link_elem:
-                results.append({
-                    "title": title_elem.get_text(strip=True),
-                    "href": link_elem.get_text(strip=True),
-                    "body": snippet_elem.get_text(strip=True) if snippet_elem else "",
-                })
+        results = parse_html_results(resp.text, max_results)
     except Exception as e:
         logger.error(f"Error scraping DuckDuckGo: {str(e)}")
         # Return empty results instead of failing
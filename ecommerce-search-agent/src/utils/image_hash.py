@@ -0,0 +1,74 @@
+import base64
+import hashlib
+import io
+import re
+from typing import Optional, Union
+
+from PIL import Image, ImageOps
+
+HASH_BITS = 64
+
+def decode_data_url(data_url: str) -> bytes:
+    """
+    Decode a base64 image data URL (or bare base64 string) to raw bytes.
+
+    Raises:
+        ValueError: If the data is not valid base64
+    """
+    match = re.match(r"data:image/[\w.+-]+;base64,(.+)", data_url, re.DOTALL)
+    payload = match.group(1) if match else data_url
+    try:
+        return base64.b64decode(payload, validate=False)
+    except Exception as e:
+        raise ValueError(f"Invalid base64 encoding: {str(e)}") from e
+
+def open_image(image_bytes: bytes) -> Optional[Image.Image]:
+    """
+    Decode and auto-orient an image.
+
+    Returns:
+        The decoded image, or None if decoding fails
+    """
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            # exif_transpose returns a loaded copy, so it outlives the buffer
+            return ImageOps.exif_transpose(image)
+    except Exception:
+        return None
+
+def dhash(image: Union[bytes, Image.Image], hash_size: int = 8) -> Optional[int]:
+    """
+    Compute the 64-bit difference hash of an image.
+
+    The image is auto-oriented, converted to grayscale and shrunk to
+    (hash_size + 1) x hash_size; each bit records whether a pixel is brighter
+    than its right neighbour. Re-encodes, resizes and small edits of the same
+    photo end up a few bits apart.
+
+    Args:
+        image: Encoded image bytes, or an image already decoded by ``open_image``
+        hash_size: Hash width and height in bits
+
+    Returns:
+        The hash as an int, or None if the image cannot be decoded
+    """
+    if isinstance(image, bytes):
+        image = open_image(image)
+        if image is None:
+            return None
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.LANCZOS)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+def exact_hash(image_bytes: bytes) -> str:
+    """Return a content hash for byte-identical matching."""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+def hamming_distance(a: int, b: int) -> int:
+    """Return the number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
@@ -0,0 +1,92 @@
+import os
+import base64
+import io
+from dotenv import load_dotenv
+load_dotenv()
+from typing import Optional, Tuple
+
+from PIL import Image
+
+from src.utils.image_hash import open_image
+from src.utils.logger import get_logger
+from src.utils.validators import detect_image_type
+
+logger = get_logger(__name__)
+
+# Vision models tile images at high detail after fitting them into 2048px and
+# scaling the short side to 768px, so larger uploads only cost bandwidth.
+VISION_MAX_DIMENSION = int(os.environ.get("VISION_MAX_DIMENSION", "1024"))
+VISION_IMAGE_FORMAT = os.environ.get("VISION_IMAGE_FORMAT", "JPEG").upper()
+VISION_IMAGE_QUALITY = int(os.environ.get("VISION_IMAGE_QUALITY", "85"))
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Convert to RGB, compositing any transparency onto white."""
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+def downscale_image(
+    image_bytes: bytes,
+    max_dimension: int = VISION_MAX_DIMENSION,
+    image_format: str = VISION_IMAGE_FORMAT,
+    quality: int = VISION_IMAGE_QUALITY,
+    image: Optional[Image.Image] = None,
+) -> Tuple[bytes, str]:
+    """
+    Auto-orient, downsize and re-encode an image for the Vision API.
+
+    This is CPU-bound; call it through ``asyncio.to_thread`` from async code.
+
+    Args:
+        image_bytes: Raw encoded image
+        max_dimension: Longest side of the output in pixels
+        image_format: Output format, JPEG or WEBP
+        quality: Encoder quality (1-95)
+        image: The image already decoded by ``open_image``, to avoid decoding it again
+
+    Returns:
+        Tuple of (encoded bytes, image subtype such as "jpeg"). The original
+        bytes are returned when decoding fails or re-encoding would not make
+        the image smaller.
+
+    Raises:
+        ValueError: If the bytes are not a supported image type
+    """
+    original_type = detect_image_type(image_bytes)
+    if original_type is None:
+        raise ValueError("Invalid image format")
+    if image is None:
+        image = open_image(image_bytes)
+    if image is None:
+        logger.warning("Could not decode image, sending original")
+        return image_bytes, original_type
+
+    original_size = image.size
+    try:
+        # _flatten returns a copy, so the caller's image is left as it was
+        image = _flatten(image)
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        image.save(buffer, format=image_format, quality=quality, optimize=True)
+    except Exception as e:
+        logger.warning("Could not preprocess image, sending original", error=str(e))
+        return image_bytes, original_type
+
+    processed = buffer.getvalue()
+    if len(processed) >= len(image_bytes):
+        return image_bytes, original_type
+    logger.debug(
+        "Downscaled image for vision",
+        original_size=original_size,
+        size=image.size,
+        original_bytes=len(image_bytes),
+        bytes=len(processed),
+    )
+    return processed, image_format.lower()
+
+def to_data_url(image_bytes: bytes, image_type: str) -> str:
+    """Encode raw image bytes as a base64 data URL."""
+    return f"data:image/{image_type};base64,{base64.b64encode(image_bytes).decode('ascii')}"
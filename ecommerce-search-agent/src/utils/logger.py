@@ -1,6 +1,11 @@
 import sys
 import time
-from typing import Any, Dict
+import atexit
+import queue
+import random
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
 
 import structlog
 from structlog.types import Processor
@@ -8,8 +13,42 @@ import logging
 import os
 from dotenv import load_dotenv
 
+from src.utils.tracing import add_trace_context
+
 load_dotenv()
 
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").upper()
+# Render and write log lines on a background thread instead of the caller's
+LOG_ASYNC = os.environ.get("LOG_ASYNC", "true").lower() == "true"
+# Log everything at DEBUG, unsampled and untruncated, for every request
+LOG_DEBUG = os.environ.get("LOG_DEBUG", "false").lower() == "true"
+# Requests sending this value in X-Debug-Log get DEBUG logging (empty disables the header)
+LOG_DEBUG_TOKEN = os.environ.get("LOG_DEBUG_TOKEN", "")
+# "event=rate" pairs, e.g. "Returning cached recommendations=0.1"
+LOG_SAMPLE_RATES = os.environ.get("LOG_SAMPLE_RATES", "")
+LOG_MAX_FIELD_CHARS = int(os.environ.get("LOG_MAX_FIELD_CHARS", "512"))
+LOG_MAX_ITEMS = int(os.environ.get("LOG_MAX_ITEMS", "10"))
+
+_LEVELS = {"debug": 10, "info": 20, "warning": 30, "warn": 30, "error": 40, "exception": 40, "critical": 50}
+
+
+# Per-request debug switch, set by the request middleware
+_verbose: ContextVar[bool] = ContextVar("verbose_logging", default=False)
+
+
+def set_verbose_logging(enabled: bool):
+    """Enable full DEBUG logging for the current context; returns a token for ``reset_verbose_logging``."""
+    return _verbose.set(enabled)
+
+
+def reset_verbose_logging(token) -> None:
+    """Undo ``set_verbose_logging``."""
+    _verbose.reset(token)
+
+
+def _is_verbose() -> bool:
+    return LOG_DEBUG or _verbose.get()
+
 
 def add_timestamp(_, __, event_dict: Dict[str, Any]) -> Dict[str, Any]:
     """Add timestamp to the event dict."""
@@ -17,21 +56,176 @@ def add_timestamp(_, __, event_dict: Dict[str, Any]) -> Dict[str, Any]:
     return event_dict
 
 
+class LevelFilter:
+    """
+    Drops events below the configured level before any other processing.
+
+    Runs first so a filtered call costs one dict lookup; requests in verbose
+    mode get every level.
+    """
+
+    def __init__(self, level: str = LOG_LEVEL):
+        self.min_level = _LEVELS.get(level.lower(), 20)
+
+    def __call__(self, _, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if _LEVELS.get(method_name, 20) < self.min_level and not _is_verbose():
+            raise structlog.DropEvent
+        return event_dict
+
+
+class EventSampler:
+    """
+    Keeps only a fraction of selected high-volume events.
+
+    Warnings and errors are never sampled. Kept events carry ``sample_rate``
+    so counts can be scaled back up.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        """
+        Initialize the sampler.
+
+        Args:
+            rates: Fraction of events to keep, by event name
+        """
+        self.rates = rates
+
+    @classmethod
+    def from_string(cls, spec: str) -> "EventSampler":
+        """Build a sampler from ``"event=rate,event=rate"``."""
+        rates = {}
+        for part in filter(None, (p.strip() for p in spec.split(","))):
+            event, _, rate = part.rpartition("=")
+            rates[event.strip()] = float(rate)
+        return cls(rates)
+
+    def __call__(self, _, method_name: str, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        rate = self.rates.get(event_dict.get("event"))
+        if rate is None or rate >= 1.0 or _LEVELS.get(method_name, 20) >= 30 or _is_verbose():
+            return event_dict
+        if random.random() >= rate:
+            raise structlog.DropEvent
+        event_dict["sample_rate"] = rate
+        return event_dict
+
+
+class PayloadSummarizer:
+    """
+    Caps the size of logged values: long strings are truncated and long
+    lists or dicts keep only their first items, with a note of what was cut.
+
+    Bypassed in verbose mode, so full payloads are available on demand.
+    """
+
+    def __init__(self, max_chars: int = LOG_MAX_FIELD_CHARS, max_items: int = LOG_MAX_ITEMS, max_depth: int = 3):
+        self.max_chars = max_chars
+        self.max_items = max_items
+        self.max_depth = max_depth
+
+    def summarize(self, value: Any, depth: int = 0) -> Any:
+        """Return a size-capped copy of ``value``."""
+        if isinstance(value, str):
+            if len(value) > self.max_chars:
+                return f"{value[:self.max_chars]}...(+{len(value) - self.max_chars} chars)"
+            return value
+        if isinstance(value, (list, tuple, set)):
+            if depth >= self.max_depth:
+                return f"<{type(value).__name__} of {len(value)} items>"
+            items = [self.summarize(item, depth + 1) for item in list(value)[:self.max_items]]
+            if len(value) > self.max_items:
+                items.append(f"...(+{len(value) - self.max_items} items)")
+            return items
+        if isinstance(value, dict):
+            if depth >= self.max_depth:
+                return f"<dict of {len(value)} keys>"
+            summary = {
+                key: self.summarize(item, depth + 1)
+                for key, item in list(value.items())[:self.max_items]
+            }
+            if len(value) > self.max_items:
+                summary["..."] = f"+{len(value) - self.max_items} keys"
+            return summary
+        return value
+
+    def __call__(self, _, __, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+        if _is_verbose():
+            return event_dict
+        for key, value in event_dict.items():
+            if key != "event" and isinstance(value, (str, list, tuple, set, dict)):
+                event_dict[key] = self.summarize(value)
+        return event_dict
+
+
+class _NonFormattingQueueHandler(QueueHandler):
+    """Queues records as they are; formatting happens on the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def stop_logging() -> None:
+    """Flush queued log records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        listener, _listener = _listener, None
+        listener.stop()
+
+
+atexit.register(stop_logging)
+
+
 def configure_logging() -> None:
-    """Configure structured logging for the application."""
-    logging.basicConfig(
-        format="%(message)s",
-        stream=None,
-        level=getattr(logging, os.environ.get("LOG_LEVEL", "INFO")),
-    )
-    structlog.configure(
+    """
+    Configure structured logging for the application.
+
+    Level filtering, sampling and payload capping run in the caller; JSON
+    rendering and I/O run on a background thread when LOG_ASYNC is on.
+    """
+    global _listener
+    stop_logging()
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(structlog.stdlib.ProcessorFormatter(
         processors=[
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.stdlib.add_log_level,
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
             structlog.processors.StackInfoRenderer(),
             structlog.processors.format_exc_info,
             structlog.processors.JSONRenderer(),
         ],
+        # Records from third-party stdlib loggers skip the structlog chain
+        foreign_pre_chain=[
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+        ],
+    ))
+    if LOG_ASYNC:
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler: logging.Handler = _NonFormattingQueueHandler(log_queue)
+        _listener = QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+    # Application loggers pass everything to LevelFilter, which knows about verbose requests
+    logging.getLogger("src").setLevel(logging.DEBUG)
+
+    processors: list[Processor] = [
+        LevelFilter(LOG_LEVEL),
+        EventSampler.from_string(LOG_SAMPLE_RATES),
+        structlog.stdlib.add_log_level,
+        add_trace_context,
+        PayloadSummarizer(LOG_MAX_FIELD_CHARS, LOG_MAX_ITEMS),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+    ]
+    structlog.configure(
+        processors=processors,
         logger_factory=structlog.stdlib.LoggerFactory(),
         wrapper_class=structlog.stdlib.BoundLogger,
         cache_logger_on_first_use=True,
@@ -40,4 +234,4 @@ def configure_logging() -> None:
 
 def get_logger(name: str) -> structlog.BoundLogger:
     """Get a logger instance with the given name."""
-    return structlog.get_logger(name) 
\ No newline at end of file
+    return structlog.get_logger(name)
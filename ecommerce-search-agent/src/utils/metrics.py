@@ -0,0 +1,166 @@
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, Iterator, Optional
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+from prometheus_client.core import GaugeMetricFamily
+
+from src.utils.logger import get_logger
+from src.utils.tracing import span
+
+logger = get_logger(__name__)
+
+# ASGI scope of the request being served, bound by the metrics middleware.
+# The router adds the matched route to it, which gives the endpoint label.
+_request_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("metrics_request_scope", default=None)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency",
+    ["endpoint", "method", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_SECONDS = Histogram(
+    "search_stage_duration_seconds",
+    "Latency of one stage of request processing",
+    ["endpoint", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result (hit or miss)",
+    ["endpoint", "cache", "result"],
+)
+OPENAI_REQUESTS = Counter(
+    "openai_requests_total",
+    "OpenAI API calls",
+    ["endpoint", "operation", "model"],
+)
+OPENAI_TOKENS = Counter(
+    "openai_tokens_total",
+    "OpenAI tokens used",
+    ["endpoint", "operation", "model", "type"],
+)
+CHROMA_IN_PROGRESS = Gauge(
+    "chroma_requests_in_progress",
+    "ChromaDB calls currently running (each holds a worker thread)",
+)
+
+def bind_request(scope: Dict[str, Any]) -> Token:
+    """Attribute metrics recorded in this context to the request with ``scope``."""
+    return _request_scope.set(scope)
+
+def unbind_request(token: Token) -> None:
+    """Undo ``bind_request``."""
+    _request_scope.reset(token)
+
+def current_endpoint() -> str:
+    """
+    Return the route template being served (e.g. "/search/text").
+
+    Templates rather than raw paths keep label cardinality bounded. Work
+    outside a request (workers, scripts) is labelled "none".
+    """
+    scope = _request_scope.get()
+    if scope is None:
+        return "none"
+    return getattr(scope.get("route"), "path", None) or "unmatched"
+
+@contextmanager
+def time_stage(stage: str) -> Iterator[None]:
+    """
+    Record how long the enclosed block takes as ``stage``, also when it raises.
+
+    The block is traced as a span named after the stage as well.
+    """
+    started = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        STAGE_SECONDS.labels(current_endpoint(), stage).observe(time.perf_counter() - started)
+
+def record_cache(cache: str, hit: bool, count: int = 1) -> None:
+    """Count ``count`` lookups in ``cache`` as hits or misses."""
+    if count:
+        CACHE_REQUESTS.labels(current_endpoint(), cache, "hit" if hit else "miss").inc(count)
+
+def record_openai_call(
+    operation: str,
+    model: Optional[str],
+    prompt_tokens: int = 0,
+    completion_tokens: int = 0,
+) -> None:
+    """
+    Count one OpenAI API call and its token usage.
+
+    Args:
+        operation: What the call was for (e.g. query_understanding, embedding, vision)
+        model: Model name reported by the API
+        prompt_tokens: Input tokens billed
+        completion_tokens: Output tokens billed
+    """
+    endpoint = current_endpoint()
+    model = model or "unknown"
+    OPENAI_REQUESTS.labels(endpoint, operation, model).inc()
+    OPENAI_TOKENS.labels(endpoint, operation, model, "prompt").inc(prompt_tokens or 0)
+    OPENAI_TOKENS.labels(endpoint, operation, model, "completion").inc(completion_tokens or 0)
+
+class PoolCollector:
+    """
+    Reports connection pool usage at scrape time.
+
+    Only clients that have already been created are read; scraping never
+    opens a connection or imports a database module.
+    """
+
+    def describe(self):
+        return []
+
+    def collect(self):
+        connections = GaugeMetricFamily(
+            "connection_pool_connections",
+            "Connections per pool and state",
+            labels=["pool", "state"],
+        )
+
+        postgres = sys.modules.get("src.database.postgres")
+        if postgres is not None:
+            try:
+                pool = postgres.engine.pool
+                connections.add_metric(["postgres", "in_use"], pool.checkedout())
+                connections.add_metric(["postgres", "idle"], pool.checkedin())
+                connections.add_metric(["postgres", "overflow"], max(pool.overflow(), 0))
+                connections.add_metric(["postgres", "max"], pool.size() + postgres.MAX_OVERFLOW)
+            except AttributeError as e:
+                logger.debug("Postgres pool stats unavailable", error=str(e))
+
+        redis_client = sys.modules.get("src.database.redis_client")
+        stats = redis_client.get_pool_stats() if redis_client else None
+        if stats is not None:
+            for state, value in stats.items():
+                connections.add_metric(["redis", state], value)
+
+        yield connections
+
+_pool_collector: Optional[PoolCollector] = None
+
+def register_pool_collector(registry: CollectorRegistry = REGISTRY) -> None:
+    """
+    Register the connection pool collector, once per process.
+
+    Called from app startup rather than at import. Repeated calls are no-ops,
+    and a collector registered by another copy of this module is kept.
+    """
+    global _pool_collector
+    if _pool_collector is not None:
+        return
+    _pool_collector = PoolCollector()
+    try:
+        registry.register(_pool_collector)
+    except ValueError as e:
+        logger.debug("Pool collector already registered", error=str(e))
@@ -0,0 +1,285 @@
+import os
+import abc
+import functools
+import json
+import logging
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from dotenv import load_dotenv
+load_dotenv()
+from typing import IO, Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, TypeVar, Union
+
+# Plain stdlib logging: src.utils.logger imports this module for its processor
+logger = logging.getLogger(__name__)
+
+# none | console | jsonl
+TRACING_EXPORTER = os.environ.get("TRACING_EXPORTER", "none").lower()
+TRACING_FILE = os.environ.get("TRACING_FILE", "./traces.jsonl")
+# Fraction of root spans (requests) that are recorded; children follow their root
+TRACING_SAMPLE_RATE = float(os.environ.get("TRACING_SAMPLE_RATE", "1.0"))
+
+T = TypeVar("T")
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_time", "_started", "duration_ms", "attributes", "error")
+    sampled = True
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_time = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach ``key=value`` to the span."""
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        """Stop the span clock and record the error that ended it, if any."""
+        self.duration_ms = (time.perf_counter() - self._started) * 1000
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the span as a JSON-serializable dict."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+class _NoopSpan:
+    """Stands in for spans that are not recorded (tracing off or not sampled)."""
+
+    sampled = False
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+AnySpan = Union[Span, _NoopSpan]
+
+_current_span: ContextVar[Optional[AnySpan]] = ContextVar("current_span", default=None)
+
+class SpanExporter(abc.ABC):
+    """Receives every finished, sampled span."""
+
+    @abc.abstractmethod
+    def export(self, span: Span) -> None:
+        """Handle one finished span."""
+
+    def shutdown(self) -> None:
+        """Flush and release resources."""
+        # Optional hook: exporters without buffers or open files keep this no-op
+        return None
+
+class JsonlSpanExporter(SpanExporter):
+    """Appends one JSON object per span to a file, for offline analysis."""
+
+    def __init__(self, path: str):
+        """
+        Open the trace file.
+
+        Args:
+            path: File to append spans to
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1, encoding="utf-8")
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+class ConsoleSpanExporter(SpanExporter):
+    """
+    Prints each trace as an indented tree once its root span finishes.
+
+    Children finish before their root, so spans are held per trace until
+    then; at most ``max_pending`` unfinished traces are kept.
+    """
+
+    def __init__(self, stream: Optional[IO[str]] = None, max_pending: int = 1000):
+        """
+        Initialize the exporter.
+
+        Args:
+            stream: Where to write traces (defaults to stderr)
+            max_pending: Maximum number of traces waiting for their root span
+        """
+        self.stream = stream or sys.stderr
+        self.max_pending = max_pending
+        self._pending: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            spans = self._pending.setdefault(span.trace_id, [])
+            spans.append(span)
+            if span.parent_id is not None:
+                if len(self._pending) > self.max_pending:
+                    self._pending.popitem(last=False)
+                return
+            del self._pending[span.trace_id]
+        self.stream.write(self.format_trace(span, spans))
+        self.stream.flush()
+
+    @staticmethod
+    def format_trace(root: Span, spans: List[Span]) -> str:
+        """Render a trace as lines of offset, duration and span name, nested by parent."""
+        children: Dict[Optional[str], List[Span]] = {}
+        for span in spans:
+            children.setdefault(span.parent_id, []).append(span)
+        lines = [f"trace {root.trace_id}"]
+
+        def render(span: Span, depth: int) -> None:
+            offset = (span.start_time - root.start_time) * 1000
+            error = f" ERROR {span.error}" if span.error else ""
+            lines.append(f"{offset:>9.1f}ms {span.duration_ms:>9.1f}ms {'  ' * depth}{span.name}{error}")
+            for child in sorted(children.get(span.span_id, []), key=lambda s: s.start_time):
+                render(child, depth + 1)
+
+        render(root, 0)
+        return "\n".join(lines) + "\n"
+
+_exporter: Optional[SpanExporter] = None
+_exporter_loaded = False
+_exporter_lock = threading.Lock()
+
+def get_span_exporter() -> Optional[SpanExporter]:
+    """Return the configured exporter, creating it on first use (None if tracing is off)."""
+    global _exporter, _exporter_loaded
+    if not _exporter_loaded:
+        with _exporter_lock:
+            if not _exporter_loaded:
+                if TRACING_EXPORTER == "console":
+                    _exporter = ConsoleSpanExporter()
+                elif TRACING_EXPORTER == "jsonl":
+                    _exporter = JsonlSpanExporter(TRACING_FILE)
+                _exporter_loaded = True
+    return _exporter
+
+def set_span_exporter(exporter: Optional[SpanExporter]) -> None:
+    """Replace the process-wide exporter (None turns tracing off)."""
+    global _exporter, _exporter_loaded
+    with _exporter_lock:
+        _exporter, _exporter_loaded = exporter, True
+
+def shutdown_tracing() -> None:
+    """Flush and close the exporter, if one was created."""
+    global _exporter
+    if _exporter is not None:
+        exporter, _exporter = _exporter, None
+        exporter.shutdown()
+
+def current_span() -> AnySpan:
+    """Return the active span (a no-op span outside of any recorded trace)."""
+    return _current_span.get() or _NOOP_SPAN
+
+def start_span(name: str, **attributes: Any) -> Tuple[AnySpan, Optional[Token]]:
+    """
+    Start a span as a child of the active one and make it active.
+
+    Prefer the ``span`` context manager; this pair exists for callers that
+    start and end spans in separate callbacks (e.g. SQLAlchemy events).
+
+    Returns:
+        The span and the token to pass to ``end_span``
+    """
+    parent = _current_span.get()
+    if get_span_exporter() is None:
+        return _NOOP_SPAN, None
+    if parent is None and random.random() >= TRACING_SAMPLE_RATE:
+        # Mark the whole request as unsampled so its children are skipped too
+        return _NOOP_SPAN, _current_span.set(_NOOP_SPAN)
+    if parent is not None and not parent.sampled:
+        return _NOOP_SPAN, None
+    new_span = Span(
+        name,
+        parent.trace_id if parent is not None else uuid.uuid4().hex,
+        parent.span_id if parent is not None else None,
+        attributes,
+    )
+    return new_span, _current_span.set(new_span)
+
+def end_span(span: AnySpan, token: Optional[Token], error: Optional[BaseException] = None) -> None:
+    """Finish a span from ``start_span``, restore its parent and export it."""
+    if token is not None:
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Ended in a different context than it started in; nothing to restore
+            pass
+    if not span.sampled:
+        return
+    span.finish(error)
+    exporter = get_span_exporter()
+    if exporter is None:
+        return
+    try:
+        exporter.export(span)
+    except Exception as e:
+        logger.warning("Failed to export span %s: %s", span.name, e)
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[AnySpan]:
+    """
+    Record the enclosed block as a span nested under the active one.
+
+    Works across ``await``: tasks created inside the block inherit it as
+    their parent.
+    """
+    active, token = start_span(name, **attributes)
+    try:
+        yield active
+    except BaseException as e:
+        end_span(active, token, e)
+        raise
+    else:
+        end_span(active, token)
+
+def traced(name: Optional[str] = None) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorate a coroutine function so each call is recorded as a span."""
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        span_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with span(span_name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+    return decorator
+
+def add_trace_context(_, __, event_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """structlog processor adding the active trace and span ids to each log line."""
+    active = _current_span.get()
+    if active is not None and active.sampled:
+        event_dict.setdefault("trace_id", active.trace_id)
+        event_dict.setdefault("span_id", active.span_id)
+    return event_dict
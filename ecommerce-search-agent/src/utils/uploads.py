@@ -0,0 +1,90 @@
+import os
+from dotenv import load_dotenv
+load_dotenv()
+from typing import AsyncGenerator, Tuple
+
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from src.utils.validators import detect_image_type
+
+MAX_IMAGE_UPLOAD_BYTES = int(os.environ.get("MAX_IMAGE_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+# Enough leading bytes to recognise every supported signature
+SNIFF_BYTES = 16
+
+async def _limited_stream(request: Request, max_bytes: int) -> AsyncGenerator[bytes, None]:
+    """Yield the request body, aborting as soon as it exceeds ``max_bytes``."""
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Upload exceeds {max_bytes} bytes",
+            )
+        yield chunk
+
+async def read_image_upload(
+    request: Request,
+    field: str = "image",
+    max_bytes: int = MAX_IMAGE_UPLOAD_BYTES,
+) -> Tuple[bytes, FormData]:
+    """
+    Parse a multipart image upload with an enforced size limit.
+
+    The body is streamed into a spooled temporary file (kept in memory while
+    small) and aborted once it passes ``max_bytes``, so oversized uploads are
+    never buffered in full. The image type is sniffed from the first bytes
+    only.
+
+    Args:
+        request: Incoming multipart/form-data request
+        field: Name of the file field
+        max_bytes: Maximum accepted request body size
+
+    Returns:
+        Tuple of (raw image bytes, remaining form fields)
+
+    Raises:
+        HTTPException: 413 if too large, 415 if not a supported image, 400 if malformed
+    """
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected multipart/form-data",
+        )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds {max_bytes} bytes",
+        )
+
+    parser = MultiPartParser(
+        request.headers,
+        _limited_stream(request, max_bytes),
+        max_files=1,
+        max_fields=8,
+    )
+    try:
+        form = await parser.parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message) from e
+
+    upload = form.get(field)
+    try:
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Missing file field '{field}'",
+            )
+        if detect_image_type(await upload.read(SNIFF_BYTES)) is None:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Unsupported image type",
+            )
+        await upload.seek(0)
+        return await upload.read(), form
+    finally:
+        await form.close()
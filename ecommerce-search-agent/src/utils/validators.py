@@ -1,6 +1,27 @@
 import base64
 from fastapi import HTTPException
 import re
+from typing import Optional
+
+def detect_image_type(data: bytes) -> Optional[str]:
+    """
+    Detect the image type from its leading signature bytes.
+
+    Args:
+        data: At least the first 12 bytes of the image
+
+    Returns:
+        Image subtype ("jpeg", "png", "gif", "webp") or None if unrecognized
+    """
+    if data.startswith(b'\xff\xd8'):
+        return 'jpeg'
+    if data.startswith(b'\x89PNG'):
+        return 'png'
+    if data.startswith(b'GIF87a') or data.startswith(b'GIF89a'):
+        return 'gif'
+    if data.startswith(b'RIFF') and data[8:12] == b'WEBP':
+        return 'webp'
+    return None
 
 def validate_base64_image(image_base64: str) -> str:
     """
@@ -41,15 +62,8 @@ def validate_base64_image(image_base64: str) -> str:
                 raise ValueError("Image data too small")
             
             # Detect image type from signature
-            if decoded.startswith(b'\xff\xd8'):
-                mime_type = 'jpeg'
-            elif decoded.startswith(b'\x89PNG'):
-                mime_type = 'png'
-            elif decoded.startswith(b'GIF87a') or decoded.startswith(b'GIF89a'):
-                mime_type = 'gif'
-            elif decoded.startswith(b'RIFF') and decoded[8:12] == b'WEBP':
-                mime_type = 'webp'
-            else:
+            mime_type = detect_image_type(decoded)
+            if mime_type is None:
                 raise ValueError("Invalid image format")
             
             # Return properly formatted data URL
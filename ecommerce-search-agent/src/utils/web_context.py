@@ -0,0 +1,180 @@
+import os
+import asyncio
+import abc
+import hashlib
+import json
+from dotenv import load_dotenv
+load_dotenv()
+from typing import Dict, List, Optional
+
+import httpx
+from redis.exceptions import RedisError
+
+from src.database.redis_client import get_redis
+from src.utils.duckduckgo_search import clean_query, parse_html_results
+from src.utils.logger import get_logger
+from src.utils.metrics import record_cache
+
+logger = get_logger(__name__)
+
+# duckduckgo | static | none
+WEB_CONTEXT_PROVIDER = os.environ.get("WEB_CONTEXT_PROVIDER", "duckduckgo").lower()
+WEB_CONTEXT_TIMEOUT = float(os.environ.get("WEB_CONTEXT_TIMEOUT_MS", "1500")) / 1000
+WEB_CONTEXT_MAX_CONNECTIONS = int(os.environ.get("WEB_CONTEXT_MAX_CONNECTIONS", "20"))
+# Web snippets about a product query change slowly; empty answers are retried sooner
+WEB_CONTEXT_CACHE_TTL = int(os.environ.get("WEB_CONTEXT_CACHE_TTL", str(7 * 86400)))
+WEB_CONTEXT_EMPTY_TTL = int(os.environ.get("WEB_CONTEXT_EMPTY_TTL", "600"))
+
+DUCKDUCKGO_HTML_URL = "https://html.duckduckgo.com/html/"
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+)
+
+class WebContextProvider(abc.ABC):
+    """Source of web search snippets used as query-understanding context."""
+
+    @abc.abstractmethod
+    async def search(self, query: str, max_results: int) -> List[Dict]:
+        """
+        Search the web for ``query``.
+
+        Args:
+            query: Cleaned search query
+            max_results: Maximum number of results to return
+
+        Returns:
+            List of results with title, href, and body
+        """
+
+    async def aclose(self) -> None:
+        """Release any resources held by the provider."""
+        # Optional hook: providers without clients or connections keep this no-op
+        return None
+
+class DuckDuckGoProvider(WebContextProvider):
+    """Scrapes the DuckDuckGo HTML endpoint over a pooled ``httpx.AsyncClient``."""
+
+    def __init__(
+        self,
+        timeout: float = WEB_CONTEXT_TIMEOUT,
+        max_connections: int = WEB_CONTEXT_MAX_CONNECTIONS,
+    ):
+        """
+        Initialize the provider.
+
+        Args:
+            timeout: Overall per-request timeout in seconds
+            max_connections: Size of the shared connection pool
+        """
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 0.5), pool=min(timeout, 0.2)),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+
+    async def search(self, query: str, max_results: int) -> List[Dict]:
+        response = await self.client.get(DUCKDUCKGO_HTML_URL, params={"q": query})
+        response.raise_for_status()
+        # HTML parsing is CPU-bound, keep it off the event loop
+        return await asyncio.to_thread(parse_html_results, response.text, max_results)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+class StaticWebContextProvider(WebContextProvider):
+    """Serves canned results, for tests, benchmarks and offline development."""
+
+    def __init__(self, results: Optional[Dict[str, List[Dict]]] = None, default: Optional[List[Dict]] = None):
+        """
+        Initialize the provider.
+
+        Args:
+            results: Results keyed by cleaned query
+            default: Results for queries not in ``results``
+        """
+        self.results = results or {}
+        self.default = default or []
+        self.calls = 0
+
+    async def search(self, query: str, max_results: int) -> List[Dict]:
+        self.calls += 1
+        return self.results.get(query, self.default)[:max_results]
+
+_provider: Optional[WebContextProvider] = None
+
+def get_web_context_provider() -> Optional[WebContextProvider]:
+    """Return the configured provider, creating it on first use (None if disabled)."""
+    global _provider
+    if _provider is None and WEB_CONTEXT_PROVIDER != "none":
+        _provider = StaticWebContextProvider() if WEB_CONTEXT_PROVIDER == "static" else DuckDuckGoProvider()
+    return _provider
+
+def set_web_context_provider(provider: Optional[WebContextProvider]) -> None:
+    """Replace the process-wide provider (e.g. with a StaticWebContextProvider in tests)."""
+    global _provider
+    _provider = provider
+
+async def close_web_context() -> None:
+    """Close the provider's connection pool, if one was created."""
+    global _provider
+    if _provider is not None:
+        provider, _provider = _provider, None
+        await provider.aclose()
+
+def _cache_key(query: str, max_results: int) -> str:
+    digest = hashlib.sha256(query.lower().encode("utf-8")).hexdigest()[:32]
+    return f"webctx:{digest}:{max_results}"
+
+async def get_web_context(query: str, max_results: int = 3) -> List[Dict]:
+    """
+    Return web search snippets for ``query``, served from Redis when possible.
+
+    Never raises: provider, parsing and cache errors yield an empty list or
+    skip the cache, so web context can only improve a search, never fail it.
+    Cancellation (e.g. by the stage deadline) still propagates.
+
+    Args:
+        query: Raw user query (cleaned before lookup)
+        max_results: Maximum number of results to return
+
+    Returns:
+        List of results with title, href, and body
+    """
+    provider = get_web_context_provider()
+    cleaned = clean_query(query)
+    if provider is None or not cleaned:
+        return []
+
+    key = _cache_key(cleaned, max_results)
+    try:
+        cached = await get_redis().get(key)
+        record_cache("web_context", cached is not None)
+        if cached is not None:
+            return json.loads(cached)
+    except (RedisError, ValueError) as e:
+        logger.warning("Web context cache read failed", error=str(e))
+
+    try:
+        results = await provider.search(cleaned, max_results)
+    except httpx.HTTPError as e:
+        logger.warning("Web context lookup failed", error=str(e), query=cleaned)
+        return []
+    except Exception as e:
+        # Scraped HTML can break the parser in arbitrary ways
+        logger.warning("Web context results could not be parsed", error=str(e), query=cleaned)
+        return []
+
+    try:
+        await get_redis().set(
+            key,
+            json.dumps(results),
+            ex=WEB_CONTEXT_CACHE_TTL if results else WEB_CONTEXT_EMPTY_TTL,
+        )
+    except (RedisError, TypeError) as e:
+        logger.warning("Web context cache write failed", error=str(e))
+    return results
@@ -0,0 +1,190 @@
+import os
+import asyncio
+import hashlib
+import re
+import time
+from dotenv import load_dotenv
+load_dotenv()
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
+
+from src.database.redis_client import get_redis
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+WEB_CONTEXT_OOV_THRESHOLD = float(os.environ.get("WEB_CONTEXT_OOV_THRESHOLD", "0.3"))
+WEB_CONTEXT_LONG_QUERY_TOKENS = int(os.environ.get("WEB_CONTEXT_LONG_QUERY_TOKENS", "10"))
+VOCABULARY_REFRESH_SECONDS = float(os.environ.get("WEB_CONTEXT_VOCABULARY_REFRESH_SECONDS", "900"))
+OUTCOME_TTL = 7 * 86400
+OUTCOME_KEY = "webctx:outcome:{digest}"
+# Log the running skip rate every this many decisions
+LOG_EVERY = 100
+
+# Words that carry intent but never appear in catalog text; they should not
+# count as unknown terms.
+STOPWORDS = frozenset("""
+a an and any are as at be best buy by can cheap cheapest for from good great
+have i in is it looking me my need new of on or price quality show
+some that the this to top under over want with without
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+def tokenize(query: str) -> List[str]:
+    """Lower-case the query and return its content words (no stopwords or bare numbers)."""
+    return [
+        token for token in _TOKEN.findall(query.lower())
+        if len(token) > 1 and not token.isdigit() and token not in STOPWORDS
+    ]
+
+class WebContextDecision(BaseModel):
+    """Whether a query should be given web context, and why."""
+    needed: bool
+    reason: str
+    oov_ratio: float = Field(default=0.0, ge=0.0, le=1.0)
+
+class WebContextClassifier:
+    """
+    Decides cheaply, before any network call, whether web context is worth
+    fetching for a query.
+
+    Signals, in order: what happened the last time this query was understood
+    without web context, query length (long queries describe themselves), and
+    the share of words not found in the catalog vocabulary (unknown brands,
+    slang, gift-style queries).
+    """
+
+    def __init__(
+        self,
+        vocabulary_loader: Optional[Callable[[], Awaitable[Set[str]]]] = None,
+        oov_threshold: float = WEB_CONTEXT_OOV_THRESHOLD,
+        long_query_tokens: int = WEB_CONTEXT_LONG_QUERY_TOKENS,
+    ):
+        """
+        Initialize the classifier.
+
+        Args:
+            vocabulary_loader: Coroutine returning the catalog vocabulary
+                (defaults to ``fetch_catalog_terms``)
+            oov_threshold: Unknown-word ratio at or above which web context is used
+            long_query_tokens: Queries with more content words than this skip web context
+        """
+        if vocabulary_loader is None:
+            from src.database.catalog import fetch_catalog_terms
+            vocabulary_loader = fetch_catalog_terms
+        self.vocabulary_loader = vocabulary_loader
+        self.oov_threshold = oov_threshold
+        self.long_query_tokens = long_query_tokens
+        self.vocabulary: Set[str] = set()
+        self._loaded_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.decisions = 0
+        self.skipped = 0
+        self.reasons: Dict[str, int] = {}
+
+    def _maybe_refresh(self) -> None:
+        """Reload the vocabulary in the background once it is stale."""
+        stale = time.monotonic() - self._loaded_at > VOCABULARY_REFRESH_SECONDS
+        if stale and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self.refresh_vocabulary())
+
+    async def refresh_vocabulary(self) -> None:
+        """Load the catalog vocabulary now."""
+        try:
+            self.vocabulary = await self.vocabulary_loader()
+            logger.info("Web context vocabulary loaded", terms=len(self.vocabulary))
+        except Exception as e:
+            logger.error("Failed to load web context vocabulary", error=str(e))
+        # Also after a failure, so an unreachable database is not hammered
+        self._loaded_at = time.monotonic()
+
+    def _known(self, token: str) -> bool:
+        """Whether the token, or its singular/plural form, is in the vocabulary."""
+        return (
+            token in self.vocabulary
+            or (token.endswith("s") and token[:-1] in self.vocabulary)
+            or f"{token}s" in self.vocabulary
+        )
+
+    @staticmethod
+    def _outcome_key(tokens: List[str]) -> str:
+        digest = hashlib.sha256(" ".join(sorted(tokens)).encode("utf-8")).hexdigest()[:32]
+        return OUTCOME_KEY.format(digest=digest)
+
+    async def decide(self, query: str) -> WebContextDecision:
+        """
+        Decide whether ``query`` needs web context.
+
+        Args:
+            query: The user's search query
+
+        Returns:
+            The decision with the signal that drove it
+        """
+        self._maybe_refresh()
+        tokens = tokenize(query)
+        decision = await self._decide(tokens)
+
+        self.decisions += 1
+        self.skipped += not decision.needed
+        self.reasons[decision.reason] = self.reasons.get(decision.reason, 0) + 1
+        logger.debug("Web context decision", query=query, **decision.dict())
+        if self.decisions % LOG_EVERY == 0:
+            logger.info(
+                "Web context skip rate",
+                decisions=self.decisions,
+                skip_rate=round(self.skipped / self.decisions, 3),
+                reasons=self.reasons,
+            )
+        return decision
+
+    async def _decide(self, tokens: List[str]) -> WebContextDecision:
+        if not tokens:
+            return WebContextDecision(needed=False, reason="no_content_words")
+
+        try:
+            outcome = await get_redis().get(self._outcome_key(tokens))
+        except RedisError as e:
+            logger.warning("Could not read web context outcome", error=str(e))
+            outcome = None
+        if outcome:
+            return WebContextDecision(needed=outcome == "weak", reason="past_outcome")
+
+        if len(tokens) > self.long_query_tokens:
+            return WebContextDecision(needed=False, reason="long_query")
+        if not self.vocabulary:
+            # Without a vocabulary there is nothing to judge by; keep the old behaviour
+            return WebContextDecision(needed=True, reason="no_vocabulary")
+
+        unknown = sum(not self._known(token) for token in tokens)
+        oov_ratio = unknown / len(tokens)
+        if oov_ratio >= self.oov_threshold:
+            return WebContextDecision(needed=True, reason="unknown_terms", oov_ratio=oov_ratio)
+        return WebContextDecision(needed=False, reason="in_vocabulary", oov_ratio=oov_ratio)
+
+    async def record_outcome(self, query: str, understood: bool, used_web_context: bool) -> None:
+        """
+        Remember how understanding went without web context.
+
+        A query that was not understood (no category or features) without web
+        context gets it next time; one that was understood keeps skipping it.
+
+        Args:
+            query: The user's search query
+            understood: Whether understanding produced usable structure
+            used_web_context: Whether web context was part of the prompt
+        """
+        tokens = tokenize(query)
+        if used_web_context or not tokens:
+            return
+        try:
+            await get_redis().set(
+                self._outcome_key(tokens),
+                "ok" if understood else "weak",
+                ex=OUTCOME_TTL,
+            )
+        except RedisError as e:
+            logger.warning("Could not record web context outcome", error=str(e))
@@ -0,0 +1,24 @@
+import asyncio
+import signal
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from src.agents.admin_agent import AdminWorker
+from src.utils.logger import configure_logging, get_logger
+
+# Configure logging
+configure_logging()
+logger = get_logger(__name__)
+
+async def main() -> None:
+    """Run the admin task worker until SIGINT/SIGTERM."""
+    worker = AdminWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run_forever()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,34 @@
+import pytest
+
+from benchmarks.fakes import InMemoryCollection, hash_embedding
+from benchmarks.run import percentile, run_benchmark
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 0.50) == 51.0
+    assert percentile(values, 0.99) == 100.0
+    assert percentile([], 0.95) == 0.0
+
+
+def test_in_memory_collection_ranks_by_shared_words():
+    collection = InMemoryCollection()
+    collection.add(
+        ids=["1", "2"],
+        embeddings=[hash_embedding("wireless gaming mouse"), hash_embedding("kitchen kettle")],
+        metadatas=[{"category": "Computers"}, {"category": "Kitchen"}],
+    )
+    result = collection.query([hash_embedding("wireless mouse")], n_results=2)
+    assert result["ids"][0][0] == "1"
+    assert collection.query([hash_embedding("mouse")], n_results=2, where={"category": "Kitchen"})["ids"] == [["2"]]
+
+
+@pytest.mark.asyncio
+async def test_benchmark_runs_every_endpoint_offline():
+    report = await run_benchmark(requests=30, concurrency=4, warmup=5, catalog_size=200, query_pool=10, image_pool=3)
+
+    endpoints = report["endpoints"]
+    assert set(endpoints) == {"text", "image", "recommendations", "all"}
+    assert endpoints["all"]["requests"] == 30
+    assert endpoints["all"]["errors"] == 0
+    assert endpoints["all"]["p50_ms"] <= endpoints["all"]["p99_ms"]
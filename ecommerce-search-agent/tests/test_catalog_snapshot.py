@@ -0,0 +1,233 @@
+from decimal import Decimal
+
+import fakeredis
+import pytest
+
+from src.agents import recommendation_agent as recommendation_module
+from src.agents.recommendation_agent import RecommendationAgent
+from src.agents.search_agent import SearchAgent
+from src.api.responses import SEARCH_RESPONSE, encode_response
+from src.chains.query_understanding import PriceRange, QueryUnderstandingResult
+from src.database import catalog_snapshot, redis_client
+from src.database.catalog_snapshot import CatalogFilter, CatalogSnapshot
+from src.database.product_cache import ProductCache
+
+# (id, price, rating, stock, inStock, category)
+ROWS = [
+    (5, Decimal("50.00"), 4.5, 3, True, "Laptops"),
+    (1, Decimal("10.00"), None, 0, False, "Headphones"),
+    (3, Decimal("30.00"), 3.0, 7, None, "Gaming Laptops"),
+    (2, Decimal("20.00"), 4.0, 2, True, "Headphones"),
+    (4, None, 5.0, 1, True, None),
+]
+
+
+def make_product(id_, price, category):
+    return {
+        "id": id_,
+        "name": f"Product {id_}",
+        "price": Decimal(str(price)),
+        "images": [],
+        "rating": 4,
+        "inStock": True,
+        "stock": 1,
+        "features": [],
+        "category_name": category,
+    }
+
+
+async def load_products(ids):
+    catalog = {row[0]: make_product(row[0], row[1] or 0, row[5]) for row in ROWS}
+    return [catalog[id_] for id_ in ids if id_ in catalog]
+
+
+@pytest.fixture(autouse=True)
+def snapshot(monkeypatch):
+    monkeypatch.setattr(redis_client, "_redis", fakeredis.aioredis.FakeRedis(decode_responses=True))
+    snapshot = CatalogSnapshot.from_rows(ROWS)
+    monkeypatch.setattr(catalog_snapshot, "_snapshot", snapshot)
+    return snapshot
+
+
+def test_rows_are_sorted_by_id_and_nulls_get_defaults(snapshot):
+    assert snapshot.ids.tolist() == [1, 2, 3, 4, 5]
+    assert snapshot.price.tolist() == [10.0, 20.0, 30.0, 0.0, 50.0]
+    assert snapshot.in_stock.tolist() == [False, True, True, True, True]
+    assert snapshot.categories[snapshot.category_codes[3]] == ""
+    assert len(snapshot) == 5 and snapshot.nbytes > 0
+
+
+def test_mask_combines_filters(snapshot):
+    filters = CatalogFilter(category="laptop", max_price=40)
+    assert snapshot.ids[snapshot.mask(filters)].tolist() == [3]
+    filters = CatalogFilter(in_stock=True, min_rating=4)
+    assert snapshot.ids[snapshot.mask(filters)].tolist() == [2, 4, 5]
+
+
+def test_filter_ids_keeps_order_and_unknown_ids(snapshot):
+    filters = CatalogFilter(min_price=15)
+    assert snapshot.filter_ids([5, 99, 1, 2], filters) == [5, 99, 2]
+    assert snapshot.filter_ids([5, 1], CatalogFilter()) == [5, 1]
+
+
+def test_select_returns_cheapest_first(snapshot):
+    assert snapshot.select(CatalogFilter(category="laptops"), limit=5) == [3, 5]
+    assert snapshot.select(CatalogFilter(), limit=2) == [4, 1]
+
+
+@pytest.mark.asyncio
+async def test_failed_refresh_keeps_the_previous_snapshot(snapshot):
+    async def failing_loader():
+        raise RuntimeError("database down")
+        yield []
+
+    assert await catalog_snapshot.refresh_catalog_snapshot(failing_loader) is None
+    assert catalog_snapshot.get_catalog_snapshot() is snapshot
+
+    async def loader():
+        yield ROWS[:2]
+        yield ROWS[2:]
+
+    fresh = await catalog_snapshot.refresh_catalog_snapshot(loader)
+    assert fresh is not snapshot and catalog_snapshot.get_catalog_snapshot() is fresh
+    assert len(fresh) == 5
+
+
+@pytest.mark.asyncio
+async def test_category_price_queries_skip_sql_generation():
+    agent = SearchAgent(tools=[], product_cache=ProductCache(loader=load_products, redis_ttl=0))
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("SQL generation should not run")
+
+    agent.sql_generation.run = fail
+    understanding = QueryUnderstandingResult(category="laptops", price_range=PriceRange(max=45))
+
+    products = await agent._sql_search(understanding, limit=10)
+
+    assert [(p["id"], p["price"], p["score"]) for p in products] == [(3, 30.0, 1.0)]
+
+
+@pytest.mark.asyncio
+async def test_snapshot_search_orders_like_the_generated_sql(monkeypatch):
+    # Two laptops share a price: cheapest first, then by id
+    rows = ROWS + [(6, Decimal("30.00"), 4.0, 1, True, "Laptops")]
+    monkeypatch.setattr(catalog_snapshot, "_snapshot", CatalogSnapshot.from_rows(rows))
+
+    async def load(ids):
+        catalog = {row[0]: make_product(row[0], row[1] or 0, row[5]) for row in rows}
+        return [catalog[id_] for id_ in ids if id_ in catalog]
+
+    agent = SearchAgent(tools=[], product_cache=ProductCache(loader=load, redis_ttl=0))
+    understanding = QueryUnderstandingResult(category="laptop")
+
+    products = await agent._snapshot_search(understanding, limit=10)
+
+    assert [p["id"] for p in products] == [3, 6, 5]
+    assert {p["score"] for p in products} == {1.0}
+
+
+def test_is_empty_checks_every_filter():
+    assert CatalogFilter().is_empty()
+    assert not CatalogFilter(in_stock=False).is_empty()
+    assert not CatalogFilter(min_price=0).is_empty()
+
+
+def test_snapshot_is_not_used_for_feature_queries():
+    agent = SearchAgent(tools=[], product_cache=ProductCache(loader=load_products, redis_ttl=0))
+    understanding = QueryUnderstandingResult(category="laptops", features=["backlit keyboard"])
+    vector_hits = [{"id": "5", "metadata": {"backend_id": 5}}]
+    assert agent._filter_vector_results(vector_hits, understanding) == vector_hits
+
+
+@pytest.mark.asyncio
+async def test_vector_hits_outside_the_price_range_are_dropped():
+    agent = SearchAgent(tools=[], product_cache=ProductCache(loader=load_products, redis_ttl=0))
+    understanding = QueryUnderstandingResult(price_range=PriceRange(min=15, max=40))
+    vector_hits = [
+        {"id": "5", "metadata": {"backend_id": 5}},
+        {"id": "3", "metadata": {"backend_id": 3}},
+        {"id": "1", "metadata": {"backend_id": 1}},
+        {"id": "2", "metadata": {}},
+    ]
+
+    kept = agent._filter_vector_results(vector_hits, understanding)
+
+    assert [hit["id"] for hit in kept] == ["3", "2"]
+
+
+@pytest.fixture
+def similar_to_everything(monkeypatch):
+    class Collection:
+        def get(self, ids, include=None):
+            return {"embeddings": [[1.0]]}
+
+        def query(self, query_embeddings, n_results):
+            ids = ["9", "5", "3", "2", "1"][:n_results]
+            return {
+                "ids": [ids],
+                "metadatas": [[{"backend_id": int(id_)} for id_ in ids]],
+                "distances": [[0.1 * i for i in range(len(ids))]],
+            }
+
+    async def get_collection():
+        return Collection()
+
+    monkeypatch.setattr(recommendation_module, "get_collection", get_collection)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("with_snapshot", [True, False])
+async def test_recommendations_are_filtered(monkeypatch, similar_to_everything, with_snapshot):
+    if not with_snapshot:
+        monkeypatch.setattr(catalog_snapshot, "_snapshot", None)
+    agent = RecommendationAgent(product_cache=ProductCache(loader=load_products, redis_ttl=0))
+
+    result = await agent.recommend("9", n_results=1, filters=CatalogFilter(category="headphones", min_price=15))
+
+    assert [str(r["id"]) for r in result["recommendations"]] == ["2"]
+
+
+def test_facets_count_categories_price_buckets_and_stock(snapshot):
+    rows = snapshot.candidate_rows([5, 2, 99], CatalogFilter(category="headphones"))
+
+    facets = snapshot.facets(rows, price_edges=[25, 100])
+
+    assert snapshot.ids[rows].tolist() == [1, 2, 5]
+    assert facets == {
+        "total": 3,
+        "in_stock": 2,
+        "categories": [{"name": "Headphones", "count": 2}, {"name": "Laptops", "count": 1}],
+        "price": [
+            {"min": 0.0, "max": 25.0, "count": 2},
+            {"min": 25.0, "max": 100.0, "count": 1},
+            {"min": 100.0, "max": None, "count": 0},
+        ],
+    }
+
+
+def test_search_facets_cover_candidates_beyond_the_returned_products(monkeypatch):
+    agent = SearchAgent(tools=[], product_cache=ProductCache(loader=load_products, redis_ttl=0))
+    understanding = QueryUnderstandingResult(category="laptops")
+
+    facets = agent._facets([4], understanding)
+
+    assert facets["scope"] == "filtered" and facets["total"] == 3
+    assert {facet["name"] for facet in facets["categories"]} == {"Laptops", "Gaming Laptops"}
+    encode_response(SEARCH_RESPONSE, {"products": [], "total": 0, "facets": facets})
+
+    # Without a category or price range only the retrieved products are counted
+    facets = agent._facets([4, 2], QueryUnderstandingResult(features=["wireless"]))
+    assert facets["scope"] == "retrieved" and facets["total"] == 2
+
+    monkeypatch.setattr(catalog_snapshot, "_snapshot", None)
+    assert agent._facets([4], understanding) is None
+
+
+def test_prices_on_a_bucket_edge_count_in_the_bucket_above(snapshot):
+    rows = snapshot.candidate_rows([1, 2, 3, 4, 5])
+
+    facets = snapshot.facets(rows, price_edges=[10, 50])
+
+    # 10.00 and 50.00 sit on edges: buckets are [0, 10), [10, 50) and [50, ...)
+    assert [bucket["count"] for bucket in facets["price"]] == [1, 3, 1]
@@ -0,0 +1,225 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import asyncpg
+import fakeredis
+import pytest
+
+from src.database import chromadb_client, product_cache, redis_client
+from src.database.product_cache import ProductCache
+from src.embeddings import change_capture
+from src.embeddings.change_capture import CatalogChangeListener, ChangeBatch, ChangeCaptureConfig
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+class FakeConnection:
+    def __init__(self, notifications=()):
+        self.notifications = list(notifications)
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        for payload in self.notifications:
+            callback(self, 1, channel, payload)
+
+    async def fetchval(self, query):
+        return NOW
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    return redis
+
+
+def make_listener():
+    return CatalogChangeListener(ChangeCaptureConfig(debounce_seconds=0.05, retry_seconds=0.1, reconnect_seconds=0.5))
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_retried_with_newer_changes(monkeypatch, redis):
+    listener = make_listener()
+    connection = FakeConnection(['{"table": "products", "op": "UPDATE", "id": 1}'])
+
+    async def connect(dsn):
+        return connection
+
+    applied = []
+
+    async def apply(batch):
+        if not applied:
+            applied.append(None)
+            listener._changes.put_nowait({"table": "products", "op": "DELETE", "id": 1})
+            listener._changes.put_nowait({"table": "products", "op": "UPDATE", "id": 2})
+            raise RuntimeError("chroma down")
+        applied.append(batch)
+        listener.stop()
+
+    monkeypatch.setattr(change_capture.asyncpg, "connect", connect)
+    listener.apply = apply
+
+    await asyncio.wait_for(listener.run_forever(), timeout=5)
+
+    assert applied[1].product_ids == {2}
+    assert applied[1].deleted_product_ids == {1}
+
+
+@pytest.mark.asyncio
+async def test_sync_point_does_not_advance_past_a_failed_batch(monkeypatch, redis):
+    synced_at = NOW - timedelta(minutes=5)
+    await redis.set(change_capture.SYNCED_AT_KEY, synced_at.isoformat())
+    listener = make_listener()
+    connection = FakeConnection(['{"table": "products", "op": "UPDATE", "id": 1}'])
+
+    async def connect(dsn):
+        return connection
+
+    async def fetch_ids_updated_since(since):
+        return [], []
+
+    async def apply(batch):
+        listener.stop()
+        raise RuntimeError("chroma down")
+
+    monkeypatch.setattr(change_capture.asyncpg, "connect", connect)
+    monkeypatch.setattr(change_capture, "fetch_ids_updated_since", fetch_ids_updated_since)
+    listener.apply = apply
+
+    await asyncio.wait_for(listener.run_forever(), timeout=5)
+
+    # The queued notification kept the catch-up from advancing it, and so did the failure
+    assert await redis.get(change_capture.SYNCED_AT_KEY) == synced_at.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_restart_catches_up_from_the_persisted_sync_point(monkeypatch, redis):
+    await redis.set(change_capture.SYNCED_AT_KEY, (NOW - timedelta(minutes=5)).isoformat())
+    listener = make_listener()
+    connections = [FakeConnection()]
+    seen_since = []
+
+    async def connect(dsn):
+        if not connections:
+            raise asyncpg.InterfaceError("connection refused")
+        return connections.pop()
+
+    async def fetch_ids_updated_since(since):
+        seen_since.append(since)
+        return [7, 8], ["cat-1"]
+
+    batches = []
+
+    async def apply(batch):
+        batches.append(batch)
+        listener.stop()
+
+    monkeypatch.setattr(change_capture.asyncpg, "connect", connect)
+    monkeypatch.setattr(change_capture, "fetch_ids_updated_since", fetch_ids_updated_since)
+    listener.apply = apply
+
+    await asyncio.wait_for(listener.run_forever(), timeout=5)
+
+    assert seen_since == [NOW - timedelta(minutes=6)]
+    assert batches[0].product_ids == {7, 8} and batches[0].category_ids == {"cat-1"}
+    assert listener._synced_at == NOW
+    assert await redis.get(change_capture.SYNCED_AT_KEY) == NOW.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_first_run_starts_the_sync_point_at_connect(monkeypatch, redis):
+    listener = make_listener()
+
+    async def connect(dsn):
+        listener.stop()
+        return FakeConnection()
+
+    async def fetch_ids_updated_since(since):
+        raise AssertionError("nothing to catch up on")
+
+    monkeypatch.setattr(change_capture.asyncpg, "connect", connect)
+    monkeypatch.setattr(change_capture, "fetch_ids_updated_since", fetch_ids_updated_since)
+
+    await asyncio.wait_for(listener.run_forever(), timeout=5)
+
+    assert await redis.get(change_capture.SYNCED_AT_KEY) == NOW.isoformat()
+
+
+def test_batch_keeps_the_latest_change_per_product():
+    batch = ChangeBatch()
+    batch.add({"table": "products", "op": "PATCH", "id": 3, "patch": {"price": 5}})
+    batch.add({"table": "products", "op": "UPDATE", "id": 3})
+    batch.add({"table": "products", "op": "DELETE", "id": 4})
+    batch.add({"table": "products", "op": "INSERT", "id": 4})
+
+    assert batch.product_ids == {3, 4}
+    assert not batch.patches and not batch.deleted_product_ids
+
+
+@pytest.mark.asyncio
+async def test_invalidation_targets_rankings_and_retires_search_results(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    monkeypatch.setattr(product_cache, "_product_cache", ProductCache(loader=None, redis_ttl=0))
+    await redis_client.set_cache_field("recommend:1", "5", [[2, 0.9]])
+    await redis_client.set_cache_field("recommend:2", "5", [[1, 0.9]])
+    generation = await redis_client.get_catalog_generation()
+
+    await make_listener()._invalidate_caches({1})
+
+    assert await redis_client.get_cache_field("recommend:1", "5") is None
+    assert await redis_client.get_cache_field("recommend:2", "5") == [[1, 0.9]]
+    assert await redis_client.get_catalog_generation() == generation + 1
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+        self.deleted = []
+
+    def delete(self, ids):
+        self.deleted.extend(ids)
+
+
+@pytest.mark.asyncio
+async def test_changes_are_written_to_the_collection_being_rebuilt(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    monkeypatch.setattr(chromadb_client, "_chroma_client", object())
+    monkeypatch.setattr(chromadb_client, "_get_or_create_collection", lambda name: FakeCollection(name))
+    monkeypatch.setattr(chromadb_client, "_collections", {})
+
+    await chromadb_client.swap_alias("products_v1")
+    await chromadb_client.set_building_collection("products_v2")
+    assert [c.name for c in await chromadb_client.get_write_collections()] == ["products_v1", "products_v2"]
+
+    await chromadb_client.swap_alias("products_v2")
+    assert [c.name for c in await chromadb_client.get_write_collections()] == ["products_v2"]
+
+    live, building = FakeCollection("products_v1"), FakeCollection("products_v2")
+
+    async def get_write_collections():
+        return [live, building]
+
+    async def fetch_products_by_ids(ids):
+        return []
+
+    async def invalidate(product_ids):
+        pass
+
+    monkeypatch.setattr(change_capture, "get_write_collections", get_write_collections)
+    monkeypatch.setattr(change_capture, "fetch_products_by_ids", fetch_products_by_ids)
+    listener = make_listener()
+    listener._invalidate_caches = invalidate
+    batch = ChangeBatch()
+    batch.add({"table": "products", "op": "DELETE", "id": 9})
+
+    await listener.apply(batch)
+
+    assert live.deleted == ["9"] and building.deleted == ["9"]
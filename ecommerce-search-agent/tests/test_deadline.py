@@ -0,0 +1,126 @@
+import asyncio
+import time
+
+import pytest
+
+from src.agents import search_agent as search_module
+from src.chains.query_understanding import QueryUnderstandingResult
+from src.database.product_cache import ProductCache
+from src.utils import web_context_classifier
+from src.utils.deadline import Deadline, StageTimeout, run_stage
+from src.utils.web_context_classifier import WebContextClassifier
+
+
+def test_timeout_respects_cap_and_reserve():
+    deadline = Deadline(1.0)
+    assert deadline.timeout(cap=0.2) == pytest.approx(0.2)
+    assert deadline.timeout(reserve=0.7) == pytest.approx(0.3, abs=0.05)
+    assert deadline.timeout(reserve=5) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_run_stage_times_out():
+    with pytest.raises(StageTimeout) as exc:
+        await run_stage("slow", asyncio.sleep(1), Deadline(0.1))
+    assert exc.value.stage == "slow"
+
+
+@pytest.mark.asyncio
+async def test_run_stage_skips_when_budget_is_spent():
+    deadline = Deadline(0.5)
+    with pytest.raises(StageTimeout):
+        await run_stage("late", asyncio.sleep(0), deadline, reserve=0.5)
+
+
+class FakeRedis:
+    async def get(self, key):
+        return None
+
+    async def set(self, key, value, ex=None):
+        pass
+
+
+async def empty_vocabulary():
+    return set()
+
+
+async def load_products(ids):
+    return [{"id": 7, "name": "Mouse", "price": 10.0, "category_name": "Computers"} for id_ in ids if id_ == 7]
+
+
+@pytest.fixture
+def agent(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    cache = {}
+
+    async def get_cache(key):
+        return cache.get(key)
+
+    async def set_cache(key, value, ttl=None):
+        cache[key] = value
+
+    async def vector_search(query, n_results=5):
+        return [{"id": "7", "distance": 0.2, "metadata": {"backend_id": 7}}]
+
+    monkeypatch.setattr(search_module, "get_cache", get_cache)
+    monkeypatch.setattr(search_module, "set_cache", set_cache)
+    monkeypatch.setattr(search_module, "pgvector_enabled", lambda: False)
+    monkeypatch.setattr(search_module, "search_similar_products", vector_search)
+    monkeypatch.setattr(web_context_classifier, "get_redis", lambda: FakeRedis())
+    budget = search_module.SearchBudgetConfig(
+        total_seconds=1.0,
+        web_context_seconds=0.1,
+        understanding_seconds=0.3,
+        retrieval_seconds=0.3,
+    )
+    # No vocabulary, so web context is always requested
+    classifier = WebContextClassifier(vocabulary_loader=empty_vocabulary)
+    agent = search_module.SearchAgent(
+        budget=budget,
+        web_context_classifier=classifier,
+        product_cache=ProductCache(loader=load_products, redis_ttl=0),
+    )
+    agent.cache = cache
+    return agent
+
+
+@pytest.mark.asyncio
+async def test_slow_stages_degrade_instead_of_stalling(agent, monkeypatch):
+    async def slow_web_search(query, max_results=3):
+        await asyncio.sleep(0.5)
+        return []
+
+    async def slow_understanding(query, chat_history=None):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(search_module, "get_web_context", slow_web_search)
+    monkeypatch.setattr(agent.query_understanding, "run", slow_understanding)
+
+    started = time.monotonic()
+    result = await agent.search("wireless mouse")
+
+    assert time.monotonic() - started < 1.0
+    assert result["degradations"] == ["no_web_context", "no_understanding", "vector_only"]
+    assert [p["id"] for p in result["products"]] == [7]
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_cached_understanding(agent, monkeypatch):
+    async def slow_understanding(query, chat_history=None):
+        await asyncio.sleep(5)
+
+    async def sql_search(understanding, limit):
+        assert understanding.category == "mouse"
+        return []
+
+    agent.cache["understanding:wireless mouse"] = QueryUnderstandingResult(category="mouse").dict()
+    async def no_web_context(query, max_results=3):
+        return []
+
+    monkeypatch.setattr(search_module, "get_web_context", no_web_context)
+    monkeypatch.setattr(agent.query_understanding, "run", slow_understanding)
+    monkeypatch.setattr(agent, "_sql_search", sql_search)
+
+    result = await agent.search("wireless mouse")
+
+    assert result["degradations"] == ["cached_understanding"]
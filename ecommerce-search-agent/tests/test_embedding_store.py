@@ -0,0 +1,50 @@
+import pytest
+
+from src.embeddings import generator
+from src.embeddings.store import EmbeddingStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "store.sqlite3"), max_rows=3)
+    yield store
+    store.close()
+
+
+def test_vectors_round_trip(store):
+    store.put_many([("a", "m", [1.0, 2.5])])
+    assert store.get_many(["a", "missing"]) == {"a": [1.0, 2.5]}
+
+
+def test_least_recently_used_vectors_are_evicted(store):
+    store.put_many([(key, "m", [1.0]) for key in "abc"])
+    store._conn.executemany(
+        "UPDATE embeddings SET last_used_at = ? WHERE key = ?",
+        [(30, "a"), (10, "b"), (20, "c")],
+    )
+    store._written_since_check = 1000
+
+    store.put_many([("d", "m", [1.0])])
+
+    assert set(store.get_many("abcd")) == {"a", "c", "d"}
+
+
+def test_recent_reads_do_not_write(store):
+    store.put_many([("a", "m", [1.0])])
+    before = store._conn.total_changes
+    store.get_many(["a"])
+    assert store._conn.total_changes == before
+
+
+@pytest.mark.asyncio
+async def test_query_embeddings_bypass_the_store(monkeypatch, store):
+    async def request_embeddings(texts, model):
+        return [[0.5] for _ in texts]
+
+    monkeypatch.setattr(generator, "_request_embeddings", request_embeddings)
+    monkeypatch.setattr(generator, "get_embedding_store", lambda: store)
+
+    await generator.generate_query_embedding("wireless mouse")
+    assert store.count() == 0
+    await generator.generate_embeddings(["Product 1 desc"])
+    assert store.count() == 1
@@ -0,0 +1,38 @@
+import base64
+import io
+
+from PIL import Image
+
+from src.utils.image_hash import decode_data_url, dhash, hamming_distance
+
+
+def _png_bytes(size):
+    image = Image.new("RGB", size)
+    for x in range(size[0]):
+        for y in range(size[1]):
+            image.putpixel((x, y), ((x * 255) // size[0], (y * 255) // size[1], 128))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_hamming_distance():
+    assert hamming_distance(0b1011, 0b1011) == 0
+    assert hamming_distance(0b1011, 0b0010) == 2
+
+
+def test_decode_data_url():
+    data = b"not really an image"
+    url = "data:image/png;base64," + base64.b64encode(data).decode()
+    assert decode_data_url(url) == data
+
+
+def test_dhash_is_stable_across_resizes():
+    original = dhash(_png_bytes((64, 48)))
+    resized = dhash(_png_bytes((320, 240)))
+    assert original is not None
+    assert hamming_distance(original, resized) <= 3
+
+
+def test_dhash_returns_none_for_garbage():
+    assert dhash(b"not an image") is None
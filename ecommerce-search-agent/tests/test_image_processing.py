@@ -0,0 +1,67 @@
+import io
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from PIL import Image
+
+from src.agents import image_agent
+from src.agents.image_agent import ImageAgent
+from src.utils import image_hash
+from src.utils.image_hash import dhash
+from src.utils.image_processing import downscale_image
+from src.utils.validators import detect_image_type
+
+
+def _encode(image, fmt):
+    buffer = io.BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def test_detect_image_type():
+    assert detect_image_type(b"\xff\xd8\xff\xe0") == "jpeg"
+    assert detect_image_type(b"\x89PNG\r\n\x1a\n") == "png"
+    assert detect_image_type(b"RIFF\x00\x00\x00\x00WEBP") == "webp"
+    assert detect_image_type(b"plain text") is None
+
+
+def test_large_image_is_downscaled_to_jpeg():
+    image = Image.effect_noise((3000, 2000), 64).convert("RGB")
+    data, image_type = downscale_image(_encode(image, "PNG"), max_dimension=1024)
+    assert image_type == "jpeg"
+    with Image.open(io.BytesIO(data)) as result:
+        assert max(result.size) == 1024
+
+
+def test_transparent_image_is_flattened():
+    image = Image.new("RGBA", (2000, 2000), (255, 0, 0, 0))
+    data, image_type = downscale_image(_encode(image, "PNG"), max_dimension=512)
+    if image_type == "jpeg":
+        with Image.open(io.BytesIO(data)) as result:
+            assert result.mode == "RGB"
+
+
+def test_rejects_non_images():
+    with pytest.raises(ValueError):
+        downscale_image(b"definitely not an image")
+
+
+def test_prepare_image_decodes_once(monkeypatch):
+    image = Image.effect_noise((1600, 1200), 64).convert("RGB")
+    data = _encode(image, "PNG")
+    decodes = []
+
+    def counting_open_image(image_bytes):
+        decodes.append(len(image_bytes))
+        return image_hash.open_image(image_bytes)
+
+    monkeypatch.setattr(image_agent, "open_image", counting_open_image)
+    monkeypatch.setattr("src.utils.image_processing.open_image", counting_open_image)
+
+    phash, content_hash, url = ImageAgent._prepare_image(data)
+
+    assert decodes == [len(data)]
+    assert phash == dhash(data)
+    assert url.startswith("data:image/jpeg;base64,")
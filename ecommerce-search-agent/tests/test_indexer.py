@@ -0,0 +1,216 @@
+from decimal import Decimal
+
+import pytest
+from src.embeddings import indexer
+from src.embeddings.indexer import IndexerConfig, index_products
+
+class FakeCollection:
+    """Minimal in-memory stand-in for a ChromaDB collection."""
+    def __init__(self):
+        self.rows = {}
+
+    def get(self, ids, include=None):
+        found = [id_ for id_ in ids if id_ in self.rows]
+        result = {"ids": found, "metadatas": [self.rows[id_]["metadata"] for id_ in found]}
+        if include and "embeddings" in include:
+            result["embeddings"] = [self.rows[id_]["embedding"] for id_ in found]
+        return result
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        for id_, embedding, metadata in zip(ids, embeddings, metadatas, strict=True):
+            self.rows[id_] = {"embedding": embedding, "metadata": metadata}
+
+    def update(self, ids, metadatas):
+        for id_, metadata in zip(ids, metadatas, strict=True):
+            self.rows[id_]["metadata"].update(metadata)
+
+def make_products(n):
+    return [{"id": i, "name": f"Product {i}", "description": "desc", "price": 10.0} for i in range(n)]
+
+@pytest.mark.asyncio
+async def test_index_products_batches_and_skips_unchanged(monkeypatch):
+    fake = FakeCollection()
+    calls = []
+    async def fake_generate_embeddings(texts, model):
+        calls.append(len(texts))
+        return [[float(len(text))] for text in texts]
+    monkeypatch.setattr(indexer, "generate_embeddings", fake_generate_embeddings)
+
+    config = IndexerConfig(batch_size=4, max_concurrency=2)
+    stats = await index_products(make_products(10), config, target=fake)
+    assert stats.processed == 10
+    assert stats.embedded == 10
+    assert sorted(calls) == [2, 4, 4]
+    assert stats.watermark == 9
+    assert stats.watermark_count == 10
+
+    products = make_products(10)
+    products[3]["price"] = 99.0
+    products[5]["description"] = "changed"
+    calls.clear()
+    stats = await index_products(products, config, target=fake)
+    assert stats.embedded == 1
+    assert stats.refreshed == 1
+    assert stats.unchanged == 8
+    assert calls == [1]
+    assert fake.rows["3"]["metadata"]["price"] == 99.0
+
+@pytest.mark.asyncio
+async def test_patch_products_metadata_skips_embedding(monkeypatch):
+    fake = FakeCollection()
+    fake.rows["7"] = {"embedding": [1.0], "metadata": {"name": "Product 7", "price": 10.0, "in_stock": True}}
+    async def no_embeddings(texts, model):
+        raise AssertionError("metadata patches must not embed")
+    monkeypatch.setattr(indexer, "generate_embeddings", no_embeddings)
+
+    patched = await indexer.patch_products_metadata([{"id": 7, "price": 12.5, "inStock": False}], target=fake)
+    assert patched == 1
+    assert fake.rows["7"]["metadata"] == {"name": "Product 7", "price": 12.5, "in_stock": False}
+
+@pytest.mark.asyncio
+async def test_index_product_reuses_unchanged_embedding(monkeypatch):
+    fake = FakeCollection()
+    calls = []
+    async def fake_generate_embedding(text, model):
+        calls.append(text)
+        return [1.0]
+    monkeypatch.setattr(indexer, "generate_embedding", fake_generate_embedding)
+
+    product = make_products(1)[0]
+    assert await indexer.index_product(product, target=fake) is True
+    assert await indexer.index_product({**product, "price": 12.0}, target=fake) is False
+    assert calls == ["Product 0 desc"]
+    assert fake.rows["0"]["metadata"]["price"] == 12.0
+
+    assert await indexer.index_product({**product, "name": "Renamed"}, target=fake) is True
+    assert len(calls) == 2
+
+def test_metadata_patch_is_typed_like_full_metadata():
+    patch = indexer.build_metadata_patch({"id": 1, "price": Decimal("9.50"), "rating": 4, "inStock": 0, "stock": 3})
+    assert patch == {"price": 9.5, "rating": 4.0, "in_stock": False}
+    assert [type(value) for value in patch.values()] == [float, float, bool]
+    full = indexer.build_product_metadata({"id": 1, "price": Decimal("9.50"), "rating": 4, "inStock": 0}, "h")
+    assert {key: full[key] for key in patch} == patch
+
+@pytest.mark.asyncio
+async def test_index_products_records_failed_batches(monkeypatch):
+    fake = FakeCollection()
+    async def failing_generate_embeddings(texts, model):
+        raise RuntimeError("rate limited")
+    monkeypatch.setattr(indexer, "generate_embeddings", failing_generate_embeddings)
+
+    config = IndexerConfig(batch_size=5, max_concurrency=1, max_attempts=1)
+    stats = await index_products(make_products(5), config, target=fake)
+    assert stats.failed == 5
+    assert stats.processed == 5
+    assert fake.rows == {}
+
+@pytest.mark.asyncio
+async def test_watermark_stops_before_first_failed_batch(monkeypatch):
+    fake = FakeCollection()
+    async def flaky_generate_embeddings(texts, model):
+        if "Product 4 desc" in texts:
+            raise RuntimeError("rate limited")
+        return [[1.0] for _ in texts]
+    monkeypatch.setattr(indexer, "generate_embeddings", flaky_generate_embeddings)
+
+    config = IndexerConfig(batch_size=2, max_concurrency=1, max_attempts=1)
+    stats = await index_products(make_products(8), config, target=fake)
+    assert stats.failed_ids == ["4", "5"]
+    assert stats.embedded == 6
+    # Batches after the failed one were written, but resuming must not skip it
+    assert stats.watermark == 3
+    assert stats.watermark_count == 4
+
+@pytest.fixture
+def pgvector(monkeypatch):
+    written = {}
+
+    async def write_embeddings(embeddings):
+        embeddings = list(embeddings)
+        written.update(embeddings)
+        return len(embeddings)
+
+    async def fake_generate_embeddings(texts, model):
+        return [[float(len(text))] for text in texts]
+
+    async def no_collection():
+        return None
+
+    monkeypatch.setattr(indexer, "write_embeddings", write_embeddings)
+    monkeypatch.setattr(indexer, "generate_embeddings", fake_generate_embeddings)
+    monkeypatch.setattr(indexer, "get_collection", no_collection)
+    return written
+
+@pytest.mark.asyncio
+async def test_pgvector_gets_every_product_including_unchanged(pgvector):
+    fake = FakeCollection()
+    config = IndexerConfig(batch_size=4, write_pgvector=True)
+    await index_products(make_products(3), config, target=fake)
+    pgvector.clear()
+
+    products = make_products(3)
+    products[0]["price"] = 12.0
+    products[1]["name"] = "Renamed"
+    stats = await index_products(products, config, target=fake)
+
+    assert (stats.embedded, stats.refreshed, stats.unchanged) == (1, 1, 1)
+    assert pgvector == {0: [14.0], 1: [12.0], 2: [14.0]}
+
+@pytest.mark.asyncio
+async def test_pgvector_backend_indexes_without_chromadb(monkeypatch, pgvector):
+    monkeypatch.setattr(indexer, "pgvector_enabled", lambda: True)
+
+    stats = await index_products(make_products(2), IndexerConfig(write_pgvector=True))
+    assert stats.embedded == 2 and sorted(pgvector) == [0, 1]
+
+    async def fake_generate_embedding(text, model):
+        return [2.0]
+    monkeypatch.setattr(indexer, "generate_embedding", fake_generate_embedding)
+    assert await indexer.index_product({"id": 5, "name": "Product 5", "description": "desc", "price": 1.0}) is True
+    assert pgvector[5] == [2.0]
+
+    with pytest.raises(RuntimeError):
+        await index_products(make_products(1), IndexerConfig(write_pgvector=False))
+
+@pytest.mark.asyncio
+async def test_hybrid_search_filters_category_in_the_index_scan(monkeypatch):
+    from contextlib import asynccontextmanager
+
+    from src.database import pgvector_store
+
+    statements = []
+
+    class Result:
+        def mappings(self):
+            return self
+
+        def all(self):
+            return []
+
+    class Session:
+        async def execute(self, statement, params=None):
+            statements.append((str(statement), params))
+            return Result()
+
+    @asynccontextmanager
+    async def get_db():
+        yield Session()
+
+    monkeypatch.setattr(pgvector_store, "get_db", get_db)
+
+    await pgvector_store.hybrid_search(
+        [0.1], category="laptops", max_price=100, limit=5
+    )
+
+    (setting, setting_params), (query, params) = statements
+    assert "set_config" in setting and setting_params["name"] == "hnsw.ef_search"
+    nearest = query.split("SELECT", 2)[1]
+    assert "c.name ILIKE :category" in nearest and "p.price <= :max_price" in nearest
+    assert params["category"] == "%laptops%"
+
+    # Without filters the index keeps its default scan
+    statements.clear()
+    await pgvector_store.hybrid_search([0.1], limit=5)
+    assert len(statements) == 1
+    assert "c.name ILIKE" not in statements[0][0]
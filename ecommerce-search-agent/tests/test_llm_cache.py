@@ -0,0 +1,144 @@
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from redis.exceptions import RedisError
+
+from src.chains import llm_cache
+from src.chains.query_understanding import QueryUnderstandingChain, QueryUnderstandingResult
+from src.chains.sql_generation import SQLGenerationChain, SQLGenerationConfig
+
+UNDERSTANDING = json.dumps({
+    "category": "gaming mouse",
+    "features": ["wireless"],
+    "price_range": {"min": None, "max": 50.0},
+    "brands": [],
+    "constraints": [],
+})
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise RedisError("down")
+
+    async def set(self, key, value, ex=None):
+        raise RedisError("down")
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(llm_cache, "get_redis", lambda: redis)
+    monkeypatch.setattr(llm_cache, "_stats", {})
+    return redis
+
+
+@pytest.mark.asyncio
+async def test_repeated_prompt_is_served_from_cache(fake_redis):
+    llm = FakeListChatModel(responses=[UNDERSTANDING, "not json"])
+    chain = QueryUnderstandingChain(llm=llm)
+
+    first = await chain.run("wireless gaming mouse under $50")
+    second = await chain.run("wireless gaming mouse under $50")
+
+    # The fake model would have answered "not json" on a second call
+    assert second == first
+    assert llm.i == 1
+    stats = llm_cache.get_llm_cache_stats()["query_understanding"]
+    assert stats["hits"] == 1 and stats["misses"] == 1 and stats["hit_rate"] == 0.5
+    assert list(fake_redis.ttls.values()) == [llm_cache.LLM_CACHE_TTL]
+
+
+@pytest.mark.asyncio
+async def test_key_depends_on_rendered_prompt_and_model(fake_redis):
+    chain = QueryUnderstandingChain(llm=FakeListChatModel(responses=[UNDERSTANDING]))
+    other_model = QueryUnderstandingChain(llm=FakeListChatModel(responses=[UNDERSTANDING, "x"]))
+
+    key = chain.chain.cache_key({"query": "mouse"})
+    assert key.startswith("llm:query_understanding:")
+    assert key == chain.chain.cache_key({"query": "mouse"})
+    assert key != chain.chain.cache_key({"query": "keyboard"})
+    assert key != other_model.chain.cache_key({"query": "mouse"})
+
+
+@pytest.mark.asyncio
+async def test_aget_cached_does_not_call_model(fake_redis):
+    llm = FakeListChatModel(responses=[UNDERSTANDING, "not json"])
+    chain = QueryUnderstandingChain(llm=llm)
+
+    assert await chain.chain.aget_cached({"query": "mouse"}) is None
+    await chain.chain.ainvoke({"query": "mouse"})
+    assert await chain.chain.aget_cached({"query": "mouse"}) == UNDERSTANDING
+    assert llm.i == 1
+
+
+@pytest.mark.asyncio
+async def test_redis_errors_fall_back_to_model(monkeypatch):
+    monkeypatch.setattr(llm_cache, "get_redis", lambda: BrokenRedis())
+    monkeypatch.setattr(llm_cache, "_stats", {})
+    chain = QueryUnderstandingChain(llm=FakeListChatModel(responses=[UNDERSTANDING]))
+
+    result = await chain.run("mouse")
+
+    assert result.category == "gaming mouse"
+    assert llm_cache.get_llm_cache_stats()["query_understanding"]["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_unparseable_response_is_not_cached(fake_redis):
+    llm = FakeListChatModel(responses=["Sorry, I can't help with that", UNDERSTANDING])
+    chain = QueryUnderstandingChain(llm=llm)
+
+    with pytest.raises(json.JSONDecodeError):
+        await chain.run("mouse")
+    assert fake_redis.data == {}
+
+    # The next request asks the model again instead of replaying the failure
+    assert (await chain.run("mouse")).category == "gaming mouse"
+    assert llm.i == 0 and len(fake_redis.data) == 1
+
+
+@pytest.mark.asyncio
+async def test_rejected_sql_is_not_cached_and_failed_sql_can_be_dropped(fake_redis):
+    valid = "SELECT p.id FROM products p ORDER BY p.price LIMIT 5;"
+    llm = FakeListChatModel(responses=["DROP TABLE products;", valid, valid])
+    chain = SQLGenerationChain(llm=llm)
+    understanding = QueryUnderstandingResult(category="mouse")
+    config = SQLGenerationConfig(limit=5)
+
+    with pytest.raises(ValueError):
+        await chain.run(understanding, config)
+    assert fake_redis.data == {}
+
+    assert await chain.run(understanding, config) == valid
+    assert len(fake_redis.data) == 1
+    await chain.invalidate(understanding, config)
+    assert fake_redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_unusable_cached_entry_is_replaced(fake_redis):
+    llm = FakeListChatModel(responses=[UNDERSTANDING])
+    chain = QueryUnderstandingChain(llm=llm)
+    key = chain.chain.cache_key({"query": "mouse"})
+    fake_redis.data[key] = json.dumps("not json")
+
+    assert (await chain.run("mouse")).category == "gaming mouse"
+    assert json.loads(fake_redis.data[key]) == UNDERSTANDING
@@ -0,0 +1,87 @@
+import json
+import random
+
+import pytest
+import structlog
+
+from src.utils import logger as logging_config
+from src.utils.logger import (
+    EventSampler,
+    LevelFilter,
+    PayloadSummarizer,
+    reset_verbose_logging,
+    set_verbose_logging,
+)
+
+
+@pytest.fixture
+def verbose():
+    token = set_verbose_logging(True)
+    yield
+    reset_verbose_logging(token)
+
+
+def test_sampler_keeps_a_fraction_of_listed_events(monkeypatch):
+    monkeypatch.setattr(random, "random", iter([0.05, 0.5, 0.5]).__next__)
+    sampler = EventSampler.from_string("Starting search=0.1, Search completed=1")
+
+    assert sampler(None, "info", {"event": "Starting search"}) == {"event": "Starting search", "sample_rate": 0.1}
+    with pytest.raises(structlog.DropEvent):
+        sampler(None, "info", {"event": "Starting search"})
+    assert sampler(None, "info", {"event": "Search completed"}) == {"event": "Search completed"}
+    assert sampler(None, "warning", {"event": "Starting search"}) == {"event": "Starting search"}
+
+
+def test_sampler_is_bypassed_for_verbose_requests(verbose):
+    sampler = EventSampler({"Starting search": 0.0})
+    assert sampler(None, "info", {"event": "Starting search"}) == {"event": "Starting search"}
+
+
+def test_summarizer_caps_strings_and_collections():
+    summarizer = PayloadSummarizer(max_chars=5, max_items=2)
+    event = summarizer(None, "info", {
+        "event": "Combined results",
+        "sql": "SELECT * FROM products",
+        "products": [{"name": "x" * 10}, {}, {}],
+        "total": 3,
+    })
+
+    assert event["sql"] == "SELEC...(+17 chars)"
+    assert event["products"] == [{"name": "xxxxx...(+5 chars)"}, {}, "...(+1 items)"]
+    assert event["total"] == 3
+
+
+def test_summarizer_is_bypassed_for_verbose_requests(verbose):
+    payload = "x" * 100
+    assert PayloadSummarizer(max_chars=5)(None, "debug", {"event": "e", "sql": payload})["sql"] == payload
+
+
+def test_level_filter_lets_verbose_requests_through(verbose):
+    assert LevelFilter("INFO")(None, "debug", {"event": "e"}) == {"event": "e"}
+
+
+def test_level_filter_drops_lower_levels():
+    level_filter = LevelFilter("INFO")
+    with pytest.raises(structlog.DropEvent):
+        level_filter(None, "debug", {"event": "e"})
+    assert level_filter(None, "warning", {"event": "e"}) == {"event": "e"}
+
+
+def test_queued_logging_writes_json_lines(capsys, monkeypatch):
+    monkeypatch.setattr(logging_config, "LOG_ASYNC", True)
+    monkeypatch.setattr(logging_config, "LOG_MAX_FIELD_CHARS", 8)
+    logging_config.configure_logging()
+    try:
+        log = structlog.get_logger("src.tests")
+        log.debug("Hidden")
+        log.info("Search completed", query="wireless headphones", total=3)
+        logging_config.stop_logging()
+    finally:
+        logging_config.configure_logging()
+
+    lines = [json.loads(line) for line in capsys.readouterr().err.splitlines()]
+    assert [line["event"] for line in lines] == ["Search completed"]
+    assert lines[0]["level"] == "info"
+    assert lines[0]["total"] == 3
+    assert lines[0]["query"] == "wireless...(+11 chars)"
+    assert "timestamp" in lines[0]
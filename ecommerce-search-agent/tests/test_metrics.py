@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+from httpx import AsyncClient
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langchain_core.messages import AIMessage
+from prometheus_client import REGISTRY
+
+from src.chains.usage_callback import OpenAIUsageCallback
+from src.utils import metrics
+from src.utils.deadline import Deadline, run_stage
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_stages_are_labelled_with_the_current_endpoint():
+    before = sample("search_stage_duration_seconds_count", endpoint="/search/text", stage="combine")
+    token = metrics.bind_request({"route": SimpleNamespace(path="/search/text")})
+    try:
+        with metrics.time_stage("combine"):
+            pass
+
+        async def understand():
+            return "ok"
+
+        await run_stage("query_understanding", understand(), Deadline(1.0))
+    finally:
+        metrics.unbind_request(token)
+
+    assert sample("search_stage_duration_seconds_count", endpoint="/search/text", stage="combine") == before + 1
+    assert sample("search_stage_duration_seconds_count", endpoint="/search/text", stage="query_understanding") >= 1
+
+
+def test_cache_lookups_are_counted():
+    hits = sample("cache_requests_total", endpoint="none", cache="search", result="hit")
+    misses = sample("cache_requests_total", endpoint="none", cache="search", result="miss")
+    metrics.record_cache("search", True)
+    metrics.record_cache("search", False)
+    metrics.record_cache("search", False)
+    assert sample("cache_requests_total", endpoint="none", cache="search", result="hit") == hits + 1
+    assert sample("cache_requests_total", endpoint="none", cache="search", result="miss") == misses + 2
+
+
+def test_usage_callback_counts_calls_and_tokens():
+    labels = {"endpoint": "none", "operation": "query_understanding", "model": "gpt-test"}
+    calls = sample("openai_requests_total", **labels)
+    prompt = sample("openai_tokens_total", type="prompt", **labels)
+    result = LLMResult(
+        generations=[[ChatGeneration(message=AIMessage(content="{}"))]],
+        llm_output={"model_name": "gpt-test", "token_usage": {"prompt_tokens": 120, "completion_tokens": 30}},
+    )
+    OpenAIUsageCallback("query_understanding").on_llm_end(result)
+    assert sample("openai_requests_total", **labels) == calls + 1
+    assert sample("openai_tokens_total", type="prompt", **labels) == prompt + 120
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_requests_by_route_template(monkeypatch):
+    monkeypatch.setenv("APP_NAME", "test")
+    from src.main import app
+
+    # The test client does not run the lifespan that registers it
+    metrics.register_pool_collector()
+    async with AsyncClient(app=app, base_url="http://test") as client:
+        await client.get("/metrics")
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{endpoint="/metrics",method="GET",status="200"}' in response.text
+    assert "connection_pool_connections" in response.text
+
+
+def test_pool_collector_is_registered_once_and_reads_public_counts(monkeypatch):
+    from prometheus_client import CollectorRegistry
+
+    from src.database import redis_client
+
+    registry = CollectorRegistry()
+    monkeypatch.setattr(metrics, "_pool_collector", None)
+    metrics.register_pool_collector(registry)
+    metrics.register_pool_collector(registry)
+    # A second copy of the module registering its own collector is tolerated
+    monkeypatch.setattr(metrics, "_pool_collector", None)
+    metrics.register_pool_collector(registry)
+
+    pool = redis_client.CountingConnectionPool(max_connections=8)
+    pool.make_connection()
+    monkeypatch.setattr(redis_client, "_redis", SimpleNamespace(connection_pool=pool))
+    monkeypatch.setattr(redis_client, "_redis_bytes", None)
+
+    assert redis_client.get_pool_stats() == {"in_use": 0, "idle": 1, "max": 8}
+    assert registry.get_sample_value("connection_pool_connections", {"pool": "redis", "state": "max"}) == 8
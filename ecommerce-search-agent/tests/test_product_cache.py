@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import fakeredis
+import pytest
+
+from src.agents.recommendation_agent import RecommendationAgent
+from src.agents import recommendation_agent as recommendation_module
+from src.agents.search_agent import SearchAgent
+from src.database import redis_client
+from src.database.product_cache import ProductCache, normalize_product
+
+
+def make_row(id_, price="10.00"):
+    return {
+        "id": id_,
+        "name": f"Product {id_}",
+        "description": None,
+        "price": Decimal(price),
+        "originalPrice": Decimal("12.50"),
+        "image": f"{id_}.jpg",
+        "images": [f"{id_}-a.jpg"],
+        "rating": None,
+        "reviews": 3,
+        "inStock": True,
+        "stock": 4,
+        "features": '["wireless"]',
+        "specifications": {"color": "black"},
+        "category_name": "Computers",
+    }
+
+
+class CountingLoader:
+    def __init__(self, rows):
+        self.rows = {row["id"]: row for row in rows}
+        self.calls = []
+
+    async def __call__(self, ids):
+        self.calls.append(sorted(ids))
+        return [self.rows[id_] for id_ in ids if id_ in self.rows]
+
+
+@pytest.fixture(autouse=True)
+def fake_redis(monkeypatch):
+    monkeypatch.setattr(redis_client, "_redis", fakeredis.aioredis.FakeRedis(decode_responses=True))
+
+
+def test_normalize_product_returns_json_types():
+    product = normalize_product(make_row(1))
+    assert product["price"] == 10.0 and product["originalPrice"] == 12.5
+    assert product["features"] == ["wireless"]
+    assert product["rating"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_misses_are_loaded_in_one_batch_then_served_from_cache():
+    loader = CountingLoader([make_row(1), make_row(2)])
+    cache = ProductCache(loader=loader)
+
+    first = await cache.get_many([2, 1, 2, 99])
+    assert set(first) == {1, 2}
+    assert loader.calls == [[1, 2, 99]]
+
+    first[1]["name"] = "mutated by caller"
+    assert (await cache.get_many([1]))[1]["name"] == "Product 1"
+    # A fresh process finds them in Redis
+    assert set(await ProductCache(loader=loader).get_many([1, 2])) == {1, 2}
+    assert loader.calls == [[1, 2, 99]]
+
+
+@pytest.mark.asyncio
+async def test_lru_is_bounded_and_invalidation_reaches_redis():
+    loader = CountingLoader([make_row(1), make_row(2)])
+    cache = ProductCache(loader=loader, max_size=1)
+    await cache.get_many([1, 2])
+    assert list(cache._local) == [2]
+
+    loader.rows[2] = make_row(2, price="5.00")
+    await cache.invalidate([2])
+    assert (await cache.get_many([2]))[2]["price"] == 5.0
+    assert loader.calls[-1] == [2]
+
+
+@pytest.mark.asyncio
+async def test_search_hydrates_vector_only_hits_in_rank_order():
+    loader = CountingLoader([make_row(1), make_row(3)])
+    agent = SearchAgent(tools=[], product_cache=ProductCache(loader=loader, redis_ttl=0))
+    sql_rows = [{**make_row(2), "score": 1.0}]
+    vector_hits = [
+        {"id": "3", "distance": 0.1, "metadata": {"backend_id": 3}},
+        {"id": "2", "distance": 0.5, "metadata": {"backend_id": 2}},
+        {"id": "4", "distance": 0.2, "metadata": {"backend_id": 4}},  # deleted from the catalog
+        {"id": "1", "distance": 0.3, "metadata": {"backend_id": 1}},
+    ]
+
+    result = await agent._combine_results(sql_rows, vector_hits, limit=4)
+
+    assert [p["id"] for p in result["products"]] == [2, 3, 1]
+    assert result["products"][1]["images"] == ["3-a.jpg"]
+    assert result["products"][1]["score"] == pytest.approx(0.9)
+    assert loader.calls == [[1, 3, 4]]
+
+
+@pytest.mark.asyncio
+async def test_recommendations_cache_the_ranking_not_the_products(monkeypatch):
+    class Collection:
+        def get(self, ids, include=None):
+            return {"embeddings": [[1.0]]}
+
+        def query(self, query_embeddings, n_results):
+            return {"ids": [["1", "2"]], "metadatas": [[{"backend_id": 1}, {"backend_id": 2}]], "distances": [[0.0, 0.2]]}
+
+    async def get_collection():
+        return Collection()
+
+    monkeypatch.setattr(recommendation_module, "get_collection", get_collection)
+    loader = CountingLoader([make_row(2)])
+    cache = ProductCache(loader=loader, redis_ttl=0)
+    agent = RecommendationAgent(product_cache=cache)
+
+    first = await agent.recommend("1", n_results=2)
+    loader.rows[2] = make_row(2, price="7.00")
+    await cache.invalidate([2])
+    second = await agent.recommend("1", n_results=2)
+
+    assert [r["price"] for r in first["recommendations"]] == [10.0]
+    assert [r["price"] for r in second["recommendations"]] == [7.0]
+    assert await redis_client.get_cache_field("recommend:1", "2") == [[2, pytest.approx(0.8)]]
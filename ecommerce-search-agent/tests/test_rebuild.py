@@ -0,0 +1,110 @@
+import pytest
+
+from src.embeddings import indexer, rebuild
+from src.embeddings.indexer import IndexerConfig
+from src.embeddings.rebuild import RebuildCheckpoint, rebuild_collection
+
+
+class FakeCollection:
+    def __init__(self, name):
+        self.name = name
+        self.rows = {}
+
+    def get(self, ids, include=None):
+        found = [id_ for id_ in ids if id_ in self.rows]
+        return {"ids": found, "metadatas": [self.rows[id_] for id_ in found]}
+
+    def upsert(self, ids, embeddings, metadatas, documents):
+        self.rows.update(zip(ids, metadatas, strict=True))
+
+    def update(self, ids, metadatas):
+        for id_, metadata in zip(ids, metadatas, strict=True):
+            self.rows[id_].update(metadata)
+
+    def count(self):
+        return len(self.rows)
+
+
+PRODUCTS = [{"id": i, "name": f"Product {i}", "description": "desc", "price": 10.0} for i in range(6)]
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    target = FakeCollection("products_v2")
+    swapped = []
+    building = []
+
+    async def stream_products(after_id=None):
+        for product in PRODUCTS:
+            if after_id is None or product["id"] > after_id:
+                yield product
+
+    async def fetch_products_by_ids(ids):
+        return [product for product in PRODUCTS if product["id"] in ids]
+
+    async def count_products():
+        return len(PRODUCTS)
+
+    async def swap_alias(name):
+        swapped.append(name)
+
+    async def garbage_collect_collections(keep=2):
+        return []
+
+    async def set_building_collection(name):
+        building.append(name)
+
+    monkeypatch.setattr(rebuild, "stream_products", stream_products)
+    monkeypatch.setattr(rebuild, "fetch_products_by_ids", fetch_products_by_ids)
+    monkeypatch.setattr(rebuild, "count_products", count_products)
+    monkeypatch.setattr(rebuild, "get_named_collection", lambda name: target)
+    monkeypatch.setattr(rebuild, "swap_alias", swap_alias)
+    monkeypatch.setattr(rebuild, "garbage_collect_collections", garbage_collect_collections)
+    monkeypatch.setattr(rebuild, "set_building_collection", set_building_collection)
+    return target, swapped
+
+
+def fail_once(monkeypatch, text, times=1):
+    failures = {"left": times}
+
+    async def generate_embeddings(texts, model):
+        if text in texts and failures["left"]:
+            failures["left"] -= 1
+            raise RuntimeError("rate limited")
+        return [[1.0] for _ in texts]
+
+    monkeypatch.setattr(indexer, "generate_embeddings", generate_embeddings)
+
+
+@pytest.mark.asyncio
+async def test_failed_products_are_retried_before_the_swap(monkeypatch, catalog):
+    target, swapped = catalog
+    fail_once(monkeypatch, "Product 2 desc")
+    config = IndexerConfig(batch_size=2, max_concurrency=1, max_attempts=1)
+
+    await rebuild_collection(RebuildCheckpoint(collection=target.name, expected=6), config=config)
+
+    assert sorted(target.rows, key=int) == [str(i) for i in range(6)]
+    assert swapped == [target.name]
+
+
+@pytest.mark.asyncio
+async def test_persistent_failures_keep_the_current_collection(monkeypatch, catalog):
+    target, swapped = catalog
+    fail_once(monkeypatch, "Product 2 desc", times=2)
+    config = IndexerConfig(batch_size=2, max_concurrency=1, max_attempts=1)
+    checkpoints = []
+
+    async def on_checkpoint(checkpoint, stats):
+        checkpoints.append(checkpoint.after_id)
+
+    with pytest.raises(ValueError):
+        await rebuild_collection(
+            RebuildCheckpoint(collection=target.name, expected=6),
+            on_checkpoint=on_checkpoint,
+            config=config,
+        )
+
+    assert swapped == []
+    # Resuming restarts at the failed batch
+    assert checkpoints[-1] == 1
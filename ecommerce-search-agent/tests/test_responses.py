@@ -0,0 +1,97 @@
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from httpx import ASGITransport, AsyncClient
+
+from src.api.dependencies import get_search_agent
+from src.api.models import SearchResponse
+from src.api.responses import SEARCH_RESPONSE, FastJSONResponse, encode_response
+from src.database import redis_client
+from src.main import app
+
+RESULT = {
+    "products": [
+        {"id": 1, "name": "Wireless mouse", "price": 19.9, "originalPrice": 0.1 + 0.2, "score": 1.5, "extra": "dropped"},
+        {"id": 2, "name": "Café table ✓", "price": 120, "images": ["a.jpg"], "specifications": {"legs": 4}},
+    ],
+    "total": 2,
+}
+
+
+def test_encoding_matches_response_model_output():
+    reference = FastAPI()
+
+    @reference.get("/", response_model=SearchResponse)
+    async def search():
+        return SearchResponse(**RESULT)
+
+    assert encode_response(SEARCH_RESPONSE, RESULT) == TestClient(reference).get("/").content
+
+
+def test_fast_json_response_passes_bytes_through():
+    assert FastJSONResponse(b'{"total":0}').body == b'{"total":0}'
+    assert FastJSONResponse({1: "a"}).body == b'{"1":"a"}'
+
+
+class CountingSearchAgent:
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    async def search(self, query, limit=5, facets=False):
+        self.calls += 1
+        return self.result
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_client, "_redis", fakeredis.aioredis.FakeRedis(server=server, decode_responses=True))
+    monkeypatch.setattr(redis_client, "_redis_bytes", fakeredis.aioredis.FakeRedis(server=server))
+
+
+async def post_twice(agent):
+    app.dependency_overrides[get_search_agent] = lambda: agent
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            return [await client.post("/search/text", json={"query": "mouse", "limit": 2}) for _ in range(2)]
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_text_search_serves_cached_bytes(fake_redis):
+    agent = CountingSearchAgent(RESULT)
+    first, second = await post_twice(agent)
+
+    assert agent.calls == 1
+    assert first.content == second.content == encode_response(SEARCH_RESPONSE, RESULT)
+    assert second.headers["content-type"] == "application/json"
+    assert first.json()["products"][0]["price"] == "19.9"
+
+
+@pytest.mark.asyncio
+async def test_degraded_text_search_is_not_cached(fake_redis):
+    agent = CountingSearchAgent({**RESULT, "degradations": ["vector_only"]})
+    await post_twice(agent)
+    assert agent.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_facets_are_cached_separately(fake_redis):
+    agent = CountingSearchAgent(RESULT)
+    app.dependency_overrides[get_search_agent] = lambda: agent
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            for facets in (False, True, True):
+                await client.post("/search/text", json={"query": "mouse", "limit": 2, "facets": facets})
+    finally:
+        app.dependency_overrides.clear()
+    assert agent.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_raw_cache_round_trips_bytes(fake_redis):
+    await redis_client.set_cache_raw("search_response:0:mouse:2", b'{"total":0}')
+    assert await redis_client.get_cache_raw("search_response:0:mouse:2") == b'{"total":0}'
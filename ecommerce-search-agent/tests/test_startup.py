@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.api import dependencies
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_importing_app_does_not_load_heavy_dependencies():
+    env = {**os.environ, "APP_NAME": "test", "OPENAI_API_KEY": "sk-test"}
+    code = (
+        "import sys, src.main\n"
+        "heavy = [m for m in ('chromadb', 'langchain.agents', 'langchain_openai', 'openai') if m in sys.modules]\n"
+        "print(','.join(heavy))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1:] in ([], [""])
+
+
+def test_agents_are_built_once_and_shared(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(dependencies, "_agents", {})
+    search_agent = dependencies.get_search_agent()
+    image_agent = dependencies.get_image_agent()
+    assert dependencies.get_search_agent() is search_agent
+    assert image_agent.search_agent is search_agent
+    # The tool-calling executor is only built when something runs the agent
+    assert search_agent._agent_executor is None
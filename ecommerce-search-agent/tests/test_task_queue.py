@@ -0,0 +1,92 @@
+import asyncio
+from datetime import datetime
+
+import fakeredis
+import pytest
+
+from src.agents.admin_agent import AdminConfig, AdminTask, AdminWorker
+from src.database import redis_client, task_queue
+
+
+@pytest.fixture(autouse=True)
+def redis(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_redis", redis)
+    return redis
+
+
+async def queue_task(task_id, task_type="rebuild_embeddings"):
+    task = AdminTask(task_id=task_id, task_type=task_type, status="pending", start_time=datetime.now())
+    await task_queue.save_task(task_id, task.dict())
+    await task_queue.enqueue_task(task_id)
+
+
+@pytest.mark.asyncio
+async def test_claimed_tasks_of_live_workers_are_not_requeued(redis):
+    await queue_task("t1")
+    await task_queue.heartbeat_worker("w1", ttl=60)
+
+    assert await task_queue.claim_task("w1", timeout=1) == "t1"
+    assert await task_queue.requeue_stale_tasks() == []
+
+    await redis.delete(task_queue.WORKER_KEY.format(worker_id="w1"))
+    assert await task_queue.requeue_stale_tasks() == ["t1"]
+    assert await redis.lrange(task_queue.QUEUE_KEY, 0, -1) == ["t1"]
+    assert await redis.smembers(task_queue.WORKERS_KEY) == set()
+
+
+@pytest.mark.asyncio
+async def test_worker_runs_at_most_max_concurrent_tasks():
+    worker = AdminWorker(AdminConfig(max_concurrent_tasks=2))
+    running = 0
+    peak = 0
+
+    async def handler(task):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+
+    worker.handlers["sleep"] = handler
+    for i in range(5):
+        await queue_task(f"t{i}", task_type="sleep")
+
+    async def stop_when_done():
+        while len(await task_queue.list_tasks()) != 5 or any(
+            t["status"] != "completed" for t in await task_queue.list_tasks()
+        ):
+            await asyncio.sleep(0.01)
+        worker.stop()
+
+    await asyncio.wait_for(asyncio.gather(worker.run_forever(), stop_when_done()), timeout=10)
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_timed_out_task_with_checkpoint_is_requeued(redis):
+    worker = AdminWorker(AdminConfig())
+    worker.config.task_timeout = 0.05
+
+    async def handler(task):
+        await task_queue.save_checkpoint(task.task_id, {"after_id": 10})
+        await asyncio.sleep(1)
+
+    worker.handlers["slow"] = handler
+    await queue_task("t1", task_type="slow")
+    await task_queue.heartbeat_worker(worker.worker_id, ttl=60)
+    assert await task_queue.claim_task(worker.worker_id, timeout=1) == "t1"
+
+    await worker.process("t1")
+
+    task = await task_queue.load_task("t1")
+    assert task["status"] == "pending" and task["attempts"] == 1
+    assert await redis.lrange(task_queue.QUEUE_KEY, 0, -1) == ["t1"]
+    assert await redis.lrange(task_queue.PROCESSING_KEY.format(worker_id=worker.worker_id), 0, -1) == []
+
+    # Without attempts left the task fails for good
+    worker.config.max_task_attempts = 1
+    assert await task_queue.claim_task(worker.worker_id, timeout=1) == "t1"
+    await worker.process("t1")
+    assert (await task_queue.load_task("t1"))["status"] == "failed"
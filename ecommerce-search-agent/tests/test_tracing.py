@@ -0,0 +1,112 @@
+import asyncio
+import io
+import json
+
+import pytest
+
+from src.utils import tracing
+from src.utils.tracing import ConsoleSpanExporter, JsonlSpanExporter, SpanExporter, add_trace_context, span, traced
+
+
+class ListExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span)
+
+
+@pytest.fixture
+def exporter():
+    exporter = ListExporter()
+    tracing.set_span_exporter(exporter)
+    yield exporter
+    tracing.set_span_exporter(None)
+
+
+@pytest.mark.asyncio
+async def test_spans_nest_across_awaits_and_tasks(exporter):
+    @traced("child")
+    async def child():
+        await asyncio.sleep(0)
+
+    with span("root", query="mouse") as root:
+        await asyncio.gather(child(), asyncio.create_task(child()))
+
+    children = [s for s in exporter.spans if s.name == "child"]
+    assert len(children) == 2
+    assert {s.parent_id for s in children} == {root.span_id}
+    assert {s.trace_id for s in exporter.spans} == {root.trace_id}
+    assert exporter.spans[-1] is root and root.attributes == {"query": "mouse"}
+    assert tracing.current_span().sampled is False
+
+
+def test_errors_are_recorded(exporter):
+    with pytest.raises(ValueError):
+        with span("failing"):
+            raise ValueError("bad sql")
+    assert exporter.spans[0].error == "ValueError: bad sql"
+
+
+def test_nothing_is_recorded_without_exporter():
+    tracing.set_span_exporter(None)
+    with span("ignored") as ignored:
+        ignored.set_attribute("key", "value")
+        assert add_trace_context(None, None, {}) == {}
+    assert ignored.sampled is False
+
+
+def test_unsampled_requests_skip_their_children(exporter, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACING_SAMPLE_RATE", 0.0)
+    with span("root"):
+        with span("child"):
+            pass
+    assert exporter.spans == []
+
+
+def test_log_lines_carry_trace_ids(exporter):
+    with span("root") as root:
+        event = add_trace_context(None, None, {"event": "searching"})
+    assert event["trace_id"] == root.trace_id
+    assert event["span_id"] == root.span_id
+
+
+def test_console_exporter_prints_tree_when_root_finishes():
+    stream = io.StringIO()
+    tracing.set_span_exporter(ConsoleSpanExporter(stream))
+    try:
+        with span("search"):
+            with span("query_understanding"):
+                pass
+            assert stream.getvalue() == ""
+    finally:
+        tracing.set_span_exporter(None)
+    lines = stream.getvalue().splitlines()
+    assert lines[0].startswith("trace ")
+    assert lines[1].endswith(" search")
+    assert lines[2].endswith("   query_understanding")
+
+
+def test_jsonl_exporter_writes_one_span_per_line(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = JsonlSpanExporter(str(path))
+    tracing.set_span_exporter(exporter)
+    try:
+        with span("search", limit=5):
+            with span("redis.get"):
+                pass
+    finally:
+        tracing.set_span_exporter(None)
+        exporter.shutdown()
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["name"] for r in records] == ["redis.get", "search"]
+    assert records[0]["parent_id"] == records[1]["span_id"]
+    assert records[1]["attributes"] == {"limit": 5}
+
+
+def test_exporters_must_implement_export():
+    class Incomplete(SpanExporter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
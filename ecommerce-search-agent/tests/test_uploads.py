@@ -0,0 +1,48 @@
+import pytest
+from fastapi import FastAPI, Request
+from httpx import AsyncClient
+
+from src.utils.uploads import read_image_upload
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 200
+
+app = FastAPI()
+
+
+@app.post("/upload")
+async def upload(request: Request):
+    data, form = await read_image_upload(request, max_bytes=1024)
+    return {"size": len(data), "query": form.get("query")}
+
+
+@pytest.mark.asyncio
+async def test_accepts_image_and_fields():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post(
+            "/upload",
+            files={"image": ("photo.png", PNG, "application/octet-stream")},
+            data={"query": "red shoes"},
+        )
+    assert response.status_code == 200
+    assert response.json() == {"size": len(PNG), "query": "red shoes"}
+
+
+@pytest.mark.asyncio
+async def test_rejects_oversized_upload():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/upload", files={"image": ("big.png", PNG * 10, "image/png")})
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_rejects_non_image_regardless_of_declared_type():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/upload", files={"image": ("fake.png", b"hello" * 10, "image/png")})
+    assert response.status_code == 415
+
+
+@pytest.mark.asyncio
+async def test_requires_multipart():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/upload", json={"image": "nope"})
+    assert response.status_code == 415
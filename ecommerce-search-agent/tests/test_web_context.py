@@ -0,0 +1,82 @@
+import httpx
+import pytest
+
+from src.utils import web_context
+from src.utils.web_context import StaticWebContextProvider, WebContextProvider, get_web_context
+
+RESULTS = [{"title": "Logitech G305", "href": "logitech.com", "body": "Wireless gaming mouse"}]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+
+class FailingProvider(WebContextProvider):
+    async def search(self, query, max_results):
+        raise httpx.ReadTimeout("too slow")
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(web_context, "get_redis", lambda: fake)
+    yield fake
+    web_context.set_web_context_provider(None)
+
+
+@pytest.mark.asyncio
+async def test_results_are_cached_by_cleaned_query(redis):
+    provider = StaticWebContextProvider({"g305 mouse": RESULTS})
+    web_context.set_web_context_provider(provider)
+
+    assert await get_web_context("**g305**   mouse") == RESULTS
+    assert await get_web_context("G305 Mouse") == RESULTS
+    assert provider.calls == 1
+    assert list(redis.ttls.values()) == [web_context.WEB_CONTEXT_CACHE_TTL]
+
+
+@pytest.mark.asyncio
+async def test_empty_results_use_short_ttl(redis):
+    web_context.set_web_context_provider(StaticWebContextProvider())
+
+    assert await get_web_context("unknown thing") == []
+    assert list(redis.ttls.values()) == [web_context.WEB_CONTEXT_EMPTY_TTL]
+
+
+@pytest.mark.asyncio
+async def test_provider_errors_return_no_context(redis):
+    web_context.set_web_context_provider(FailingProvider())
+
+    assert await get_web_context("mouse") == []
+    assert redis.data == {}
+
+
+class BrokenParserProvider(WebContextProvider):
+    async def search(self, query, max_results):
+        raise AttributeError("'NoneType' object has no attribute 'get_text'")
+
+
+@pytest.mark.asyncio
+async def test_parse_errors_and_corrupt_cache_entries_return_no_context(redis):
+    web_context.set_web_context_provider(BrokenParserProvider())
+    assert await get_web_context("mouse") == []
+
+    redis.data[web_context._cache_key("mouse", 3)] = "{not json"
+    assert await get_web_context("mouse") == []
+
+
+def test_providers_must_implement_search():
+    class Incomplete(WebContextProvider):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
@@ -0,0 +1,94 @@
+import pytest
+
+from src.utils import web_context_classifier
+from src.utils.web_context_classifier import WebContextClassifier, tokenize
+
+VOCABULARY = {
+    "wireless", "mouse", "gaming", "keyboard", "laptop", "electronics", "bluetooth"
+}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+async def load_vocabulary():
+    return VOCABULARY
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(web_context_classifier, "get_redis", lambda: fake)
+    return fake
+
+
+@pytest.fixture
+async def classifier(redis):
+    classifier = WebContextClassifier(
+        vocabulary_loader=load_vocabulary, oov_threshold=0.3, long_query_tokens=6
+    )
+    await classifier.refresh_vocabulary()
+    return classifier
+
+
+def test_tokenize_drops_stopwords_and_numbers():
+    tokens = tokenize("Best wireless mice under $50 for a gamer")
+    assert tokens == ["wireless", "mice", "gamer"]
+
+
+@pytest.mark.asyncio
+async def test_catalog_queries_skip_web_context(classifier):
+    decision = await classifier.decide("cheap wireless gaming mice keyboards")
+    assert not decision.needed
+    assert decision.reason == "in_vocabulary"
+
+
+@pytest.mark.asyncio
+async def test_unknown_terms_need_web_context(classifier):
+    decision = await classifier.decide("g305 lightspeed mouse")
+    assert decision.needed
+    assert decision.reason == "unknown_terms"
+    assert decision.oov_ratio == pytest.approx(2 / 3)
+
+
+@pytest.mark.asyncio
+async def test_long_descriptive_queries_skip_web_context(classifier):
+    decision = await classifier.decide(
+        "quiet ergonomic wireless mouse with silent clicks and long battery"
+    )
+    assert not decision.needed
+    assert decision.reason == "long_query"
+
+
+@pytest.mark.asyncio
+async def test_weak_outcome_without_web_context_is_remembered(classifier):
+    query = "wireless gaming mouse"
+    assert not (await classifier.decide(query)).needed
+
+    await classifier.record_outcome(query, understood=False, used_web_context=False)
+
+    decision = await classifier.decide(query)
+    assert decision.needed
+    assert decision.reason == "past_outcome"
+    assert classifier.decisions == 2 and classifier.skipped == 1
+
+
+@pytest.mark.asyncio
+async def test_without_vocabulary_web_context_is_used(redis):
+    async def failing_loader():
+        raise RuntimeError("database down")
+
+    classifier = WebContextClassifier(vocabulary_loader=failing_loader)
+    await classifier.refresh_vocabulary()
+
+    decision = await classifier.decide("wireless mouse")
+    assert decision.needed
+    assert decision.reason == "no_vocabulary"